@@ -0,0 +1,75 @@
+# Copyright (c) 2022, Antmicro
+# SPDX-License-Identifier: Apache-2.0
+
+from typing import Iterable, List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+
+
+class TileLinkULRegion(NamedTuple):
+    """Mapped address range. Regions are sampled in proportion to their
+    weight, which defaults to their size."""
+    base: int
+    size: int
+    readable: bool = True
+    writable: bool = True
+    weight: Optional[float] = None
+
+
+class TileLinkULAddressMap():
+    """Non-overlapping regions with access permissions and sampling weights.
+
+    Regions can be given as TileLinkULRegion or (base, size) pairs. Sampling
+    looks a uniform number up in a table of cumulative weights computed up
+    front, so it costs O(log n) per address for n regions.
+    """
+    def __init__(self, regions: Iterable[Union[TileLinkULRegion, Tuple[int, int]]]):
+        self.regions: List[TileLinkULRegion] = sorted(TileLinkULRegion(*region) for region in regions)
+        assert self.regions, "Address map must have at least one region"
+        for region, next_region in zip(self.regions, self.regions[1:]):
+            assert region.base + region.size <= next_region.base, \
+                f"Regions at 0x{region.base:x} and 0x{next_region.base:x} overlap"
+        for region in self.regions:
+            assert region.size > 0, f"Region at 0x{region.base:x} is empty"
+            assert region.readable or region.writable, f"Region at 0x{region.base:x} is not accessible"
+            assert region.weight is None or region.weight >= 0, f"Region at 0x{region.base:x} has a negative weight"
+
+        self.bases = np.array([region.base for region in self.regions], dtype=np.uint64)
+        self.last_offsets = np.array([region.size - 1 for region in self.regions], dtype=np.uint64)
+        self.readable = np.array([region.readable for region in self.regions], dtype=bool)
+        self.writable = np.array([region.writable for region in self.regions], dtype=bool)
+        weights = [float(region.size if region.weight is None else region.weight) for region in self.regions]
+        self.cumulative_weights = np.cumsum(weights)
+        self.total_weight = float(self.cumulative_weights[-1])
+        assert self.total_weight > 0, "At least one region must have a positive weight"
+
+    def end(self) -> int:
+        """First address above every region."""
+        return self.regions[-1].base + self.regions[-1].size
+
+    def check_alignment(self, alignment: int) -> None:
+        for region in self.regions:
+            assert region.base % alignment == 0 and region.size % alignment == 0, \
+                f"Region 0x{region.base:x}+0x{region.size:x} is not aligned to {alignment} bytes"
+
+    def choose(self, rng: np.random.Generator, count: int) -> np.ndarray:
+        """Indices of count regions drawn according to their weights."""
+        if len(self.regions) == 1:
+            return np.zeros(count, dtype=np.intp)
+        region = np.searchsorted(self.cumulative_weights, rng.random(count) * self.total_weight, side="right")
+        # Guards against rounding up to the total weight
+        return np.minimum(region, len(self.regions) - 1)
+
+    def uniform(self, rng: np.random.Generator, count: int) -> np.ndarray:
+        """Addresses drawn uniformly from regions drawn according to their weights."""
+        region = self.choose(rng, count)
+        return self.bases[region] + rng.integers(0, self.last_offsets[region], dtype=np.uint64, endpoint=True)
+
+    def find(self, addresses: np.ndarray) -> np.ndarray:
+        """Index of the region holding each address, -1 for unmapped addresses."""
+        region = np.searchsorted(self.bases, addresses, side="right") - 1
+        mapped = (region >= 0) & (addresses - self.bases[region] <= self.last_offsets[region])
+        return np.where(mapped, region, -1)
+
+    def __repr__(self) -> str:
+        return f"TileLinkULAddressMap({self.regions})"
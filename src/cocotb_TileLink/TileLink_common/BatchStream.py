@@ -0,0 +1,90 @@
+# Copyright (c) 2022, Antmicro
+# SPDX-License-Identifier: Apache-2.0
+
+import os
+import random
+import shutil
+import zlib
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+BatchGenerator = Callable[[np.random.Generator, int], Dict[str, np.ndarray]]
+
+class TileLinkULBatchStream():
+    """Endless sequence of random records generated in NumPy batches.
+
+    generate(rng, count) returns a dictionary of arrays holding count records,
+    next() returns the fields of the following record as a tuple. Batch n of a
+    seeded stream always comes from a generator seeded with the seed, the
+    stream name and n, so with cache_dir set each batch is saved as one .npy
+    file per field and memory-mapped by later runs instead of being generated
+    again. An unseeded stream draws its seed from the random module, so it
+    still follows cocotb's RANDOM_SEED. Two dimensional uint8 arrays are
+    returned as little-endian integers, one per row.
+    """
+    def __init__(self, name: str, generate: BatchGenerator, seed: Optional[int] = None,
+                 batch_size: int = 4096, cache_dir: Optional[str] = None):
+        assert batch_size > 0, "Batch size must be a positive number"
+        assert cache_dir is None or seed is not None, "Only seeded streams can be cached"
+        self.name = name
+        self.generate = generate
+        self.seed = seed
+        self.batch_size = batch_size
+        self.cache_dir = cache_dir
+        self.rng: np.random.Generator = np.random.default_rng(random.getrandbits(64) if seed is None else seed)
+
+        self.batch_index: int = 0
+        self.rows: List[Tuple[Any, ...]] = []
+        self.position: int = 0
+
+    def _batch_path(self) -> str:
+        assert self.cache_dir is not None
+        return os.path.join(self.cache_dir, f"{self.name}-{self.seed}-{self.batch_size}-{self.batch_index}")
+
+    def _load_cached(self, path: str) -> Dict[str, np.ndarray]:
+        with open(os.path.join(path, "fields")) as fields:
+            return {field: np.load(os.path.join(path, f"{field}.npy"), mmap_mode="r")
+                    for field in fields.read().split()}
+
+    def _store_cached(self, path: str, arrays: Dict[str, np.ndarray]) -> None:
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        os.makedirs(tmp_path, exist_ok=True)
+        for field, array in arrays.items():
+            np.save(os.path.join(tmp_path, f"{field}.npy"), array)
+        with open(os.path.join(tmp_path, "fields"), "w") as fields:
+            fields.write(" ".join(arrays))
+        try:
+            os.rename(tmp_path, path)
+        except OSError:
+            # Another run stored the same batch first
+            shutil.rmtree(tmp_path, ignore_errors=True)
+
+    def _next_batch(self) -> None:
+        if self.seed is not None:
+            rng = np.random.default_rng([self.seed, zlib.crc32(self.name.encode()), self.batch_index])
+        else:
+            rng = self.rng
+        if self.cache_dir is None:
+            arrays = self.generate(rng, self.batch_size)
+        else:
+            path = self._batch_path()
+            if not os.path.isdir(path):
+                self._store_cached(path, self.generate(rng, self.batch_size))
+            arrays = self._load_cached(path)
+        columns = []
+        for array in arrays.values():
+            if array.ndim == 2:
+                columns.append([int.from_bytes(row.tobytes(), "little") for row in array])
+            else:
+                columns.append(array.tolist())
+        self.rows = list(zip(*columns))
+        self.position = 0
+        self.batch_index += 1
+
+    def next(self) -> Tuple[Any, ...]:
+        if self.position == len(self.rows):
+            self._next_batch()
+        row = self.rows[self.position]
+        self.position += 1
+        return row
@@ -0,0 +1,136 @@
+# Copyright (c) 2022, Antmicro
+# SPDX-License-Identifier: Apache-2.0
+
+from typing import Callable, Dict, List, NamedTuple, Sequence, Tuple
+
+from cocotb_TileLink.TileLink_common.TileLink_types import *
+
+# Maps a byte string of 0/1 values to ASCII digits, so a list of mask flags
+# converts to an integer without a Python loop
+_BIT_CHARS = bytes.maketrans(b"\x00\x01", b"01")
+
+Beat = Tuple[TileLinkULAOP, int, int, int, int]
+
+
+class TileLinkULBusOps(NamedTuple):
+    """Beat helpers specialized for one (bus width, address width) pair.
+
+    split_read(address, length) and split_write(address, value, byte_mask)
+    return the beats of a transfer as (opcode, size, address, mask, data)
+    tuples, pack(address, value, byte_mask) places bytes in their lanes and
+    returns (mask, data), unpack(address, size, data) returns the bytes of
+    a beat. store(memory, address, size, mask, data) and load(memory,
+    address, size) move a beat between its lanes and a bytearray.
+    """
+    bus_byte_width: int
+    address_mask: int
+    validator: TileLinkULValidator
+    split_read: Callable[[int, int], List[Beat]]
+    split_write: Callable[[int, Sequence[int], Sequence[bool]], List[Beat]]
+    pack: Callable[[int, Sequence[int], Sequence[bool]], Tuple[int, int]]
+    unpack: Callable[[int, int, int], bytes]
+    store: Callable[[bytearray, int, int, int, int], None]
+    load: Callable[[bytearray, int, int], int]
+
+
+def _make_bus_ops(bus_width: int, addr_width: int) -> TileLinkULBusOps:
+    width = bus_width//8
+    validator = get_validator(width)
+    log_width = validator.log_width
+    offset_mask = validator.offset_mask
+    read_masks = validator.read_masks
+    full_mask = validator.full_mask
+    lengths = [2**size for size in range(log_width + 1)]
+    head_sizes = list(range(log_width))
+    tail_sizes = list(range(log_width, -1, -1))
+    Get = TileLinkULAOP.Get
+    PutPartialData = TileLinkULAOP.PutPartialData
+    PutFullData = TileLinkULAOP.PutFullData
+
+    def pack(address: int, value: Sequence[int], byte_mask: Sequence[bool]) -> Tuple[int, int]:
+        offset = address & offset_mask
+        mask = int(bytes(byte_mask)[::-1].translate(_BIT_CHARS), 2) << offset
+        return mask, int.from_bytes(bytes(value), "little") << (offset * 8)
+
+    def unpack(address: int, size: int, data: int) -> bytes:
+        offset = address & offset_mask
+        return data.to_bytes(width, "little")[offset:offset + lengths[size]]
+
+    def store(memory: bytearray, address: int, size: int, mask: int, data: int) -> None:
+        offset = address & offset_mask
+        length = lengths[size]
+        lanes = data.to_bytes(width, "little")
+        mask = (mask >> offset) & read_masks[size][0]
+        if mask == read_masks[size][0]:
+            memory[address:address + length] = lanes[offset:offset + length]
+            return
+        while mask:
+            lane = (mask & -mask).bit_length() - 1
+            memory[address + lane] = lanes[offset + lane]
+            mask &= mask - 1
+
+    def load(memory: bytearray, address: int, size: int) -> int:
+        offset = address & offset_mask
+        return int.from_bytes(memory[address:address + lengths[size]], "little") << (offset * 8)
+
+    def split_read(address: int, length: int) -> List[Beat]:
+        beats: List[Beat] = []
+        end_address = address + length
+        for size in head_sizes:
+            if address & lengths[size] and address + lengths[size] <= end_address:
+                beats.append((Get, size, address, read_masks[size][address & offset_mask], 0))
+                address += lengths[size]
+        if address >= end_address:
+            return beats
+        while address + width <= end_address:
+            beats.append((Get, log_width, address, full_mask, 0))
+            address += width
+        if address >= end_address:
+            return beats
+        for size in tail_sizes:
+            if address + lengths[size] <= end_address:
+                beats.append((Get, size, address, read_masks[size][address & offset_mask], 0))
+                address += lengths[size]
+        return beats
+
+    def split_write(address: int, value: Sequence[int], byte_mask: Sequence[bool]) -> List[Beat]:
+        beats: List[Beat] = []
+        end_address = address + len(value)
+        start = 0
+        for size in head_sizes:
+            if address & lengths[size] and start < len(value):
+                end = start + lengths[size]
+                mask, data = pack(address, value[start:end], byte_mask[start:end])
+                beats.append((PutPartialData, size, address, mask, data))
+                start = end
+                address += lengths[size]
+        if address >= end_address:
+            return beats
+        while len(value) - start >= width:
+            end = start + width
+            mask, data = pack(address, value[start:end], byte_mask[start:end])
+            beats.append((PutFullData if mask == full_mask else PutPartialData,
+                          log_width, address, mask, data))
+            start = end
+            address += width
+        if address >= end_address:
+            return beats
+        for size in tail_sizes:
+            if (len(value) - start) & lengths[size]:
+                end = start + lengths[size]
+                mask, data = pack(address, value[start:end], byte_mask[start:end])
+                beats.append((PutPartialData, size, address, mask, data))
+                start = end
+                address += lengths[size]
+        return beats
+
+    return TileLinkULBusOps(width, 2**addr_width - 1, validator,
+                            split_read, split_write, pack, unpack, store, load)
+
+
+_bus_ops: Dict[Tuple[int, int], TileLinkULBusOps] = {}
+
+def get_bus_ops(bus_width: int, addr_width: int = 32) -> TileLinkULBusOps:
+    if (bus_width, addr_width) not in _bus_ops:
+        _bus_ops[(bus_width, addr_width)] = _make_bus_ops(bus_width, addr_width)
+    return _bus_ops[(bus_width, addr_width)]
@@ -0,0 +1,77 @@
+# Copyright (c) 2022, Antmicro
+# SPDX-License-Identifier: Apache-2.0
+
+from typing import Iterable
+
+import numpy as np
+
+from cocotb_TileLink.TileLink_common.TileLink_types import TileLinkAPacket, TileLinkDPacket
+from cocotb_TileLink.TileLink_common.CoverageModel import TileLinkULCoverageModel
+
+class TileLinkULCoverageCollector(TileLinkULCoverageModel):
+    """Coverage model that also counts sources and response latencies.
+
+    Latency buckets are powers of two of the cycles between the A and D
+    handshakes, the last bucket holding everything above. Sources that do
+    not fit source_width are counted in source_overflow. Counters are NumPy
+    arrays saved to a .npz file by save(), so the coverage of parallel runs
+    is combined by adding the arrays: merge() for a loaded collector,
+    merge_files() for a list of files.
+    """
+    def __init__(self, bus_width: int = 32, source_width: int = 4, latency_buckets: int = 12):
+        super().__init__(bus_width)
+        assert latency_buckets >= 2, "At least two latency buckets are needed"
+        self.bus_width = bus_width
+        self.source_hits = np.zeros(2**source_width, dtype=np.uint64)
+        self.source_overflow: int = 0
+        self.latency_hits = np.zeros((self.shape[0], latency_buckets), dtype=np.uint64)
+
+    def transaction_finished(self, bus_name: str, a_packet: TileLinkAPacket, d_packet: TileLinkDPacket,
+                             start_cycle: int, end_cycle: int) -> None:
+        self.sample(a_packet, bool(d_packet.d_error))
+        source = int(a_packet.a_source)
+        if source < len(self.source_hits):
+            self.source_hits[source] += 1
+        else:
+            self.source_overflow += 1
+        opcode = self.opcode_bins.get(int(a_packet.a_opcode))
+        if opcode is not None:
+            bucket = min((end_cycle - start_cycle).bit_length(), self.latency_hits.shape[1] - 1)
+            self.latency_hits[opcode, bucket] += 1
+
+    def merge(self, other: "TileLinkULCoverageCollector") -> None:
+        assert self.hits.shape == other.hits.shape and self.source_hits.shape == other.source_hits.shape \
+            and self.latency_hits.shape == other.latency_hits.shape, "Coverage of different configurations"
+        self.hits += other.hits
+        self.source_hits += other.source_hits
+        self.source_overflow += other.source_overflow
+        self.latency_hits += other.latency_hits
+        self.unbinned += other.unbinned
+        self.recount()
+
+    def save(self, path: str) -> None:
+        np.savez_compressed(path, bus_width=self.bus_width, hits=self.hits, source_hits=self.source_hits,
+                            source_overflow=self.source_overflow, latency_hits=self.latency_hits,
+                            unbinned=self.unbinned)
+
+    @classmethod
+    def load(cls, path: str) -> "TileLinkULCoverageCollector":
+        with np.load(path) as arrays:
+            collector = cls(int(arrays["bus_width"]), len(arrays["source_hits"]).bit_length() - 1,
+                            arrays["latency_hits"].shape[1])
+            collector.hits[...] = arrays["hits"]
+            collector.source_hits[...] = arrays["source_hits"]
+            collector.source_overflow = int(arrays["source_overflow"])
+            collector.latency_hits[...] = arrays["latency_hits"]
+            collector.unbinned = int(arrays["unbinned"])
+        collector.recount()
+        return collector
+
+    @classmethod
+    def merge_files(cls, paths: Iterable[str]) -> "TileLinkULCoverageCollector":
+        paths = list(paths)
+        assert paths, "No coverage files to merge"
+        merged = cls.load(paths[0])
+        for path in paths[1:]:
+            merged.merge(cls.load(path))
+        return merged
@@ -0,0 +1,112 @@
+# Copyright (c) 2022, Antmicro
+# SPDX-License-Identifier: Apache-2.0
+
+import enum
+from typing import Optional, Tuple
+
+import numpy as np
+
+from cocotb_TileLink.TileLink_common.TileLink_types import *
+from cocotb_TileLink.TileLink_common.MonitorInterfaces import TransactionListener
+
+class TileLinkULMaskPattern(enum.IntEnum):
+    """Shape of a request mask relative to the byte lanes of its size and address."""
+    Full       = 0
+    Empty      = 1
+    Contiguous = 2
+    Sparse     = 3
+    Outside    = 4
+
+COVERED_OPCODES = (TileLinkULAOP.PutFullData, TileLinkULAOP.PutPartialData, TileLinkULAOP.Get)
+
+StimulusBin = Tuple[int, int, int, int]
+
+class TileLinkULCoverageModel(TransactionListener):
+    """Functional coverage of requests: opcode x size x alignment x mask pattern x error.
+
+    Alignment is the number of trailing zero bits of the address offset within
+    the bus word, log2 of the bus width for word-aligned addresses. Only bins
+    reachable by legal requests count towards coverage(). Requests wider than
+    the bus or with other opcodes are only counted in unbinned. Attach it to a
+    monitor's listeners; SimTrafficGeneratorUL can read it back to steer its
+    stimulus towards the holes.
+    """
+    def __init__(self, bus_width: int = 32):
+        self.validator = get_validator(bus_width//8)
+        log_width = self.validator.log_width
+        self.opcode_bins = {int(op): i for i, op in enumerate(COVERED_OPCODES)}
+        self.shape = (len(COVERED_OPCODES), log_width + 1, log_width + 1, len(TileLinkULMaskPattern), 2)
+        self.hits = np.zeros(self.shape, dtype=np.uint64)
+        # Hits summed over the error dimension, what a master can aim for
+        self.stimulus_hits = np.zeros(self.shape[:-1], dtype=np.uint64)
+        self.legal = np.zeros(self.shape[:-1], dtype=bool)
+        partial = self.opcode_bins[TileLinkULAOP.PutPartialData]
+        for size in range(log_width + 1):
+            lanes = 2**size
+            for alignment in range(size, log_width + 1):
+                self.legal[:, size, alignment, TileLinkULMaskPattern.Full] = True
+                self.legal[partial, size, alignment, TileLinkULMaskPattern.Empty] = True
+                self.legal[partial, size, alignment, TileLinkULMaskPattern.Contiguous] = lanes >= 2
+                self.legal[partial, size, alignment, TileLinkULMaskPattern.Sparse] = lanes >= 3
+        self.holes: int = int(self.legal.sum())
+        self.unbinned: int = 0
+
+    def alignment(self, address: int) -> int:
+        offset = address & self.validator.offset_mask
+        if not offset:
+            return self.validator.log_width
+        return (offset & -offset).bit_length() - 1
+
+    def mask_pattern(self, size: int, address: int, mask: int) -> TileLinkULMaskPattern:
+        offset = address & self.validator.offset_mask
+        lanes = self.validator.read_masks[size][offset] & self.validator.full_mask
+        if mask & ~lanes:
+            return TileLinkULMaskPattern.Outside
+        if mask == lanes:
+            return TileLinkULMaskPattern.Full
+        if not mask:
+            return TileLinkULMaskPattern.Empty
+        mask //= mask & -mask
+        if mask & (mask + 1):
+            return TileLinkULMaskPattern.Sparse
+        return TileLinkULMaskPattern.Contiguous
+
+    def stimulus_bin(self, a_packet: TileLinkAPacket) -> Optional[StimulusBin]:
+        """(opcode, size, alignment, mask pattern) bin of a request, None if unbinned."""
+        opcode = self.opcode_bins.get(int(a_packet.a_opcode))
+        size = int(a_packet.a_size)
+        if opcode is None or not 0 <= size <= self.validator.log_width:
+            return None
+        address = int(a_packet.a_address)
+        return opcode, size, self.alignment(address), self.mask_pattern(size, address, int(a_packet.a_mask))
+
+    def sample(self, a_packet: TileLinkAPacket, error: bool) -> None:
+        stimulus = self.stimulus_bin(a_packet)
+        if stimulus is None:
+            self.unbinned += 1
+            return
+        self.hits[stimulus + (int(error),)] += 1
+        if not self.stimulus_hits[stimulus] and self.legal[stimulus]:
+            self.holes -= 1
+        self.stimulus_hits[stimulus] += 1
+
+    def transaction_finished(self, bus_name: str, a_packet: TileLinkAPacket, d_packet: TileLinkDPacket,
+                             start_cycle: int, end_cycle: int) -> None:
+        self.sample(a_packet, bool(d_packet.d_error))
+
+    def recount(self) -> None:
+        """Updates the stimulus hits and holes after hits was changed directly."""
+        self.stimulus_hits = self.hits.sum(axis=-1, dtype=np.uint64)
+        self.holes = int((self.legal & (self.stimulus_hits == 0)).sum())
+
+    def stimulus_holes(self, opcode: TileLinkULAOP) -> np.ndarray:
+        """(size, alignment, mask pattern) rows of the legal bins of opcode not hit yet."""
+        opcode_bin = self.opcode_bins[int(opcode)]
+        return np.argwhere(self.legal[opcode_bin] & (self.stimulus_hits[opcode_bin] == 0))
+
+    def coverage(self, with_errors: bool = True) -> float:
+        """Fraction of legal bins hit, optionally ignoring the error dimension."""
+        if not with_errors:
+            return float(1 - self.holes / self.legal.sum())
+        legal = np.repeat(self.legal[..., np.newaxis], 2, axis=-1)
+        return float((legal & (self.hits > 0)).sum() / legal.sum())
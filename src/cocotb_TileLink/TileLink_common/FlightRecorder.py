@@ -0,0 +1,116 @@
+# Copyright (c) 2022, Antmicro
+# SPDX-License-Identifier: Apache-2.0
+
+from typing import Dict, List, Optional, TypeVar
+
+import numpy as np
+
+from cocotb.log import SimLog # type: ignore
+
+from cocotb_TileLink.TileLink_common.TileLink_types import *
+
+T = TypeVar('T')
+
+class TileLinkULFlightRecorder():
+    """Fixed-size ring buffer holding the last handshakes seen on the buses.
+
+    All storage is allocated up front, so recording costs a few array stores
+    and nothing is printed unless dump() is called after a failure.
+    """
+    CHANNEL_A = 0
+    CHANNEL_D = 1
+
+    def __init__(self, depth: int = 256, name: str = "TLULFlightRecorder"):
+        assert depth > 0, "Flight recorder depth must be positive"
+        self.log: SimLog = SimLog(f"cocotb.{name}")
+        self.depth = depth
+        self.count: int = 0
+
+        self.bus_ids: Dict[str, int] = {}
+        self.bus_names: List[str] = []
+
+        self.bus = np.zeros(depth, dtype=np.uint16)
+        self.cycle = np.zeros(depth, dtype=np.int64)
+        self.channel = np.zeros(depth, dtype=np.uint8)
+        self.opcode = np.zeros(depth, dtype=np.uint8)
+        self.param = np.zeros(depth, dtype=np.uint8)
+        self.size = np.zeros(depth, dtype=np.uint8)
+        self.source = np.zeros(depth, dtype=np.uint32)
+        self.address = np.zeros(depth, dtype=np.uint64)
+        self.mask = np.zeros(depth, dtype=np.uint64)
+        self.error = np.zeros(depth, dtype=np.uint8)
+        self.data: List[int] = [0] * depth
+
+    def _get_bus_id(self, bus_name: str) -> int:
+        if bus_name not in self.bus_ids:
+            self.bus_ids[bus_name] = len(self.bus_names)
+            self.bus_names.append(bus_name)
+        return self.bus_ids[bus_name]
+
+    def record_a(self, bus_name: str, cycle: int, packet: TileLinkAPacket) -> None:
+        i = self.count % self.depth
+        self.count += 1
+        self.bus[i] = self._get_bus_id(bus_name)
+        self.cycle[i] = cycle
+        self.channel[i] = self.CHANNEL_A
+        self.opcode[i] = int(packet.a_opcode)
+        self.param[i] = int(packet.a_param)
+        self.size[i] = int(packet.a_size)
+        self.source[i] = int(packet.a_source)
+        self.address[i] = int(packet.a_address)
+        self.mask[i] = int(packet.a_mask)
+        self.error[i] = 0
+        self.data[i] = int(packet.a_data)
+
+    def record_d(self, bus_name: str, cycle: int, packet: TileLinkDPacket) -> None:
+        i = self.count % self.depth
+        self.count += 1
+        self.bus[i] = self._get_bus_id(bus_name)
+        self.cycle[i] = cycle
+        self.channel[i] = self.CHANNEL_D
+        self.opcode[i] = int(packet.d_opcode)
+        self.param[i] = int(packet.d_param)
+        self.size[i] = int(packet.d_size)
+        self.source[i] = int(packet.d_source)
+        self.address[i] = 0
+        self.mask[i] = 0
+        self.error[i] = int(packet.d_error)
+        self.data[i] = int(packet.d_data)
+
+    def _format(self, i: int) -> str:
+        bus_name = self.bus_names[self.bus[i]]
+        if self.channel[i] == self.CHANNEL_A:
+            return f"[{bus_name}] cycle {self.cycle[i]}: A {TileLinkULAOP(int(self.opcode[i])).name}" \
+                   f" param: {self.param[i]} size: {2**int(self.size[i])} source: {self.source[i]}" \
+                   f" address: 0x{int(self.address[i]):x} mask: 0x{int(self.mask[i]):x} data: 0x{self.data[i]:x}"
+        return f"[{bus_name}] cycle {self.cycle[i]}: D {TileLinkULDOP(int(self.opcode[i])).name}" \
+               f" param: {self.param[i]} size: {2**int(self.size[i])} source: {self.source[i]}" \
+               f" error: {self.error[i]} data: 0x{self.data[i]:x}"
+
+    def dump(self) -> str:
+        first = max(0, self.count - self.depth)
+        return "\n".join(self._format(i % self.depth) for i in range(first, self.count))
+
+    def dump_to_log(self) -> None:
+        self.log.error(f"Last {min(self.count, self.depth)} handshakes:\n{self.dump()}")
+
+
+class FlightRecordedInterface():
+    """Adapter routing handshakes in _route(), with an optional flight recorder dumped on failure."""
+    def __init__(self) -> None:
+        self.flight_recorder: Optional[TileLinkULFlightRecorder] = None
+
+    def register_flight_recorder(self: T, recorder: TileLinkULFlightRecorder) -> T:
+        self.flight_recorder = recorder
+        return self
+
+    async def _route(self) -> None:
+        raise Exception("Unimplemented")
+
+    async def process(self) -> None:
+        try:
+            await self._route()
+        except Exception:
+            if self.flight_recorder is not None:
+                self.flight_recorder.dump_to_log()
+            raise
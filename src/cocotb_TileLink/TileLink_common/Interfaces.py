@@ -5,6 +5,7 @@ from __future__ import annotations
 from abc import ABC
 from typing import TypeVar, Any, Optional, Tuple, List
 
+from cocotb.log import SimLog # type: ignore
 from cocotb.handle import SimHandle # type: ignore
 from cocotb.triggers import Event # type: ignore
 
@@ -33,6 +34,20 @@ class SimInterface():
         raise Exception("Unimplemented")
 
 
+class ThroughputInterface():
+    log: SimLog
+
+    def __init__(self) -> None:
+        self.cycles: int = 0
+        self.beats: int = 0
+        self.bytes: int = 0
+
+    def report_throughput(self) -> None:
+        cycles = max(self.cycles, 1)
+        self.log.info(f"{self.beats} beats, {self.bytes} bytes in {self.cycles} cycles:"
+                      f" {self.beats / cycles:.3f} beats/cycle, {self.bytes / cycles:.3f} bytes/cycle")
+
+
 class MemoryInterface(ABC):
     def init_memory(self, init_array: List[int], start_address: int) -> None:
         raise Exception("Unimplemented")
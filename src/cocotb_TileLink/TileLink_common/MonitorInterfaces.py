@@ -6,19 +6,28 @@ from typing import TypeVar, Dict, Any, Optional
 
 from cocotb.triggers import Event # type: ignore
 from cocotb_TileLink.TileLink_common.TileLink_types import TileLinkAPacket, TileLinkDPacket, TileLinkULResp, TileLinkULAOP, TileLinkULDOP
+from cocotb_TileLink.TileLink_common.TileLink_types import A_OPCODES, D_OPCODES, RESPONSES, decode_field, IDLE_A_PACKET, IDLE_D_PACKET
 
 T = TypeVar('T')
 
 class TLMonitor():
+    """Handshakes of a single cycle.
+
+    Devices may return the same object from every get_status() call, so
+    monitors must not keep references to it past the cycle.
+    """
+    __slots__ = ("a_packet", "a_handshake", "d_packet", "d_handshake")
+
     def __init__(self) -> None:
-        self.a_packet: Optional[TileLinkAPacket] = TileLinkAPacket()
+        self.a_packet: Optional[TileLinkAPacket] = IDLE_A_PACKET
         self.a_handshake: bool = False
-        self.d_packet: TileLinkDPacket = TileLinkDPacket()
+        self.d_packet: TileLinkDPacket = IDLE_D_PACKET
         self.d_handshake: bool = False
 
 class MonitorableInterface():
     def __init__(self) -> None:
         self.all_done_event: Event = Event()
+        self.status: TLMonitor = TLMonitor()
 
     async def get_status(self) -> TLMonitor:
         raise Exception("Unimplemented")
@@ -27,7 +36,22 @@ class MonitorInterface(ABC):
     def register_device(self: T, device: MonitorableInterface) -> T:
         raise Exception("Unimplemented")
 
+class TransactionListener(ABC):
+    """Receives transactions observed by a monitor.
+
+    Only transactions whose request is selected by the monitor's filter are
+    reported, every started transaction is also reported finished.
+    """
+    def transaction_started(self, bus_name: str, a_packet: TileLinkAPacket, cycle: int) -> None:
+        pass
+
+    def transaction_finished(self, bus_name: str, a_packet: TileLinkAPacket, d_packet: TileLinkDPacket,
+                             start_cycle: int, end_cycle: int) -> None:
+        pass
+
 class Packet():
+    __slots__ = ("_age", "cmd", "rsp")
+
     def __init__(self) -> None:
         self._age: int = 0
         self.cmd: Dict[Any, Any] = {}
@@ -37,7 +61,7 @@ class Packet():
         self._age +=1
 
     def add_cmd(self, packet: TileLinkAPacket) -> None:
-        self.cmd['a_opcode']  = TileLinkULAOP(packet.a_opcode)
+        self.cmd['a_opcode']  = decode_field(A_OPCODES, int(packet.a_opcode), "a_opcode")
         self.cmd['a_param']   = int(packet.a_param)
         self.cmd['a_size']    = int(packet.a_size)
         self.cmd['a_source']  = int(packet.a_source)
@@ -46,13 +70,13 @@ class Packet():
         self.cmd['a_data']    = int(packet.a_data)
 
     def add_rsp(self, packet: TileLinkDPacket) -> None:
-        self.rsp['d_opcode'] = TileLinkULDOP(packet.d_opcode)
+        self.rsp['d_opcode'] = decode_field(D_OPCODES, int(packet.d_opcode), "d_opcode")
         self.rsp['d_param']  = int(packet.d_param)
         self.rsp['d_size']   = int(packet.d_size)
         self.rsp['d_source'] = int(packet.d_source)
         self.rsp['d_sink']   = int(packet.d_sink)
         self.rsp['d_data']   = int(packet.d_data)
-        self.rsp['d_error']  = TileLinkULResp(packet.d_error)
+        self.rsp['d_error']  = decode_field(RESPONSES, int(packet.d_error), "d_error")
 
     def __str__(self) -> str:
         _cmd = "Command:\n\t"
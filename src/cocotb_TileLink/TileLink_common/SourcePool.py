@@ -0,0 +1,42 @@
+# Copyright (c) 2022, Antmicro
+# SPDX-License-Identifier: Apache-2.0
+
+from collections import deque
+from typing import Deque, Optional
+
+class TileLinkULSourcePool():
+    """Source IDs of a master, acquired and released in O(1).
+
+    IDs are handed out in FIFO order, so every ID of the source_width bit
+    space gets used, but at most max_outstanding of them at the same time.
+    """
+    def __init__(self, source_width: int = 4, max_outstanding: Optional[int] = None):
+        assert source_width >= 0, "Source width must not be negative"
+        self.size = 2**source_width
+        self.max_outstanding = self.size if max_outstanding is None else max_outstanding
+        assert 1 <= self.max_outstanding <= self.size, \
+            f"Outstanding depth must be between 1 and {self.size} for {source_width} bit sources"
+        self.free: Deque[int] = deque(range(self.size))
+        self.busy = bytearray(self.size)
+        self.outstanding: int = 0
+
+    def acquire(self) -> Optional[int]:
+        """Returns a free source or None when max_outstanding sources are in use."""
+        if self.outstanding >= self.max_outstanding:
+            return None
+        source = self.free.popleft()
+        self.busy[source] = 1
+        self.outstanding += 1
+        return source
+
+    def release(self, source: int) -> None:
+        assert self.busy[source], f"Source {source} released but not in use"
+        self.busy[source] = 0
+        self.outstanding -= 1
+        self.free.append(source)
+
+    def reset(self) -> None:
+        if self.outstanding:
+            self.free = deque(range(self.size))
+            self.busy = bytearray(self.size)
+            self.outstanding = 0
@@ -3,14 +3,17 @@
 
 import enum
 from collections import namedtuple
-from typing import NamedTuple
+from typing import Dict, List, NamedTuple, Optional, Sequence, TypeVar, Union
 
 class TileLinkULResp(enum.IntEnum):
     Processed = 0b0
     Denied = 0b1
 
 class TileLinkULTimeout(Exception):
-    pass
+    def __init__(self, message: str, packet: Optional["TileLinkAPacket"] = None, age: int = 0):
+        super().__init__(message)
+        self.packet = packet
+        self.age = age
 
 class TileLinkULWidthError(Exception):
     pass
@@ -65,37 +68,100 @@ class TileLinkDPacket(NamedTuple):
     d_data: int = 0
 
 
-def check_address(address: int, dbus_byte_width: int, size: int) -> None:
-    if 2**size > dbus_byte_width:
-        raise TileLinkULWidthError(f"Packet size ({2**size} B) is larger than" \
-                                   f" the bus width ({dbus_byte_width} B)")
-    elif size < 0:
-        raise TileLinkULSizeError(f"Packet size must be a positive power of 2, given {size}")
-    elif address & ~(2**size - 1) != address:
+class TileLinkULOperation(NamedTuple):
+    """High-level transfer issued by a master.
+
+    For Get data is the number of bytes to read, for Put operations the bytes
+    to write, with an optional byte mask (all bytes written by default).
+    """
+    opcode: TileLinkULAOP
+    address: int
+    data: Union[int, Sequence[int]]
+    mask: Optional[Sequence[bool]] = None
+
+
+# Decoding tables used instead of the enum constructors on hot paths
+A_OPCODES: Dict[int, TileLinkULAOP] = {int(op): op for op in TileLinkULAOP}
+D_OPCODES: Dict[int, TileLinkULDOP] = {int(op): op for op in TileLinkULDOP}
+RESPONSES: Dict[int, TileLinkULResp] = {int(resp): resp for resp in TileLinkULResp}
+
+_E = TypeVar('_E', TileLinkULAOP, TileLinkULDOP, TileLinkULResp)
+
+def decode_field(table: Dict[int, _E], value: int, field: str) -> _E:
+    try:
+        return table[value]
+    except KeyError:
+        raise ValueError(f"Invalid {field}: {value}") from None
+
+# Packets are immutable, so drivers share these instead of allocating idle ones
+IDLE_A_PACKET = TileLinkAPacket()
+IDLE_D_PACKET = TileLinkDPacket()
+
+
+class TileLinkULValidator():
+    """Protocol checks for a single bus width.
+
+    The legal read mask of every (size, offset) pair and the alignment and
+    low-lane masks are computed once, so a legal beat is accepted with a few
+    table lookups. The error types and their priority match check_address()
+    and check_mask().
+    """
+    def __init__(self, dbus_byte_width: int):
+        self.dbus_byte_width = dbus_byte_width
+        self.log_width = dbus_byte_width.bit_length() - 1
+        self.offset_mask = dbus_byte_width - 1
+        self.full_mask = 2**dbus_byte_width - 1
+        self.align_masks: List[int] = [2**size - 1 for size in range(self.log_width + 1)]
+        self.low_masks: List[int] = [2**offset - 1 for offset in range(dbus_byte_width)]
+        self.read_masks: List[List[int]] = [
+            [(2**(2**size) - 1) << offset for offset in range(dbus_byte_width)]
+            for size in range(self.log_width + 1)]
+
+    def check_address(self, address: int, size: int) -> None:
+        if 0 <= size <= self.log_width and not address & self.align_masks[size]:
+            return
+        if size > self.log_width:
+            raise TileLinkULWidthError(f"Packet size ({2**size} B) is larger than" \
+                                       f" the bus width ({self.dbus_byte_width} B)")
+        elif size < 0:
+            raise TileLinkULSizeError(f"Packet size must be a positive power of 2, given {size}")
         raise TileLinkULAligmentError(f"Address 0x{address:8x} must be aligned to packet size: {2**size}")
 
-def check_mask(address: int, dbus_byte_width: int, byte_mask: int, size: int, write: bool) -> None:
-    offset = address % dbus_byte_width
-    if byte_mask != ((byte_mask >> offset) << offset):
-        raise TileLinkULMaskError("High bit in incorrect position")
-    if write:
-        return
-    byte_mask >>= offset
-    count = 0
-    while byte_mask:
-        if byte_mask & 1:
-            count +=1
-        else:
+    def check_mask(self, address: int, byte_mask: int, size: int, write: bool) -> None:
+        offset = address & self.offset_mask
+        if byte_mask & self.low_masks[offset]:
+            raise TileLinkULMaskError("High bit in incorrect position")
+        if write or (0 <= size <= self.log_width and byte_mask == self.read_masks[size][offset]):
+            return
+        byte_mask >>= offset
+        if byte_mask & (byte_mask + 1):
             raise TileLinkULMaskContinuousError(
                 f"Mask must be continuous, address 0x{address:8x},"
                 f" write:{write}, size:{2**size}, mask:{bin(byte_mask)}")
-        byte_mask >>= 1
-    if count != 2**size:
-        raise TileLinkULMaskSizeError("Number of HIGH bits in mask:{} is not equal size:{}".format(count, 2**size))
+        if byte_mask.bit_length() != 2**size:
+            raise TileLinkULMaskSizeError("Number of HIGH bits in mask:{} is not equal size:{}".format(
+                byte_mask.bit_length(), 2**size))
+
+    def get_write_opcode(self, size: int, byte_mask: int) -> TileLinkULAOP:
+        if size == self.log_width and byte_mask == self.full_mask:
+            return TileLinkULAOP.PutFullData
+        return TileLinkULAOP.PutPartialData
+
+
+_validators: Dict[int, TileLinkULValidator] = {}
+
+def get_validator(dbus_byte_width: int) -> TileLinkULValidator:
+    if dbus_byte_width not in _validators:
+        _validators[dbus_byte_width] = TileLinkULValidator(dbus_byte_width)
+    return _validators[dbus_byte_width]
+
+
+def check_address(address: int, dbus_byte_width: int, size: int) -> None:
+    get_validator(dbus_byte_width).check_address(address, size)
+
+def check_mask(address: int, dbus_byte_width: int, byte_mask: int, size: int, write: bool) -> None:
+    get_validator(dbus_byte_width).check_mask(address, byte_mask, size, write)
 
 
 def get_write_opcode(size: int, dbus_byte_width: int, byte_mask: int) -> TileLinkULAOP:
-    if 2**size == dbus_byte_width and byte_mask == (2**(2**size)) - 1:
-        return TileLinkULAOP.PutFullData
-    else:
-        return TileLinkULAOP.PutPartialData
+    return get_validator(dbus_byte_width).get_write_opcode(size, byte_mask)
@@ -0,0 +1,63 @@
+# Copyright (c) 2022, Antmicro
+# SPDX-License-Identifier: Apache-2.0
+
+from collections import deque
+from fractions import Fraction
+from typing import Deque
+
+class TileLinkULTokenBucket():
+    """Token bucket refilled with rate tokens every cycle, holding at most capacity.
+
+    The bucket starts full. Tokens are counted in integer units of the rate's
+    denominator, so fractional rates do not drift.
+    """
+    def __init__(self, rate: float, capacity: float):
+        assert rate > 0, "Rate must be a positive number"
+        assert capacity >= rate, "Capacity must hold at least one cycle worth of tokens"
+        rate_fraction = Fraction(rate).limit_denominator(1_000_000)
+        self.rate = rate
+        self.capacity = capacity
+        self.unit = rate_fraction.denominator
+        self.refill = rate_fraction.numerator
+        self.max_tokens = int(Fraction(capacity) * self.unit)
+        self.tokens: int = self.max_tokens
+
+    def tick(self) -> None:
+        self.tokens = min(self.tokens + self.refill, self.max_tokens)
+
+    def available(self, amount: int) -> bool:
+        return self.tokens >= amount * self.unit
+
+    def take(self, amount: int) -> None:
+        self.tokens -= amount * self.unit
+
+    def reset(self) -> None:
+        self.tokens = self.max_tokens
+
+
+class TileLinkULIssueWindow():
+    """Sliding window allowing at most max_issues issues in any window consecutive cycles.
+
+    Exposes the same methods as TileLinkULTokenBucket, counting each issue as one.
+    """
+    def __init__(self, max_issues: int, window: int):
+        assert max_issues > 0 and window > 0, "Issue limit must be a positive number of issues per window"
+        self.max_issues = max_issues
+        self.window = window
+        self.cycle: int = 0
+        self.issues: Deque[int] = deque()
+
+    def tick(self) -> None:
+        self.cycle += 1
+        while self.issues and self.issues[0] <= self.cycle - self.window:
+            self.issues.popleft()
+
+    def available(self, amount: int) -> bool:
+        return len(self.issues) + amount <= self.max_issues
+
+    def take(self, amount: int) -> None:
+        self.issues.extend([self.cycle] * amount)
+
+    def reset(self) -> None:
+        self.cycle = 0
+        self.issues.clear()
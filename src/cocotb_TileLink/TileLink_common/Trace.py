@@ -0,0 +1,54 @@
+# Copyright (c) 2022, Antmicro
+# SPDX-License-Identifier: Apache-2.0
+
+import gzip
+from typing import IO, Iterable, Iterator, NamedTuple
+
+from cocotb_TileLink.TileLink_common.TileLink_types import TileLinkULAOP
+
+TRACE_HEADER = "# TileLinkUL trace v1: cycle opcode param size source address mask data"
+
+
+class TileLinkULTraceRecord(NamedTuple):
+    """A-channel request issued cycle cycles after the first one of the trace."""
+    cycle: int
+    opcode: TileLinkULAOP
+    param: int
+    size: int
+    source: int
+    address: int
+    mask: int
+    data: int
+
+
+def open_trace(path: str, mode: str = "r") -> IO[str]:
+    """Opens a trace file, gzip compressed if its name ends with .gz."""
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t")
+    return open(path, mode)
+
+
+def format_trace_record(record: TileLinkULTraceRecord) -> str:
+    return f"{record.cycle} {record.opcode.name} {record.param} {record.size} {record.source}" \
+           f" {record.address:x} {record.mask:x} {record.data:x}\n"
+
+
+def parse_trace_record(line: str) -> TileLinkULTraceRecord:
+    cycle, opcode, param, size, source, address, mask, data = line.split()
+    return TileLinkULTraceRecord(int(cycle), TileLinkULAOP[opcode], int(param), int(size), int(source),
+                                 int(address, 16), int(mask, 16), int(data, 16))
+
+
+def read_trace(path: str) -> Iterator[TileLinkULTraceRecord]:
+    """Yields the records of a trace file, reading it as they are consumed."""
+    with open_trace(path) as trace:
+        for line in trace:
+            if line.startswith("#") or not line.strip():
+                continue
+            yield parse_trace_record(line)
+
+
+def write_trace(path: str, records: Iterable[TileLinkULTraceRecord]) -> None:
+    with open_trace(path, "w") as trace:
+        trace.write(TRACE_HEADER + "\n")
+        trace.writelines(format_trace_record(record) for record in records)
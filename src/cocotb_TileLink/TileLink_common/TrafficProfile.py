@@ -0,0 +1,290 @@
+# Copyright (c) 2022, Antmicro
+# SPDX-License-Identifier: Apache-2.0
+
+import zlib
+from abc import ABC
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+import numpy as np
+
+from cocotb_TileLink.TileLink_common.TileLink_types import TileLinkULAOP
+from cocotb_TileLink.TileLink_common.AddressMap import TileLinkULAddressMap, TileLinkULRegion
+
+Regions = Union[TileLinkULAddressMap, Iterable[Union[TileLinkULRegion, Tuple[int, int]]]]
+
+
+def _as_address_map(regions: Optional[Regions], alignment: int = 1) -> Optional[TileLinkULAddressMap]:
+    if regions is None:
+        return None
+    address_map = regions if isinstance(regions, TileLinkULAddressMap) else TileLinkULAddressMap(regions)
+    address_map.check_alignment(alignment)
+    return address_map
+
+
+class TileLinkULArrivals(ABC):
+    """Number of requests arriving in each of count consecutive cycles."""
+    def generate(self, rng: np.random.Generator, count: int) -> np.ndarray:
+        raise Exception("Unimplemented")
+
+
+class TileLinkULPoissonArrivals(TileLinkULArrivals):
+    """Independent arrivals, load requests per cycle on average."""
+    def __init__(self, load: float):
+        assert load > 0, "Load must be a positive number"
+        self.load = load
+
+    def generate(self, rng: np.random.Generator, count: int) -> np.ndarray:
+        return rng.poisson(self.load, count)
+
+    def __repr__(self) -> str:
+        return f"TileLinkULPoissonArrivals({self.load})"
+
+
+class TileLinkULOnOffArrivals(TileLinkULArrivals):
+    """Bursts of burst_length cycles on average separated by idle periods.
+
+    During a burst a request arrives every cycle with probability burst_load,
+    idle periods are sized so that on average load requests arrive per cycle.
+    Burst and idle lengths are geometric, so cutting the sequence into batches
+    does not change its statistics.
+    """
+    def __init__(self, load: float, burst_length: float, burst_load: float = 1.0):
+        assert 0 < load < burst_load <= 1, "Load must be positive and lower than the burst load"
+        assert burst_length >= 1, "Bursts must last at least one cycle"
+        self.load = load
+        self.burst_length = burst_length
+        self.burst_load = burst_load
+        self.idle_length = burst_length * (burst_load / load - 1)
+
+    def generate(self, rng: np.random.Generator, count: int) -> np.ndarray:
+        on_fraction = self.burst_length / (self.burst_length + self.idle_length)
+        runs = int(count / (self.burst_length + self.idle_length)) + 2
+        start_idle = rng.random() >= on_fraction
+        lengths = np.empty(0, dtype=np.int64)
+        while lengths.sum() < count:
+            on = rng.geometric(1 / self.burst_length, runs)
+            off = rng.geometric(min(1 / self.idle_length, 1), runs)
+            if start_idle and not len(lengths):
+                on[0] = 0
+            lengths = np.concatenate([lengths, np.column_stack([on, off]).ravel()])
+        states = np.tile(np.array([1, 0], dtype=np.uint8), len(lengths) // 2)
+        on_cycles = np.repeat(states, lengths)[:count].astype(bool)
+        return (on_cycles & (rng.random(count) < self.burst_load)).astype(np.uint8)
+
+    def __repr__(self) -> str:
+        return f"TileLinkULOnOffArrivals({self.load}, {self.burst_length}, {self.burst_load})"
+
+
+class TileLinkULAddressPattern(ABC):
+    """Byte addresses of count consecutive requests.
+
+    Regions are given as a TileLinkULAddressMap or a list of regions and are
+    sampled according to their weights. Without regions the whole address
+    space is used. The generator aligns each address down to the size of its
+    request.
+    """
+    def generate(self, rng: np.random.Generator, count: int, bus_byte_width: int, address_mask: int) -> np.ndarray:
+        raise Exception("Unimplemented")
+
+    def end(self) -> int:
+        """First address above every region, 0 without regions."""
+        return 0
+
+    def check_alignment(self, alignment: int) -> None:
+        """Raises if aligning an address down to alignment bytes may leave its region."""
+        pass
+
+
+class TileLinkULUniformAddresses(TileLinkULAddressPattern):
+    def __init__(self, regions: Optional[Regions] = None):
+        self.regions = _as_address_map(regions)
+
+    def generate(self, rng: np.random.Generator, count: int, bus_byte_width: int, address_mask: int) -> np.ndarray:
+        if self.regions is None:
+            return rng.integers(0, address_mask, count, dtype=np.uint64, endpoint=True)
+        return self.regions.uniform(rng, count)
+
+    def end(self) -> int:
+        return 0 if self.regions is None else self.regions.end()
+
+    def check_alignment(self, alignment: int) -> None:
+        if self.regions is not None:
+            self.regions.check_alignment(alignment)
+
+    def __repr__(self) -> str:
+        return f"TileLinkULUniformAddresses({self.regions})"
+
+
+class TileLinkULStridedAddresses(TileLinkULAddressPattern):
+    """Runs of run_length accesses stride bytes apart, wrapping within a region.
+
+    Each run starts at a random stride-aligned offset of a random region.
+    Without a stride consecutive bus words are accessed. Runs are cut short at
+    the end of a batch.
+    """
+    def __init__(self, regions: Optional[Regions] = None, stride: Optional[int] = None,
+                 run_length: int = 256):
+        assert stride is None or stride > 0, "Stride must be a positive number"
+        assert run_length > 0, "Run length must be a positive number"
+        self.regions = _as_address_map(regions, stride or 1)
+        self.stride = stride
+        self.run_length = run_length
+
+    def generate(self, rng: np.random.Generator, count: int, bus_byte_width: int, address_mask: int) -> np.ndarray:
+        regions = self.regions or TileLinkULAddressMap([(0, address_mask + 1)])
+        stride = np.uint64(self.stride or bus_byte_width)
+        steps = regions.last_offsets // stride + np.uint64(1)
+        runs = (count + self.run_length - 1) // self.run_length
+        region = regions.choose(rng, runs)
+        first = rng.integers(0, steps[region], dtype=np.uint64)
+        step = np.arange(count, dtype=np.uint64) % np.uint64(self.run_length)
+        region = np.repeat(region, self.run_length)[:count]
+        first = np.repeat(first, self.run_length)[:count]
+        return regions.bases[region] + ((first + step) % steps[region]) * stride
+
+    def end(self) -> int:
+        return 0 if self.regions is None else self.regions.end()
+
+    def check_alignment(self, alignment: int) -> None:
+        if self.regions is not None:
+            self.regions.check_alignment(alignment)
+
+    def __repr__(self) -> str:
+        return f"TileLinkULStridedAddresses({self.regions}, {self.stride}, {self.run_length})"
+
+
+class TileLinkULHotspotAddresses(TileLinkULAddressPattern):
+    """Sends hot_probability of accesses to hot_regions, the rest anywhere in regions."""
+    def __init__(self, hot_regions: Regions, hot_probability: float = 0.9,
+                 regions: Optional[Regions] = None):
+        assert 0 <= hot_probability <= 1, "Hot probability must be between 0 and 1"
+        self.hot_regions = _as_address_map(hot_regions)
+        self.hot_probability = hot_probability
+        self.regions = TileLinkULUniformAddresses(regions)
+
+    def generate(self, rng: np.random.Generator, count: int, bus_byte_width: int, address_mask: int) -> np.ndarray:
+        hot = rng.random(count) < self.hot_probability
+        return np.where(hot, self.hot_regions.uniform(rng, count),
+                        self.regions.generate(rng, count, bus_byte_width, address_mask))
+
+    def end(self) -> int:
+        return max(self.hot_regions.end(), self.regions.end())
+
+    def check_alignment(self, alignment: int) -> None:
+        self.hot_regions.check_alignment(alignment)
+        self.regions.check_alignment(alignment)
+
+    def __repr__(self) -> str:
+        return f"TileLinkULHotspotAddresses({self.hot_regions}, {self.hot_probability}, {self.regions})"
+
+
+class TileLinkULWorkingSetAddresses(TileLinkULAddressPattern):
+    """Accesses spread over a fixed set of lines totalling working_set_size bytes.
+
+    The lines are picked from the regions by a generator seeded with seed, so
+    they are the same in every batch.
+    """
+    def __init__(self, working_set_size: int, line_size: int = 64,
+                 regions: Optional[Regions] = None, seed: int = 0):
+        assert line_size & (line_size - 1) == 0, "Line size must be a power of 2"
+        assert working_set_size >= line_size, "Working set must hold at least one line"
+        self.working_set_size = working_set_size
+        self.line_size = line_size
+        self.regions = _as_address_map(regions, line_size)
+        self.seed = seed
+        self.lines: Dict[int, np.ndarray] = {}
+
+    def _get_lines(self, address_mask: int) -> np.ndarray:
+        if address_mask not in self.lines:
+            regions = self.regions or TileLinkULAddressMap([(0, address_mask + 1)])
+            addresses = regions.uniform(np.random.default_rng(self.seed), self.working_set_size // self.line_size)
+            self.lines[address_mask] = addresses & ~np.uint64(self.line_size - 1)
+        return self.lines[address_mask]
+
+    def generate(self, rng: np.random.Generator, count: int, bus_byte_width: int, address_mask: int) -> np.ndarray:
+        lines = self._get_lines(address_mask)
+        return lines[rng.integers(0, len(lines), count)] + rng.integers(0, self.line_size, count, dtype=np.uint64)
+
+    def end(self) -> int:
+        return 0 if self.regions is None else self.regions.end()
+
+    def check_alignment(self, alignment: int) -> None:
+        if self.regions is not None:
+            self.regions.check_alignment(alignment)
+
+    def __repr__(self) -> str:
+        return f"TileLinkULWorkingSetAddresses({self.working_set_size}, {self.line_size}, {self.regions}, {self.seed})"
+
+
+class TileLinkULOperationMix():
+    """Relative weights of Get, PutFullData and PutPartialData requests.
+
+    sizes maps log2 of the request size to its weight. Without sizes Get and
+    PutPartialData use every size supported by the bus equally often and
+    PutFullData always writes the whole bus width.
+    """
+    def __init__(self, get: float = 1.0, put_full: float = 1.0, put_partial: float = 1.0,
+                 sizes: Optional[Dict[int, float]] = None):
+        weights = np.array([get, put_full, put_partial], dtype=np.float64)
+        assert (weights >= 0).all() and weights.sum() > 0, "Operation weights must not be negative"
+        self.probabilities = weights / weights.sum()
+        self.sizes = sizes
+        if sizes is not None:
+            assert sizes and all(size >= 0 and weight >= 0 for size, weight in sizes.items()), \
+                "Size weights must not be negative"
+            self.size_values = np.array(list(sizes), dtype=np.uint8)
+            size_weights = np.array(list(sizes.values()), dtype=np.float64)
+            self.size_probabilities = size_weights / size_weights.sum()
+
+    def generate(self, rng: np.random.Generator, count: int, log_width: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns the opcodes and log2 sizes of count requests."""
+        op = rng.choice(3, count, p=self.probabilities)
+        opcode = np.choose(op, [int(TileLinkULAOP.Get), int(TileLinkULAOP.PutFullData),
+                                int(TileLinkULAOP.PutPartialData)]).astype(np.uint8)
+        if self.sizes is None:
+            size = np.where(op == 1, log_width, rng.integers(0, log_width, count, endpoint=True))
+        else:
+            assert self.size_values.max() <= log_width, f"Sizes above 2**{log_width} bytes do not fit the bus"
+            size = rng.choice(self.size_values, count, p=self.size_probabilities)
+        return opcode, size.astype(np.uint8)
+
+    def max_size(self, log_width: int) -> int:
+        """Log2 of the largest request size."""
+        return log_width if self.sizes is None else int(self.size_values.max())
+
+    def __repr__(self) -> str:
+        return f"TileLinkULOperationMix({self.probabilities.tolist()}, {self.sizes})"
+
+
+class TileLinkULTrafficProfile():
+    """Shape of the traffic sent by SimTrafficGeneratorUL.
+
+    Without arrivals a_valid is a coin flip every cycle and the pending
+    request is replaced by a new one with a 25% chance. With arrivals,
+    requests queue up as they arrive and a_valid is held until the oldest
+    one is accepted. The master waits 0 to max_response_delay cycles between
+    accepted responses.
+
+    With an address_map, addresses default to the mapped regions and every
+    request is made legal for the region it targets: writes to read-only
+    regions are sent as Get and reads of write-only regions as PutFullData.
+    """
+    def __init__(self, arrivals: Optional[TileLinkULArrivals] = None,
+                 addresses: Optional[TileLinkULAddressPattern] = None,
+                 operations: Optional[TileLinkULOperationMix] = None,
+                 max_response_delay: int = 20,
+                 address_map: Optional[Regions] = None):
+        assert max_response_delay >= 0, "Response delay must not be negative"
+        self.arrivals = arrivals
+        self.address_map = _as_address_map(address_map)
+        self.addresses = addresses or TileLinkULUniformAddresses(self.address_map)
+        self.operations = operations or TileLinkULOperationMix()
+        self.max_response_delay = max_response_delay
+
+    def key(self) -> str:
+        """Identifies the profile in the names of cached batches."""
+        return f"{zlib.crc32(repr(self).encode()):08x}"
+
+    def __repr__(self) -> str:
+        return f"TileLinkULTrafficProfile({self.arrivals}, {self.addresses}, {self.operations}," \
+               f" {self.max_response_delay}, {self.address_map})"
@@ -9,10 +9,11 @@ from cocotb.triggers import RisingEdge, ReadWrite, ReadOnly, Event, Combine, Tim
 from cocotb_bus.bus import Bus # type: ignore
 
 from cocotb_TileLink.TileLink_common.TileLink_types import *
+from cocotb_TileLink.TileLink_common.FlightRecorder import FlightRecordedInterface
 from cocotb_TileLink.TileLink_common.Interfaces import MasterUL, SlaveUL, SlaveInterfaceUL, MasterInterfaceUL
 from cocotb_TileLink.TileLink_common.MonitorInterfaces import MonitorableInterface, TLMonitor
 
-class DutMasterMultiSlaveUL(MasterUL):
+class DutMasterMultiSlaveUL(FlightRecordedInterface, MasterUL):
     class MasterInterfaceImpl(MasterInterfaceUL):
         def __init__(self) -> None:
             MasterInterfaceUL.__init__(self)
@@ -39,7 +40,7 @@ class DutMasterMultiSlaveUL(MasterUL):
         async def get_status(self) -> TLMonitor:
             await self.all_done_event.wait()
             self.all_done_event.clear()
-            ret = TLMonitor()
+            ret = self.status
             ret.a_packet = self.a_packet
             ret.a_handshake = self.a_handshake
             ret.d_packet = self.d_packet
@@ -68,6 +69,9 @@ class DutMasterMultiSlaveUL(MasterUL):
         self.master_monitorable: Dict[MasterInterfaceUL,
                                       DutMasterMultiSlaveUL.MasterMonitorableImpl] = {}
 
+        FlightRecordedInterface.__init__(self)
+        self.cycle: int = 0
+
     def register_slave(self, slave: SlaveInterfaceUL, bus_name: str = "") -> None:
         if len(self.slaves) + 1 > self.max_slaves_count:
             raise Exception("Too many slaves for this master")
@@ -91,12 +95,28 @@ class DutMasterMultiSlaveUL(MasterUL):
             self.master_monitorable[master] = DutMasterMultiSlaveUL.MasterMonitorableImpl()
         return self.master_monitorable[master]
 
-    async def process(self) -> None:
+    def _record_handshakes(self, d_states: Dict[SlaveInterfaceUL, Tuple[TileLinkDPacket, bool]],
+                           a_readys: Dict[SlaveInterfaceUL, bool]) -> None:
+        assert self.flight_recorder is not None
+        for slave in self.slaves:
+            bus_name = self.slave_name[slave]
+            master_imp = self.named_master[bus_name]
+            if master_imp.a_valid and a_readys[slave]:
+                self.flight_recorder.record_a(bus_name, self.cycle, master_imp.a_packet)
+            d_packet, d_valid = d_states[slave]
+            if d_valid and master_imp.d_ready:
+                self.flight_recorder.record_d(bus_name, self.cycle, d_packet)
+
+    async def _route(self) -> None:
         rw = ReadWrite()
         ce = RisingEdge(getattr(self.entity, self.clk_name))
         for slave, bus_name in self.slave_name.items():
             self.slaves_bus[slave] = self.named_bus[bus_name]
 
+        recording = self.flight_recorder is not None
+        d_states: Dict[SlaveInterfaceUL, Tuple[TileLinkDPacket, bool]] = {}
+        a_readys: Dict[SlaveInterfaceUL, bool] = {}
+
         while True:
             modified = False
 
@@ -113,15 +133,16 @@ class DutMasterMultiSlaveUL(MasterUL):
             for bus_name, master_imp in self.named_master.items():
                 bus = self.named_bus[bus_name]
                 master_imp.a_valid = bool(bus.a_valid.value)
-                master_imp.a_packet = TileLinkAPacket(
-                    a_opcode=TileLinkULAOP(bus.a_opcode.value),
-                    a_param = int(bus.a_param.value),
-                    a_size = int(bus.a_size.value),
-                    a_source = int(bus.a_source.value),
-                    a_address = int(bus.a_address.value),
-                    a_mask = int(bus.a_mask.value),
-                    a_data = int(bus.a_data.value)
-                )
+                if master_imp.a_valid:
+                    master_imp.a_packet = TileLinkAPacket(
+                        a_opcode=decode_field(A_OPCODES, int(bus.a_opcode.value), "a_opcode"),
+                        a_param = int(bus.a_param.value),
+                        a_size = int(bus.a_size.value),
+                        a_source = int(bus.a_source.value),
+                        a_address = int(bus.a_address.value),
+                        a_mask = int(bus.a_mask.value),
+                        a_data = int(bus.a_data.value)
+                    )
                 if master_imp in self.master_monitorable:
                     self.master_monitorable[master_imp].a_packet    = master_imp.a_packet
                     self.master_monitorable[master_imp].a_handshake = master_imp.a_valid
@@ -133,21 +154,25 @@ class DutMasterMultiSlaveUL(MasterUL):
             for slave in self.slaves:
                 d_packet, d_valid = await slave.get_D_packet_and_valid()
                 bus = self.slaves_bus[slave]
+                if recording:
+                    d_states[slave] = (d_packet, d_valid)
 
                 master_imp = self.named_master[self.slave_name[slave]]
                 if master_imp in self.master_monitorable:
                     self.master_monitorable[master_imp].d_packet    = d_packet
                     self.master_monitorable[master_imp].d_handshake = d_valid
 
+                # Signals already holding the value are not rewritten
                 if not bus.d_valid.value.is_resolvable or \
                     int(bus.d_valid.value) != int(d_valid):
                     modified = True
-                bus.d_valid.setimmediatevalue(int(d_valid))
+                    bus.d_valid.setimmediatevalue(int(d_valid))
                 for name in ('d_opcode', 'd_param', 'd_size', 'd_source', 'd_sink', 'd_error', 'd_data'):
-                    if not getattr(bus, name).value.is_resolvable or \
-                        int(getattr(bus, name).value) != int(getattr(d_packet, name)):
+                    signal = getattr(bus, name)
+                    if not signal.value.is_resolvable or \
+                        int(signal.value) != int(getattr(d_packet, name)):
                         modified = True
-                    getattr(bus, name).setimmediatevalue(getattr(d_packet, name))
+                        signal.setimmediatevalue(getattr(d_packet, name))
 
             if modified:
                 modified = False
@@ -168,6 +193,8 @@ class DutMasterMultiSlaveUL(MasterUL):
             for slave in self.slaves:
                 a_ready = await slave.get_A_ready()
                 bus = self.slaves_bus[slave]
+                if recording:
+                    a_readys[slave] = a_ready
 
                 master_imp = self.named_master[self.slave_name[slave]]
                 if master_imp in self.master_monitorable:
@@ -185,4 +212,8 @@ class DutMasterMultiSlaveUL(MasterUL):
             for _, monitorable in self.master_monitorable.items():
                 monitorable.all_done_event.set()
 
+            if recording:
+                self._record_handshakes(d_states, a_readys)
+            self.cycle += 1
+
             await ce
@@ -9,10 +9,11 @@ from cocotb.triggers import RisingEdge, ReadWrite, ReadOnly, Event, Combine, Tim
 from cocotb_bus.bus import Bus # type: ignore
 
 from cocotb_TileLink.TileLink_common.TileLink_types import *
+from cocotb_TileLink.TileLink_common.FlightRecorder import FlightRecordedInterface
 from cocotb_TileLink.TileLink_common.Interfaces import MasterUL, SlaveUL, SlaveInterfaceUL, MasterInterfaceUL
 from cocotb_TileLink.TileLink_common.MonitorInterfaces import MonitorableInterface, TLMonitor
 
-class DutMultiMasterMultiSlaveBridgeUL(MasterUL, SlaveUL):
+class DutMultiMasterMultiSlaveBridgeUL(FlightRecordedInterface, MasterUL, SlaveUL):
     class SlaveInterfaceImpl(SlaveInterfaceUL):
         def __init__(self) -> None:
             SlaveInterfaceUL.__init__(self)
@@ -54,7 +55,7 @@ class DutMultiMasterMultiSlaveBridgeUL(MasterUL, SlaveUL):
         async def get_status(self) -> TLMonitor:
             await self.all_done_event.wait()
             self.all_done_event.clear()
-            ret = TLMonitor()
+            ret = self.status
             ret.a_packet = self.a_packet
             ret.a_handshake = self.a_handshake
             ret.d_packet = self.d_packet
@@ -92,6 +93,9 @@ class DutMultiMasterMultiSlaveBridgeUL(MasterUL, SlaveUL):
         self.master_monitorable: Dict[MasterInterfaceUL,
                                       DutMultiMasterMultiSlaveBridgeUL.MasterMonitorableImpl] = {}
 
+        FlightRecordedInterface.__init__(self)
+        self.cycle: int = 0
+
     def register_slave(self, slave: SlaveInterfaceUL, bus_name: str = "") -> None:
         if len(self.slaves) + 1 > self.max_slaves_count:
             raise Exception("Too many slaves for this master")
@@ -133,7 +137,29 @@ class DutMultiMasterMultiSlaveBridgeUL(MasterUL, SlaveUL):
             self.master_monitorable[master] = DutMultiMasterMultiSlaveBridgeUL.MasterMonitorableImpl()
         return self.master_monitorable[master]
 
-    async def process(self) -> None:
+    def _record_handshakes(self, a_states: Dict[MasterInterfaceUL, Tuple[TileLinkAPacket, bool]],
+                           d_readys: Dict[MasterInterfaceUL, bool],
+                           d_states: Dict[SlaveInterfaceUL, Tuple[TileLinkDPacket, bool]],
+                           a_readys: Dict[SlaveInterfaceUL, bool]) -> None:
+        assert self.flight_recorder is not None
+        for master in self.masters:
+            bus_name = self.master_name[master]
+            slave_imp = self.named_slave[bus_name]
+            a_packet, a_valid = a_states[master]
+            if a_valid and slave_imp.a_ready:
+                self.flight_recorder.record_a(bus_name, self.cycle, a_packet)
+            if slave_imp.d_valid and d_readys[master]:
+                self.flight_recorder.record_d(bus_name, self.cycle, slave_imp.d_packet)
+        for slave in self.slaves:
+            bus_name = self.slave_name[slave]
+            master_imp = self.named_master[bus_name]
+            if master_imp.a_valid and a_readys[slave]:
+                self.flight_recorder.record_a(bus_name, self.cycle, master_imp.a_packet)
+            d_packet, d_valid = d_states[slave]
+            if d_valid and master_imp.d_ready:
+                self.flight_recorder.record_d(bus_name, self.cycle, d_packet)
+
+    async def _route(self) -> None:
         rw = ReadWrite()
         ce = RisingEdge(getattr(self.entity, self.clk_name))
 
@@ -143,6 +169,12 @@ class DutMultiMasterMultiSlaveBridgeUL(MasterUL, SlaveUL):
         for slave, bus_name in self.slave_name.items():
             self.slaves_bus[slave] = self.named_bus[bus_name]
 
+        recording = self.flight_recorder is not None
+        a_states: Dict[MasterInterfaceUL, Tuple[TileLinkAPacket, bool]] = {}
+        d_readys: Dict[MasterInterfaceUL, bool] = {}
+        d_states: Dict[SlaveInterfaceUL, Tuple[TileLinkDPacket, bool]] = {}
+        a_readys: Dict[SlaveInterfaceUL, bool] = {}
+
         while True:
             modified = False
 
@@ -165,16 +197,20 @@ class DutMultiMasterMultiSlaveBridgeUL(MasterUL, SlaveUL):
             for master in self.masters:
                 a_packet, a_valid = await master.get_A_packet_and_valid()
                 bus = self.masters_bus[master]
+                if recording:
+                    a_states[master] = (a_packet, a_valid)
 
+                # Signals already holding the value are not rewritten
                 if not bus.a_valid.value.is_resolvable or \
                     int(bus.a_valid.value) != int(a_valid):
                     modified = True
-                bus.a_valid.setimmediatevalue(int(a_valid))
+                    bus.a_valid.setimmediatevalue(int(a_valid))
                 for name in ('a_opcode', 'a_param', 'a_size', 'a_source', 'a_address', 'a_mask', 'a_data'):
-                    if not getattr(bus, name).value.is_resolvable or \
-                        int(getattr(bus, name).value) != int(getattr(a_packet, name)):
+                    signal = getattr(bus, name)
+                    if not signal.value.is_resolvable or \
+                        int(signal.value) != int(getattr(a_packet, name)):
                         modified = True
-                    getattr(bus, name).setimmediatevalue(getattr(a_packet, name))
+                        signal.setimmediatevalue(getattr(a_packet, name))
 
             if modified:
                 modified = False
@@ -183,15 +219,16 @@ class DutMultiMasterMultiSlaveBridgeUL(MasterUL, SlaveUL):
             for bus_name, master_imp in self.named_master.items():
                 bus = self.named_bus[bus_name]
                 master_imp.a_valid = bool(bus.a_valid.value)
-                master_imp.a_packet = TileLinkAPacket(
-                    a_opcode=TileLinkULAOP(bus.a_opcode.value),
-                    a_param = int(bus.a_param.value),
-                    a_size = int(bus.a_size.value),
-                    a_source = int(bus.a_source.value),
-                    a_address = int(bus.a_address.value),
-                    a_mask = int(bus.a_mask.value),
-                    a_data = int(bus.a_data.value)
-                )
+                if master_imp.a_valid:
+                    master_imp.a_packet = TileLinkAPacket(
+                        a_opcode=decode_field(A_OPCODES, int(bus.a_opcode.value), "a_opcode"),
+                        a_param = int(bus.a_param.value),
+                        a_size = int(bus.a_size.value),
+                        a_source = int(bus.a_source.value),
+                        a_address = int(bus.a_address.value),
+                        a_mask = int(bus.a_mask.value),
+                        a_data = int(bus.a_data.value)
+                    )
                 if master_imp in self.master_monitorable:
                     self.master_monitorable[master_imp].a_packet    = master_imp.a_packet
                     self.master_monitorable[master_imp].a_handshake = master_imp.a_valid
@@ -205,21 +242,25 @@ class DutMultiMasterMultiSlaveBridgeUL(MasterUL, SlaveUL):
             for slave in self.slaves:
                 d_packet, d_valid = await slave.get_D_packet_and_valid()
                 bus = self.slaves_bus[slave]
+                if recording:
+                    d_states[slave] = (d_packet, d_valid)
 
                 master_imp = self.named_master[self.slave_name[slave]]
                 if master_imp in self.master_monitorable:
                     self.master_monitorable[master_imp].d_packet    = d_packet
                     self.master_monitorable[master_imp].d_handshake = d_valid
 
+                # Signals already holding the value are not rewritten
                 if not bus.d_valid.value.is_resolvable or \
                     int(bus.d_valid.value) != int(d_valid):
                     modified = True
-                bus.d_valid.setimmediatevalue(int(d_valid))
+                    bus.d_valid.setimmediatevalue(int(d_valid))
                 for name in ('d_opcode', 'd_param', 'd_size', 'd_source', 'd_sink', 'd_error', 'd_data'):
-                    if not getattr(bus, name).value.is_resolvable or \
-                        int(getattr(bus, name).value) != int(getattr(d_packet, name)):
+                    signal = getattr(bus, name)
+                    if not signal.value.is_resolvable or \
+                        int(signal.value) != int(getattr(d_packet, name)):
                         modified = True
-                    getattr(bus, name).setimmediatevalue(getattr(d_packet, name))
+                        signal.setimmediatevalue(getattr(d_packet, name))
 
             if modified:
                 modified = False
@@ -228,15 +269,16 @@ class DutMultiMasterMultiSlaveBridgeUL(MasterUL, SlaveUL):
             for bus_name, slave_imp in self.named_slave.items():
                 bus = self.named_bus[bus_name]
                 slave_imp.d_valid = bool(bus.d_valid.value)
-                slave_imp.d_packet = TileLinkDPacket(
-                    d_opcode=TileLinkULDOP(bus.d_opcode.value),
-                    d_param=int(bus.d_param.value),
-                    d_size=int(bus.d_size.value),
-                    d_source=int(bus.d_source.value),
-                    d_sink=int(bus.d_sink.value),
-                    d_error=TileLinkULResp(bus.d_error.value),
-                    d_data=int(bus.d_data.value)
-                )
+                if slave_imp.d_valid:
+                    slave_imp.d_packet = TileLinkDPacket(
+                        d_opcode=decode_field(D_OPCODES, int(bus.d_opcode.value), "d_opcode"),
+                        d_param=int(bus.d_param.value),
+                        d_size=int(bus.d_size.value),
+                        d_source=int(bus.d_source.value),
+                        d_sink=int(bus.d_sink.value),
+                        d_error=decode_field(RESPONSES, int(bus.d_error.value), "d_error"),
+                        d_data=int(bus.d_data.value)
+                    )
                 slave_imp.d_packet_and_valid_event.set()
 
             # D Ready routing: Master(s) ->(registered master interfaces)->
@@ -246,6 +288,8 @@ class DutMultiMasterMultiSlaveBridgeUL(MasterUL, SlaveUL):
             for master in self.masters:
                 bus = self.masters_bus[master]
                 d_ready = await master.get_D_ready()
+                if recording:
+                    d_readys[master] = d_ready
                 if not bus.d_ready.value.is_resolvable or \
                     int(bus.d_ready.value) != int(d_ready):
                     modified = True
@@ -270,6 +314,8 @@ class DutMultiMasterMultiSlaveBridgeUL(MasterUL, SlaveUL):
             for slave in self.slaves:
                 a_ready = await slave.get_A_ready()
                 bus = self.slaves_bus[slave]
+                if recording:
+                    a_readys[slave] = a_ready
 
                 master_imp = self.named_master[self.slave_name[slave]]
                 if master_imp in self.master_monitorable:
@@ -292,4 +338,8 @@ class DutMultiMasterMultiSlaveBridgeUL(MasterUL, SlaveUL):
             for _, monitorable in self.master_monitorable.items():
                 monitorable.all_done_event.set()
 
+            if recording:
+                self._record_handshakes(a_states, d_readys, d_states, a_readys)
+            self.cycle += 1
+
             await ce
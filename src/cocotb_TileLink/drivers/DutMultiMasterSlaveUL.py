@@ -9,9 +9,10 @@ from cocotb.triggers import RisingEdge, ReadWrite, ReadOnly, Event, Combine, Tim
 from cocotb_bus.bus import Bus # type: ignore
 
 from cocotb_TileLink.TileLink_common.TileLink_types import *
+from cocotb_TileLink.TileLink_common.FlightRecorder import FlightRecordedInterface
 from cocotb_TileLink.TileLink_common.Interfaces import SlaveUL, SlaveInterfaceUL, MasterInterfaceUL
 
-class DutMultiMasterSlaveUL(SlaveUL):
+class DutMultiMasterSlaveUL(FlightRecordedInterface, SlaveUL):
     class SlaveInterfaceImpl(SlaveInterfaceUL):
         def __init__(self) -> None:
             SlaveInterfaceUL.__init__(self)
@@ -45,6 +46,9 @@ class DutMultiMasterSlaveUL(SlaveUL):
 
         self.named_slave: Dict[str, DutMultiMasterSlaveUL.SlaveInterfaceImpl] = {}
 
+        FlightRecordedInterface.__init__(self)
+        self.cycle: int = 0
+
     def register_master(self, master: MasterInterfaceUL, bus_name: str = "") -> None:
         if len(self.masters) + 1 > self.max_masters_count:
             raise Exception("Too many masters for this slave")
@@ -61,12 +65,28 @@ class DutMultiMasterSlaveUL(SlaveUL):
         self.named_slave[bus_name] = DutMultiMasterSlaveUL.SlaveInterfaceImpl()
         return self.named_slave[bus_name]
 
-    async def process(self) -> None:
+    def _record_handshakes(self, a_states: Dict[MasterInterfaceUL, Tuple[TileLinkAPacket, bool]],
+                           d_readys: Dict[MasterInterfaceUL, bool]) -> None:
+        assert self.flight_recorder is not None
+        for master in self.masters:
+            bus_name = self.master_name[master]
+            slave_imp = self.named_slave[bus_name]
+            a_packet, a_valid = a_states[master]
+            if a_valid and slave_imp.a_ready:
+                self.flight_recorder.record_a(bus_name, self.cycle, a_packet)
+            if slave_imp.d_valid and d_readys[master]:
+                self.flight_recorder.record_d(bus_name, self.cycle, slave_imp.d_packet)
+
+    async def _route(self) -> None:
         rw = ReadWrite()
         ce = RisingEdge(getattr(self.entity, self.clk_name))
         for master, bus_name in self.master_name.items():
             self.masters_bus[master] = self.named_bus[bus_name]
 
+        recording = self.flight_recorder is not None
+        a_states: Dict[MasterInterfaceUL, Tuple[TileLinkAPacket, bool]] = {}
+        d_readys: Dict[MasterInterfaceUL, bool] = {}
+
         while True:
             modified = False
 
@@ -83,16 +103,20 @@ class DutMultiMasterSlaveUL(SlaveUL):
             for master in self.masters:
                 a_packet, a_valid = await master.get_A_packet_and_valid()
                 bus = self.masters_bus[master]
+                if recording:
+                    a_states[master] = (a_packet, a_valid)
 
+                # Signals already holding the value are not rewritten
                 if not bus.a_valid.value.is_resolvable or \
                     int(bus.a_valid.value) != int(a_valid):
                     modified = True
-                bus.a_valid.setimmediatevalue(int(a_valid))
+                    bus.a_valid.setimmediatevalue(int(a_valid))
                 for name in ('a_opcode', 'a_param', 'a_size', 'a_source', 'a_address', 'a_mask', 'a_data'):
-                    if not getattr(bus, name).value.is_resolvable or \
-                        int(getattr(bus, name).value) != int(getattr(a_packet, name)):
+                    signal = getattr(bus, name)
+                    if not signal.value.is_resolvable or \
+                        int(signal.value) != int(getattr(a_packet, name)):
                         modified = True
-                    getattr(bus, name).setimmediatevalue(getattr(a_packet, name))
+                        signal.setimmediatevalue(getattr(a_packet, name))
 
             if modified:
                 modified = False
@@ -103,15 +127,16 @@ class DutMultiMasterSlaveUL(SlaveUL):
             for bus_name, slave_imp in self.named_slave.items():
                 bus = self.named_bus[bus_name]
                 slave_imp.d_valid = bool(bus.d_valid.value)
-                slave_imp.d_packet = TileLinkDPacket(
-                    d_opcode=TileLinkULDOP(bus.d_opcode.value),
-                    d_param=int(bus.d_param.value),
-                    d_size=int(bus.d_size.value),
-                    d_source=int(bus.d_source.value),
-                    d_sink=int(bus.d_sink.value),
-                    d_error=TileLinkULResp(int(bus.d_error.value)),
-                    d_data=int(bus.d_data.value)
-                )
+                if slave_imp.d_valid:
+                    slave_imp.d_packet = TileLinkDPacket(
+                        d_opcode=decode_field(D_OPCODES, int(bus.d_opcode.value), "d_opcode"),
+                        d_param=int(bus.d_param.value),
+                        d_size=int(bus.d_size.value),
+                        d_source=int(bus.d_source.value),
+                        d_sink=int(bus.d_sink.value),
+                        d_error=decode_field(RESPONSES, int(bus.d_error.value), "d_error"),
+                        d_data=int(bus.d_data.value)
+                    )
                 slave_imp.d_packet_and_valid_event.set()
 
             # D Ready routing: Master(s) ->(registered master interfaces)-> Dut
@@ -119,6 +144,8 @@ class DutMultiMasterSlaveUL(SlaveUL):
             for master in self.masters:
                 bus = self.masters_bus[master]
                 d_ready = await master.get_D_ready()
+                if recording:
+                    d_readys[master] = d_ready
                 if not bus.d_ready.value.is_resolvable or \
                     int(bus.d_ready.value) != int(d_ready):
                     modified = True
@@ -133,4 +160,9 @@ class DutMultiMasterSlaveUL(SlaveUL):
                 bus = self.named_bus[bus_name]
                 slave.a_ready = bool(bus.a_ready.value)
                 slave.a_ready_event.set()
+
+            if recording:
+                self._record_handshakes(a_states, d_readys)
+            self.cycle += 1
+
             await ce
@@ -9,6 +9,7 @@ from cocotb.triggers import RisingEdge, ReadWrite, Event, Combine, ReadOnly # ty
 from cocotb_bus.bus import Bus # type: ignore
 
 from cocotb_TileLink.TileLink_common.TileLink_types import *
+from cocotb_TileLink.TileLink_common.BusOps import get_bus_ops
 from cocotb_TileLink.TileLink_common.Interfaces import SlaveUL, SlaveInterfaceUL, MasterInterfaceUL, SimInterface, MemoryInterface
 
 T = TypeVar('T')
@@ -19,9 +20,14 @@ class SimCheckInvalidSlaveUL(SimInterface, SlaveUL, SlaveInterfaceUL, MemoryInte
         self.max_number_of_masters = 1
         self.masters: List[MasterInterfaceUL] = []
 
-        self.memory: Dict[int, int] = {}
+        # The tail of a size that is not a multiple of the bus width is padded
+        # to a whole bus word, so that an aligned access never runs past the end
+        self.memory_size = -(-size // (bus_width//8)) * (bus_width//8)
+        self.memory = bytearray(self.memory_size)
         self.bus_width = bus_width
         self.bus_byte_width = bus_width//8
+        self.bus_ops = get_bus_ops(bus_width)
+        self.validator = self.bus_ops.validator
         self.size = size
 
         self.a_ready: bool = False
@@ -31,17 +37,13 @@ class SimCheckInvalidSlaveUL(SimInterface, SlaveUL, SlaveInterfaceUL, MemoryInte
         self.sink_id: int = sink_id
 
     def init_memory(self, init_array: List[int], start_address: int) -> None:
-        for i, data in enumerate(init_array):
-            self.memory[start_address+i] = data
+        # Bytes past the end of the memory can never be read back, they are dropped
+        end_address = min(start_address + len(init_array), self.memory_size)
+        if start_address < end_address:
+            self.memory[start_address:end_address] = bytes(init_array[:end_address - start_address])
 
     def memory_dump(self) -> List[int]:
-        ret = []
-        for i in range(self.size):
-            if i in self.memory:
-                ret.append(self.memory[i])
-            else:
-                ret.append(0)
-        return ret
+        return list(self.memory[:self.size])
 
     def register_master(self, master: MasterInterfaceUL, bus_name: str = "") -> None:
         if len(self.masters) + 1 > self.max_number_of_masters:
@@ -78,19 +80,19 @@ class SimCheckInvalidSlaveUL(SimInterface, SlaveUL, SlaveInterfaceUL, MemoryInte
                          source: int, sink_id: int, return_value: int) -> TileLinkDPacket:
         return TileLinkDPacket(
             d_opcode=opcode, d_param=param, d_size=size, d_source=source,
-            d_sink=sink_id, d_error=TileLinkULResp(error), d_data=return_value
+            d_sink=sink_id, d_error=RESPONSES[error], d_data=return_value
         )
 
 
     async def do_reset(self) -> None:
         self.d_valid = False
-        self.d_packet = TileLinkDPacket()
+        self.d_packet = IDLE_D_PACKET
         self.d_packet_and_valid_event.set()
 
         self.a_ready = False
         self.a_ready_event.set()
 
-        self.memory = {}
+        self.memory = bytearray(self.memory_size)
 
     async def process(self) -> None:
         rw = ReadWrite()
@@ -114,14 +116,14 @@ class SimCheckInvalidSlaveUL(SimInterface, SlaveUL, SlaveInterfaceUL, MemoryInte
                     a_mask = a_packet.a_mask
 
                     try:
-                        check_address(a_address, self.bus_byte_width, a_size)
+                        self.validator.check_address(a_address, a_size)
                     except Exception as e:
                         error = True
                         print(e)
 
                     write = a_packet.a_opcode != TileLinkULAOP.Get
                     try:
-                        check_mask(a_address, self.bus_byte_width, a_mask, a_size, write)
+                        self.validator.check_mask(a_address, a_mask, a_size, write)
                     except Exception as e:
                         error = True
                         print(e)
@@ -137,17 +139,10 @@ class SimCheckInvalidSlaveUL(SimInterface, SlaveUL, SlaveInterfaceUL, MemoryInte
                         self.opcode = TileLinkULDOP.AccessAckData
 
                     if not error:
-                        _offset = a_address % self.bus_byte_width
                         if write:
-                            for i in range(2**a_size):
-                                if a_mask & (2**(i+_offset)):
-                                    self.memory[a_address + i] = \
-                                        (a_packet.a_data >> ((i+_offset)*8)) & 0xFF
+                            self.bus_ops.store(self.memory, a_address, a_size, a_mask, a_packet.a_data)
                         else:
-                            for i in range(2**a_size):
-                                if a_address + i not in self.memory.keys():
-                                    self.memory[a_address + i] = 0
-                                return_value |= self.memory[a_address + i] << ((i+_offset)*8)
+                            return_value = self.bus_ops.load(self.memory, a_address, a_size)
 
                     self.d_packet = SimCheckInvalidSlaveUL._create_d_packet(opcode, a_packet.a_param, a_size, error,
                                                                       a_packet.a_source, self.sink_id, return_value)
@@ -155,6 +150,6 @@ class SimCheckInvalidSlaveUL(SimInterface, SlaveUL, SlaveInterfaceUL, MemoryInte
                 d_ready  = await self.masters[0].get_D_ready()
                 if d_ready and self.d_valid:
                     self.d_valid = False
-                    self.d_packet = TileLinkDPacket()
+                    self.d_packet = IDLE_D_PACKET
                 self.a_ready_event.set()
             await ce
@@ -0,0 +1,110 @@
+# Copyright (c) 2022, Antmicro
+# SPDX-License-Identifier: Apache-2.0
+
+import os
+from functools import partial
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from cocotb.log import SimLog # type: ignore
+
+from cocotb_TileLink.TileLink_common.TileLink_types import A_OPCODES
+from cocotb_TileLink.TileLink_common.BusOps import get_bus_ops
+from cocotb_TileLink.TileLink_common.BatchStream import TileLinkULBatchStream
+from cocotb_TileLink.TileLink_common.Trace import TileLinkULTraceRecord, write_trace
+from cocotb_TileLink.drivers.SimRandomTrafficGeneratorUL import generate_random_packets
+from cocotb_TileLink.drivers.SimTraceReplayMasterUL import SimTraceReplayMasterUL
+
+Records = List[TileLinkULTraceRecord]
+FuzzRun = Callable[[SimTraceReplayMasterUL], Awaitable[bool]]
+
+class SimProtocolFuzzerUL():
+    """Fuzzes a slave with the valid and invalid requests of SimRandomTrafficGeneratorUL.
+
+    Every stimulus is a list of trace records. run(master) receives a
+    SimTraceReplayMasterUL sending them, has to connect it to the DUT, reset
+    the DUT, wait until the master finishes and return True if the DUT
+    failed. A hang has to be caught by run, for example with a timeout.
+    Stimuli are replayed with cycle_accurate=False, back to back as the DUT
+    accepts them, so failures that depend on request timing may not
+    reproduce.
+
+    A failing stimulus is saved to failure_dir and minimized with delta
+    debugging (ddmin): ever smaller subsets and complements of it are
+    replayed, keeping any that still fails, until removing any single
+    request makes the failure disappear. The minimized trace is saved next to
+    the original one. Replays of the same subset are answered from a cache.
+    """
+    def __init__(self, run: FuzzRun, bus_width: int = 32, addr_width: int = 32, failure_dir: str = ".",
+                 seed: Optional[int] = None, source_width: int = 4, name: str = "SimProtocolFuzzerUL") -> None:
+        self.run = run
+        self.bus_width = bus_width
+        self.failure_dir = failure_dir
+        self.source_width = source_width
+        self.name = name
+        self.log: SimLog = SimLog(f"cocotb.{name}")
+        self.packets = TileLinkULBatchStream(f"{name}-{bus_width}-{addr_width}-packets",
+                                             partial(generate_random_packets,
+                                                     bus_ops=get_bus_ops(bus_width, addr_width)), seed)
+        self.results: Dict[Tuple[TileLinkULTraceRecord, ...], bool] = {}
+        self.replays: int = 0
+        self.failures: List[str] = []
+
+    def generate(self, length: int) -> Records:
+        records = []
+        for cycle in range(length):
+            opcode, size, address, mask, data = self.packets.next()
+            records.append(TileLinkULTraceRecord(
+                        cycle, A_OPCODES[opcode], 0, size, cycle % 2**self.source_width, address, mask, data))
+        return records
+
+    async def check(self, records: Records) -> bool:
+        """Replays records against the DUT, True if it failed."""
+        key = tuple(records)
+        if key not in self.results:
+            path = os.path.join(self.failure_dir, f"{self.name}-replay.trace")
+            write_trace(path, records)
+            self.replays += 1
+            self.results[key] = await self.run(SimTraceReplayMasterUL(path, self.bus_width, cycle_accurate=False,
+                                                                      name=f"{self.name}-replay"))
+        return self.results[key]
+
+    async def minimize(self, records: Records) -> Records:
+        granularity = 2
+        while len(records) >= 2:
+            chunk = -(-len(records) // granularity)
+            subsets = [records[i:i + chunk] for i in range(0, len(records), chunk)]
+            reduced = False
+            for subset in subsets:
+                if await self.check(subset):
+                    records, granularity, reduced = subset, 2, True
+                    break
+            if not reduced and len(subsets) > 2:
+                for i in range(len(subsets)):
+                    complement = [record for subset in subsets[:i] + subsets[i + 1:] for record in subset]
+                    if await self.check(complement):
+                        records, granularity, reduced = complement, max(granularity - 1, 2), True
+                        break
+            if not reduced:
+                if granularity >= len(records):
+                    break
+                granularity = min(2 * granularity, len(records))
+        return records
+
+    async def fuzz(self, iterations: int = 10, length: int = 1000) -> List[str]:
+        """Runs iterations random stimuli of length requests, returns the minimized failing traces."""
+        minimized = []
+        for iteration in range(iterations):
+            records = self.generate(length)
+            if not await self.check(records):
+                continue
+            path = os.path.join(self.failure_dir, f"{self.name}-{iteration}.trace")
+            write_trace(path, records)
+            self.failures.append(path)
+            replays = self.replays
+            records = await self.minimize(records)
+            min_path = os.path.join(self.failure_dir, f"{self.name}-{iteration}-min.trace")
+            write_trace(min_path, records)
+            minimized.append(min_path)
+            self.log.warning(f"Failure saved to {path}, minimized to {len(records)} requests"
+                             f" in {self.replays - replays} replays: {min_path}")
+        return minimized
@@ -1,28 +1,77 @@
 # Copyright (c) 2022, Antmicro
 # SPDX-License-Identifier: Apache-2.0
 
-from random import randint
-from typing import Optional, TypeVar, Any, Tuple, List, Set
+from functools import partial
+from typing import Optional, TypeVar, Any, Tuple, List, Dict
 
+import numpy as np
+
+from cocotb.log import SimLog # type: ignore
 from cocotb.handle import SimHandleBase # type: ignore
 from cocotb.triggers import ReadWrite, RisingEdge, Event # type: ignore
 
 from cocotb_TileLink.TileLink_common.TileLink_types import *
-from cocotb_TileLink.TileLink_common.Interfaces import SimInterface, MasterInterfaceUL, MasterUL, SlaveInterfaceUL
+from cocotb_TileLink.TileLink_common.BusOps import TileLinkULBusOps, get_bus_ops
+from cocotb_TileLink.TileLink_common.BatchStream import TileLinkULBatchStream
+from cocotb_TileLink.TileLink_common.SourcePool import TileLinkULSourcePool
+from cocotb_TileLink.TileLink_common.Interfaces import SimInterface, MasterInterfaceUL, MasterUL, SlaveInterfaceUL, ThroughputInterface
 from cocotb_TileLink.TileLink_common.MonitorInterfaces import MonitorableInterface, TLMonitor
+from cocotb_TileLink.drivers.SimTrafficGeneratorUL import generate_traffic_controls, aligned_read_masks
 
 T = TypeVar('T')
 
-class SimRandomTrafficGeneratorUL(MasterUL, MasterInterfaceUL, SimInterface, MonitorableInterface):
-    def __init__(self, num_of_transactions: int = 100, bus_width: int = 32, addr_width: int = 32, name: str = "") -> None:
+def generate_random_packets(rng: np.random.Generator, count: int, bus_ops: TileLinkULBusOps) -> Dict[str, np.ndarray]:
+    """Fields of random requests, about half of them with an invalid address,
+    size or mask, as sent by SimRandomTrafficGeneratorUL."""
+    # 0 - read, 1 - write partial, 2 - write full
+    op = rng.integers(0, 3, count)
+    log_width = bus_ops.validator.log_width
+    correct_address = rng.integers(0, 2, count).astype(bool)
+    correct_size = rng.integers(0, 2, count).astype(bool)
+    correct_mask = rng.integers(0, 2, count).astype(bool)
+
+    size = np.where(correct_mask | correct_size,
+                    rng.integers(0, log_width, count, endpoint=True),
+                    rng.integers(0, 2**log_width.bit_length(), count))
+    address = rng.integers(0, bus_ops.address_mask, count, dtype=np.uint64, endpoint=True)
+    alignment = (np.uint64(1) << size.astype(np.uint64)) - np.uint64(1)
+    address = np.where(correct_mask | correct_address, address & ~alignment, address)
+
+    full_mask = bus_ops.validator.full_mask
+    read_mask = aligned_read_masks(bus_ops.validator, size, address)
+    random_mask = rng.integers(0, full_mask, count, dtype=np.uint64, endpoint=True)
+    mask = np.where(correct_mask & (op == 2), np.uint64(full_mask),
+                    np.where(correct_mask & (op == 0), read_mask, random_mask))
+    opcode = np.choose(op, [int(TileLinkULAOP.Get), int(TileLinkULAOP.PutPartialData),
+                            int(TileLinkULAOP.PutFullData)]).astype(np.uint8)
+    return {
+        "opcode": opcode,
+        "size": size.astype(np.uint8),
+        "address": address,
+        "mask": mask,
+        "data": rng.integers(0, 256, (count, bus_ops.bus_byte_width), dtype=np.uint8),
+    }
+
+class SimRandomTrafficGeneratorUL(MasterUL, MasterInterfaceUL, SimInterface, MonitorableInterface, ThroughputInterface):
+    """Sends random requests, about half of them with an invalid address,
+    size or mask. Batches, saturation mode and source IDs work like in
+    SimTrafficGeneratorUL.
+    """
+    def __init__(self, num_of_transactions: int = 100, bus_width: int = 32, addr_width: int = 32, name: str = "",
+                 seed: Optional[int] = None, batch_size: int = 4096, cache_dir: Optional[str] = None,
+                 saturate: bool = False, source_width: int = 4, max_outstanding: Optional[int] = None) -> None:
         MonitorableInterface.__init__(self)
         MasterInterfaceUL.__init__(self)
         SimInterface.__init__(self)
+        ThroughputInterface.__init__(self)
 
         self.name = name
+        self.log: SimLog = SimLog(f"cocotb.{name or type(self).__name__}")
         self.max_slave_count = 1
         self.slaves: List[SlaveInterfaceUL] = []
         self.bus_width = bus_width
+        self.bus_ops = get_bus_ops(bus_width, addr_width)
+        self.validator = self.bus_ops.validator
         self.addr_width = addr_width
 
         self.num_of_transactions_send = num_of_transactions
@@ -38,7 +87,15 @@ class SimRandomTrafficGeneratorUL(MasterUL, MasterInterfaceUL, SimInterface, Mon
         self.was_d_handshake: bool = False
 
         self.wait_for: int = 0
-        self.master_in_use: Set[int] = set()
+        self.saturate = saturate
+        self.sources = TileLinkULSourcePool(source_width, max_outstanding)
+
+        stream_name = f"{type(self).__name__}-{bus_width}-{addr_width}"
+        self.packets = TileLinkULBatchStream(f"{stream_name}-packets",
+                                             partial(generate_random_packets, bus_ops=self.bus_ops),
+                                             seed, batch_size, cache_dir)
+        self.controls = TileLinkULBatchStream(f"{stream_name}-controls", generate_traffic_controls,
+                                              seed, batch_size, cache_dir)
 
     def register_slave(self, slave: SlaveInterfaceUL, bus_name: str = "") -> None:
         if len(self.slaves) + 1 > self.max_slave_count:
@@ -80,74 +137,40 @@ class SimRandomTrafficGeneratorUL(MasterUL, MasterInterfaceUL, SimInterface, Mon
     async def get_status(self) -> TLMonitor:
         await self.all_done_event.wait()
         self.all_done_event.clear()
-        ret = TLMonitor();
+        ret = self.status
         ret.a_handshake = self.was_a_handshake
         ret.a_packet = self.a_packet
         ret.d_handshake = self.was_d_handshake
         ret.d_packet = self.d_packet
         return ret
 
-    def _get_random_A_packet(self) -> TileLinkAPacket:
-        op = randint(0,2) # 0 - read, 1 - write
-        bus_byte_width = self.bus_width//8
-        log_bus_byte_width = bus_byte_width.bit_length() - 1
-
-        size = 0
-        mask = 0
-        data = randint(0, 2**self.bus_width - 1)
-        address = randint(0, 2**self.bus_width - 1)
-        source = randint(0, 15)
-
-        correct_address = randint(0,1)
-        correct_size = randint(0,1)
-        correct_mask = randint(0,1)
-
-        if op == 0:
-            opcode = TileLinkULAOP.Get
-        elif op == 1:
-            opcode = TileLinkULAOP.PutPartialData
-        else:
-            opcode = TileLinkULAOP.PutFullData
-
-        if correct_mask or correct_size:
-            size = randint(0, log_bus_byte_width)
-        else:
-            size = randint(0, 2**(log_bus_byte_width.bit_length()) - 1)
-
-        if correct_mask or correct_address:
-            address = address & ~(2**size - 1)
-
-        if correct_mask:
-            if op == 2:
-                mask = 2**bus_byte_width - 1
-            elif op == 1:
-                mask = randint(0, 2**bus_byte_width - 1)
-            else:
-                mask = (2**(2**size) - 1) << (address & (bus_byte_width-1 >> size))
-        else:
-            mask = randint(0, 2**bus_byte_width - 1)
-        assert mask.bit_length() <= 4, f"{correct_mask=}, {op=}"
-
-
+    def _get_random_A_packet(self, source: int) -> TileLinkAPacket:
+        opcode, size, address, mask, data = self.packets.next()
         return TileLinkAPacket(
-                    a_opcode=opcode, a_size=size,
+                    a_opcode=A_OPCODES[opcode], a_size=size,
                     a_source=source, a_address=address,
                     a_mask=mask, a_data=data)
 
-    def _A_packet_prep(self) -> None:
-        if not self.sending_a or randint(0,99) in range(75, 100):
-            self.a_packet = self._get_random_A_packet()
+    def _A_packet_prep(self, reroll: bool, valid: bool) -> None:
+        self.a_valid = False
+        if self.num_of_transactions_send <= 0:
+            return
+        if not self.sending_a:
+            source = self.sources.acquire()
+            if source is None:
+                return
+            self.a_packet = self._get_random_A_packet(source)
             self.sending_a = True
-        if self.sending_a:
-            self.a_valid = bool(randint(0,1))
-            if self.a_packet.a_source in self.master_in_use or self.num_of_transactions_send <= 0:
-                self.a_valid = False
+        elif reroll:
+            self.a_packet = self._get_random_A_packet(self.a_packet.a_source)
+        self.a_valid = valid
 
     def _A_packet_process(self, a_ready: bool) -> None:
         self.was_a_handshake = False
         if self.a_valid and a_ready:
             self.was_a_handshake = True
-            self.master_in_use.add(self.a_packet.a_source)
+            self.beats += 1
+            self.bytes += 2**self.a_packet.a_size
             self.num_of_transactions_send -= 1
             self.sending_a = False
 
@@ -156,13 +179,15 @@ class SimRandomTrafficGeneratorUL(MasterUL, MasterInterfaceUL, SimInterface, Mon
 
         self.was_a_handhake = False
         self.a_valid = False
-        self.a_packet = TileLinkAPacket()
+        self.a_packet = IDLE_A_PACKET
         self.a_packet_and_valid_event.set()
 
         self.was_d_handhake = False
         self.d_ready = False
         self.d_ready_event.set()
 
+        self.sources.reset()
+
     async def process(self) -> None:
         ce = RisingEdge(self.clock)
         rw = ReadWrite()
@@ -174,16 +199,22 @@ class SimRandomTrafficGeneratorUL(MasterUL, MasterInterfaceUL, SimInterface, Mon
             if self.is_reset():
                 await self.do_reset()
             else:
-                self._A_packet_prep()
+                self.cycles += 1
+                if self.saturate:
+                    wait = 0
+                    self._A_packet_prep(False, True)
+                else:
+                    reroll, valid, wait = self.controls.next()
+                    self._A_packet_prep(reroll, valid)
                 self.a_packet_and_valid_event.set()
 
                 d_packet, d_valid = await self.slaves[0].get_D_packet_and_valid()
 
                 self.was_d_handshake = False
-                self.d_ready = False
+                self.d_ready = self.saturate
                 if d_valid and self.wait_for <= 0:
                     self.d_ready = True
-                    self.wait_for = randint(0,20)
+                    self.wait_for = wait
                     self.num_of_transactions_recv -= 1
                     self.was_d_handshake = True
                     self.d_packet = d_packet
@@ -194,11 +225,12 @@ class SimRandomTrafficGeneratorUL(MasterUL, MasterInterfaceUL, SimInterface, Mon
                 self._A_packet_process(a_ready)
 
                 if self.was_d_handshake:
-                    self.master_in_use.remove(d_packet.d_source)
+                    self.sources.release(int(d_packet.d_source))
 
             self.all_done_event.set()
             await ce
 
+        self.report_throughput()
         self.a_valid = False
         self.sim_finish_event.set()
         while True:
@@ -1,22 +1,33 @@
 # Copyright (c) 2022, Antmicro
 # SPDX-License-Identifier: Apache-2.0
 
+from collections import deque
 from random import choice
-from typing import List, Tuple, Dict, Union, Set, Optional, TypeVar, Any
+from typing import List, Tuple, Dict, Union, Set, Optional, TypeVar, Any, AsyncIterator, AsyncIterable, Callable, Deque, Iterable
 
 from cocotb.log import SimLog # type: ignore
 from cocotb.handle import SimHandleBase # type: ignore
 from cocotb.triggers import ReadWrite, RisingEdge, Event, ReadOnly # type: ignore
+from cocotb.queue import Queue # type: ignore
 
 from cocotb_TileLink.TileLink_common.TileLink_types import*
+from cocotb_TileLink.TileLink_common.BusOps import Beat, get_bus_ops
+from cocotb_TileLink.TileLink_common.TokenBucket import TileLinkULTokenBucket, TileLinkULIssueWindow
 from cocotb_TileLink.TileLink_common.Interfaces import SimInterface, MasterUL, MasterInterfaceUL, SlaveInterfaceUL
 from cocotb_TileLink.TileLink_common.MonitorInterfaces import MonitorableInterface, TLMonitor
 
 T = TypeVar('T')
 
+ResponseCallback = Callable[[int, List[TileLinkDPacket]], None]
+
+# Splits reads and writes into beats and collects their responses,
+# response handling and issue pacing are described in the README
 class SimSimpleMasterUL(SimInterface, MasterUL, MasterInterfaceUL, MonitorableInterface):
     def __init__(self, bus_width: int = 32, name: str = "SimSimpleMasterUL",
-                 expect_read_error: bool = False, expect_write_error: bool = False):
+                 expect_read_error: bool = False, expect_write_error: bool = False,
+                 discard_write_acks: bool = False, max_buffered_responses: Optional[int] = None,
+                 bytes_per_cycle: Optional[float] = None, burst_bytes: Optional[int] = None,
+                 max_issues: Optional[int] = None, issue_window: int = 1):
         MonitorableInterface.__init__(self)
         MasterInterfaceUL.__init__(self)
         SimInterface.__init__(self)
@@ -25,6 +36,7 @@ class SimSimpleMasterUL(SimInterface, MasterUL, MasterInterfaceUL, MonitorableIn
         self.slaves: List[SlaveInterfaceUL] = []
         self.log: SimLog = SimLog(f"cocotb.{name}")
         self.bus_byte_width = bus_width//8
+        self.bus_ops = get_bus_ops(bus_width)
 
         self.a_packet_queue: Dict[int, List[TileLinkAPacket]] = {}
         self.a_packet_queue_send: Dict[int, List[TileLinkAPacket]] = {}
@@ -43,8 +55,34 @@ class SimSimpleMasterUL(SimInterface, MasterUL, MasterInterfaceUL, MonitorableIn
         self.expect_read_error = expect_read_error
         self.expect_write_error = expect_write_error
 
+        assert max_buffered_responses is None or max_buffered_responses > 0, \
+            "max_buffered_responses must be a positive number"
+        self.discard_write_acks = discard_write_acks
+        self.max_buffered_responses = max_buffered_responses
+        self.buffered_responses: int = 0
+        # Response beats of queued transfers and beats still expected by started ones
+        self.transfer_beats: Dict[int, int] = {}
+        self.reserved_beats: Dict[int, int] = {}
+        self.reserved_total: int = 0
+        self.response_callback: Optional[ResponseCallback] = None
+        self.response_queue: Optional[Queue] = None
+        self.stream_queues: Dict[int, Queue] = {}
+        self.reset_count: int = 0
+
+        self.buckets: List[Tuple[Union[TileLinkULTokenBucket, TileLinkULIssueWindow], bool]] = []
+        if bytes_per_cycle is not None:
+            burst_bytes = burst_bytes or max(self.bus_byte_width, int(bytes_per_cycle))
+            assert burst_bytes >= self.bus_byte_width, "Burst must hold at least one bus word"
+            self.buckets.append((TileLinkULTokenBucket(bytes_per_cycle, burst_bytes), True))
+        if max_issues is not None:
+            self.buckets.append((TileLinkULIssueWindow(max_issues, issue_window), False))
+
         self.finished: bool = False
 
+    def register_response_callback(self: T, callback: ResponseCallback) -> T:
+        self.response_callback = callback
+        return self
+
     def register_slave(self, slave: SlaveInterfaceUL, bus_name: str = "") -> None:
         if len(self.slaves) + 1 > self.max_slave_count:
             raise Exception("Too many slaves")
@@ -86,7 +124,7 @@ class SimSimpleMasterUL(SimInterface, MasterUL, MasterInterfaceUL, MonitorableIn
     async def get_status(self) -> TLMonitor:
         await self.all_done_event.wait()
         self.all_done_event.clear()
-        ret = TLMonitor();
+        ret = self.status
         ret.a_handshake = self.was_a_handshake
         ret.a_packet = self.a_packet
         ret.d_handshake = self.was_d_handshake
@@ -97,22 +135,47 @@ class SimSimpleMasterUL(SimInterface, MasterUL, MasterInterfaceUL, MonitorableIn
         if len(self.a_packet_queue.keys()) == 0:
             return None
         self.a_valid = False
-        source = choice(list(self.a_packet_queue.keys()))
+        sources = list(self.a_packet_queue.keys())
+        if self.max_buffered_responses is not None:
+            sources = [source for source in sources if source in self.reserved_beats or self._may_start(source)]
+            if not sources:
+                return None
+        source = choice(sources)
+        if source not in self.reserved_beats:
+            self.reserved_beats[source] = self.transfer_beats.pop(source, 0)
+            self.reserved_total += self.reserved_beats[source]
         queue = self.a_packet_queue.pop(source)
         packet = queue[0]
         queue = queue[1:]
         self.a_packet_queue_send[source] = queue
         return packet
 
+    def _may_start(self, source: int) -> bool:
+        assert self.max_buffered_responses is not None
+        # With nothing else expected, a transfer starts and waits for responses to be collected
+        return self.reserved_total == 0 or \
+            self.buffered_responses + self.reserved_total + self.transfer_beats.get(source, 0) <= self.max_buffered_responses
+
+    def _paced(self, packet: TileLinkAPacket) -> bool:
+        """True while the token buckets do not allow sending packet."""
+        for bucket, count_bytes in self.buckets:
+            if not bucket.available(2**packet.a_size if count_bytes else 1):
+                return True
+        return False
+
     def _A_packet_prep(self) -> None:
+        for bucket, _ in self.buckets:
+            bucket.tick()
         if not self.sending_a:
             self.a_packet = self._get_random_A_packet()
-            self.a_valid = True
             self.sending_a = True
         if self.a_packet is None:
-            self.a_packet = TileLinkAPacket()
+            self.a_packet = IDLE_A_PACKET
             self.a_valid = False
             self.sending_a = False
+        elif not self.a_valid:
+            # Once raised, a_valid stays high until the handshake
+            self.a_valid = not self._paced(self.a_packet)
 
     def _A_packet_process(self, a_ready: bool) -> None:
         self.was_a_handshake = False
@@ -120,6 +183,9 @@ class SimSimpleMasterUL(SimInterface, MasterUL, MasterInterfaceUL, MonitorableIn
             self.was_a_handshake = True
             self.sending_a = False
             self.a_valid = False
+            assert self.a_packet is not None
+            for bucket, count_bytes in self.buckets:
+                bucket.take(2**self.a_packet.a_size if count_bytes else 1)
 
     def _inner_D_packet_process(self, d_packet: TileLinkDPacket) -> None:
         self.d_packet = d_packet
@@ -129,17 +195,38 @@ class SimSimpleMasterUL(SimInterface, MasterUL, MasterInterfaceUL, MonitorableIn
             if read and not self.expect_read_error or \
                not(read or self.expect_write_error):
                 self.log.warning("Received error respons in d_packet")
-        self.d_packets[source].append(d_packet)
+        if read or d_packet.d_error or not self.discard_write_acks:
+            self.d_packets[source].append(d_packet)
+            self.buffered_responses += 1
+            if self.reserved_beats.get(source):
+                self.reserved_beats[source] -= 1
+                self.reserved_total -= 1
         queue = self.a_packet_queue_send.pop(source)
         if len(queue) > 0:
             self.a_packet_queue[source] = queue
             return
         self.a_packet_sources.remove(source)
+        self.reserved_total -= self.reserved_beats.pop(source, 0)
+        self._deliver(source)
+
+    def _deliver(self, source: int) -> None:
+        # Beats stay counted in buffered_responses until they are collected
+        if source in self.stream_queues:
+            self.stream_queues[source].put_nowait((source, self.d_packets.pop(source)))
+        elif self.discard_write_acks and not self.d_packets[source]:
+            del self.d_packets[source]
+        elif self.response_callback is not None:
+            packets = self.d_packets.pop(source)
+            self.buffered_responses -= len(packets)
+            self.response_callback(source, packets)
+        elif self.response_queue is not None:
+            self.response_queue.put_nowait((source, self.d_packets.pop(source)))
 
     def _D_packet_process(self, d_packet: TileLinkDPacket, d_valid: bool) -> None:
         self.was_d_handshake = False
         self.d_ready = False
-        if d_valid:
+        if d_valid and (self.max_buffered_responses is None or
+                        self.buffered_responses < self.max_buffered_responses):
             self.d_ready = True
             self._inner_D_packet_process(d_packet)
             self.was_d_handshake = True
@@ -149,16 +236,32 @@ class SimSimpleMasterUL(SimInterface, MasterUL, MasterInterfaceUL, MonitorableIn
 
         self.was_a_handhake = False
         self.a_valid = False
-        self.a_packet = TileLinkAPacket()
+        self.a_packet = IDLE_A_PACKET
         self.a_packet_and_valid_event.set()
 
         self.was_d_handhake = False
         self.d_ready = False
         self.d_ready_event.set()
 
+        for bucket, _ in self.buckets:
+            bucket.reset()
         self.a_packet_queue.clear()
         self.a_packet_sources.clear()
         self.d_packets.clear()
+        self.buffered_responses = 0
+        self.transfer_beats.clear()
+        self.reserved_beats.clear()
+        self.reserved_total = 0
+        if self.response_queue is not None:
+            while not self.response_queue.empty():
+                self.response_queue.get_nowait()
+        # Pending streams are woken up and fail instead of waiting for dropped responses
+        self.reset_count += 1
+        for completions in set(self.stream_queues.values()):
+            while not completions.empty():
+                completions.get_nowait()
+            completions.put_nowait(None)
+        self.stream_queues.clear()
 
     async def process(self) -> None:
         ce = RisingEdge(self.clock)
@@ -190,124 +293,125 @@ class SimSimpleMasterUL(SimInterface, MasterUL, MasterInterfaceUL, MonitorableIn
         while source in self.a_packet_sources:
             await re
 
+    def _queue_beats(self, source: int, beats: List[Beat]) -> None:
+        assert len(beats) > 0
+        if self.max_buffered_responses is not None:
+            buffered = 0 if self.discard_write_acks and beats[0][0] != TileLinkULAOP.Get else len(beats)
+            assert buffered <= self.max_buffered_responses, \
+                f"Transfer of {buffered} beats does not fit max_buffered_responses"
+            self.transfer_beats[source] = buffered
+        # Responses of the previous transfer that were never collected are dropped
+        self.buffered_responses -= len(self.d_packets.get(source, []))
+        self.d_packets[source] = []
+        self.a_packet_sources.add(source)
+        self.a_packet_queue[source] = [TileLinkAPacket(
+            a_opcode=opcode, a_param=0, a_size=size, a_source=source,
+            a_address=address, a_mask=mask, a_data=data) for opcode, size, address, mask, data in beats]
+
     def write(self, address: int, length: int, value: List[int],
               byte_mask: List[bool], source: int = 0) -> None:
         assert source not in self.a_packet_sources, "Sending multiple outstanding messages from same source is forbiden"
         assert length == len(value) and length == len(byte_mask)
-        cmds = []
-        end_address = address + length
-        for i in range((self.bus_byte_width).bit_length() - 1):
-            if (address & 2**i) and len(value) != 0:
-                _mask = 0
-                _value = 0
-                _offset = address % (self.bus_byte_width)
-                for j in range(0, 2**i):
-                    if len(value) != 0:
-                        _mask |= byte_mask[0] << _offset + j
-                        _value |= value[0] << ((_offset + j) * 8)
-                        byte_mask = byte_mask[1:]
-                        value = value[1:]
-                cmds.append(TileLinkAPacket(
-                    a_opcode=TileLinkULAOP.PutPartialData, a_param=0, a_size=i,
-                    a_source=source, a_address=address, a_mask=_mask, a_data=_value))
-                address += 2**i
-        if address >= end_address:
-            self.d_packets[source] = []
-            self.a_packet_sources.add(source)
-            self.a_packet_queue[source] = cmds
-            assert len(cmds)>0
-            return
-        while len(value) >= (self.bus_byte_width):
-            _mask = 0
-            _value = 0
-            _size = (self.bus_byte_width).bit_length() - 1
-            for j in range(0, (self.bus_byte_width)):
-                _mask |= byte_mask[0] << j
-                _value |= value[0] << (j * 8)
-                byte_mask = byte_mask[1:]
-                value = value[1:]
-            _opcode = get_write_opcode(_size, self.bus_byte_width, _mask)
-            cmds.append(TileLinkAPacket(
-                a_opcode=_opcode, a_param=0, a_size=_size, a_source=source,
-                a_address=address, a_mask=_mask, a_data=_value))
-            address += (self.bus_byte_width)
-        if address >= end_address:
-            self.d_packets[source] = []
-            self.a_packet_sources.add(source)
-            self.a_packet_queue[source] = cmds
-            assert len(cmds)>0
-            return
-        for i in range((self.bus_byte_width).bit_length()-1, -1 , -1):
-            if len(value) & 2**i:
-                _mask = 0
-                _value = 0
-                _offset = address % (self.bus_byte_width)
-                for j in range(0, 2**i):
-                    _mask |= byte_mask[0] << _offset + j
-                    _value |= value[0] << ((_offset + j) * 8)
-                    byte_mask = byte_mask[1:]
-                    value = value[1:]
-                cmds.append(TileLinkAPacket(
-                    a_opcode=TileLinkULAOP.PutPartialData, a_param=0, a_size=i,
-                    a_source=source, a_address=address, a_mask=_mask, a_data=_value))
-                address += 2**i
-        if address >= end_address:
-            self.d_packets[source] = []
-            self.a_packet_sources.add(source)
-            self.a_packet_queue[source] = cmds
-            assert len(cmds)>0
-            return
-        assert False
+        self._queue_beats(source, self.bus_ops.split_write(address, value, byte_mask))
 
     def read(self, address: int, length: int, source: int = 0) -> None:
         assert source not in self.a_packet_sources, "Sending multiple outstanding messages from same source is forbiden"
-        cmds = []
-        end_address = address + length
-        for i in range((self.bus_byte_width).bit_length() - 1):
-            if (address & 2**i) and address + 2**i <= end_address:
-                _mask = 2**(2**i) - 1
-                _offset = address % (self.bus_byte_width)
-                _mask <<= _offset
-                cmds.append(TileLinkAPacket(
-                    a_opcode=TileLinkULAOP.Get, a_param=0, a_size=i,
-                    a_source=source, a_address=address, a_mask=_mask))
-                address += 2**i
-        if address >= end_address:
-            self.d_packets[source] = []
-            self.a_packet_sources.add(source)
-            self.a_packet_queue[source] = cmds
-            assert len(cmds)>0
-            return
-        while address+self.bus_byte_width <= end_address:
-            _mask = 2**(self.bus_byte_width) - 1
-            _size = (self.bus_byte_width).bit_length() - 1
-            cmds.append(TileLinkAPacket(
-                a_opcode=TileLinkULAOP.Get, a_param=0, a_size=_size,
-                a_source=source, a_address=address, a_mask=_mask))
-            address += (self.bus_byte_width)
-        if address >= end_address:
-            self.d_packets[source] = []
-            self.a_packet_sources.add(source)
-            self.a_packet_queue[source] = cmds
-            assert len(cmds)>0
-            return
-        for i in range((self.bus_byte_width).bit_length()-1, -1, -1):
-            if address + 2**i <= end_address:
-                _mask = 2**(2**i) - 1
-                _offset = address % (self.bus_byte_width)
-                _mask <<= _offset
-                cmds.append(TileLinkAPacket(
-                    a_opcode=TileLinkULAOP.Get, a_param=0, a_size=i,
-                    a_source=source, a_address=address, a_mask=_mask))
-                address += 2**i
-        if address >= end_address:
-            self.d_packets[source] = []
-            self.a_packet_sources.add(source)
-            self.a_packet_queue[source] = cmds
-            assert len(cmds)>0
-            return
-        assert False
+        self._queue_beats(source, self.bus_ops.split_read(address, length))
 
     def get_rsp(self, source: int) -> List[TileLinkDPacket]:
-        rsp = self.d_packets.pop(source)
+        rsp = self.d_packets.pop(source, [])
+        self.buffered_responses -= len(rsp)
         return rsp
+
+    async def responses(self) -> AsyncIterator[Tuple[int, List[TileLinkDPacket]]]:
+        """Yields (source, response beats) of transfers as they finish.
+
+        Transfers finished before the first iteration or after the iteration
+        stops are left for get_rsp().
+        """
+        assert self.response_queue is None, "Responses are already being iterated"
+        self.response_queue = Queue()
+        try:
+            while True:
+                source, packets = await self.response_queue.get()
+                self.buffered_responses -= len(packets)
+                yield source, packets
+        finally:
+            queue, self.response_queue = self.response_queue, None
+            while not queue.empty():
+                source, packets = queue.get_nowait()
+                if source in self.a_packet_sources:
+                    # Source was reused, so the responses are dropped like uncollected ones
+                    self.buffered_responses -= len(packets)
+                else:
+                    self.d_packets[source] = packets
+
+    def _issue(self, operation: TileLinkULOperation, source: int) -> None:
+        opcode, address, data = operation[:3]
+        if opcode == TileLinkULAOP.Get:
+            self.read(address, data, source)
+            return
+        mask = operation[3] if len(operation) > 3 and operation[3] is not None else [True] * len(data)
+        self.write(address, len(data), list(data), list(mask), source)
+
+    async def stream(self, operations: Union[Iterable[TileLinkULOperation], AsyncIterable[TileLinkULOperation]],
+                     sources: Iterable[int] = range(16),
+                     window: int = 16) -> AsyncIterator[Tuple[TileLinkULOperation, List[TileLinkDPacket]]]:
+        """Issues operations as sources free up and yields them with their responses.
+
+        At most window operations are taken from the iterator ahead of being
+        issued. The given sources are used only by this stream until it ends.
+        A reset while the stream is running raises an exception in the caller.
+        """
+        assert window > 0, "Window must be a positive number"
+        if isinstance(operations, AsyncIterable):
+            iterator = operations.__aiter__()
+        else:
+            iterator = _as_async_iterator(operations)
+        free: Deque[int] = deque(sources)
+        completions: Queue = Queue()
+        for source in free:
+            assert source not in self.a_packet_sources and source not in self.stream_queues, \
+                f"Source {source} is already in use"
+            self.stream_queues[source] = completions
+        prefetched: Deque[TileLinkULOperation] = deque()
+        pending: Dict[int, TileLinkULOperation] = {}
+        exhausted = False
+        reset_count = self.reset_count
+        try:
+            while True:
+                while not exhausted and len(prefetched) < window:
+                    try:
+                        prefetched.append(await iterator.__anext__())
+                    except StopAsyncIteration:
+                        exhausted = True
+                if self.reset_count != reset_count:
+                    raise Exception("Stream was interrupted by a reset")
+                while free and prefetched:
+                    source = free.popleft()
+                    operation = prefetched.popleft()
+                    pending[source] = operation
+                    self._issue(operation, source)
+                if not pending:
+                    return
+                completion = await completions.get()
+                if completion is None:
+                    raise Exception("Stream was interrupted by a reset")
+                source, packets = completion
+                self.buffered_responses -= len(packets)
+                free.append(source)
+                yield pending.pop(source), packets
+        finally:
+            for source in list(self.stream_queues):
+                if self.stream_queues[source] is completions:
+                    del self.stream_queues[source]
+            # Responses of operations the caller stopped waiting for are dropped
+            while not completions.empty():
+                completion = completions.get_nowait()
+                if completion is not None:
+                    self.buffered_responses -= len(completion[1])
+
+
+async def _as_async_iterator(operations: Iterable[TileLinkULOperation]) -> AsyncIterator[TileLinkULOperation]:
+    for operation in operations:
+        yield operation
@@ -0,0 +1,208 @@
+# Copyright (c) 2022, Antmicro
+# SPDX-License-Identifier: Apache-2.0
+
+from collections import deque
+from itertools import islice
+from typing import TypeVar, Any, Tuple, List, Set, Deque, Iterator, Optional
+
+from cocotb.log import SimLog # type: ignore
+from cocotb.handle import SimHandleBase # type: ignore
+from cocotb.triggers import ReadWrite, RisingEdge # type: ignore
+
+from cocotb_TileLink.TileLink_common.TileLink_types import *
+from cocotb_TileLink.TileLink_common.Trace import TileLinkULTraceRecord, read_trace
+from cocotb_TileLink.TileLink_common.Interfaces import SimInterface, MasterInterfaceUL, MasterUL, SlaveInterfaceUL
+from cocotb_TileLink.TileLink_common.MonitorInterfaces import MonitorableInterface, TLMonitor
+
+T = TypeVar('T')
+
+class SimTraceReplayMasterUL(MasterUL, MasterInterfaceUL, SimInterface, MonitorableInterface):
+    """Replays requests from a trace written by TileLinkULTraceRecorder.
+
+    Requests are sent in trace order, each once its source is free. With
+    cycle_accurate set a request is also held until its recorded cycle,
+    counted from the first cycle out of reset, otherwise requests are sent as
+    fast as the slave accepts them. The trace is read from disk read_ahead
+    records at a time, so memory use does not depend on the trace length.
+    Requests whose mask or data do not fit bus_width, as recorded on a wider
+    bus, fail an assertion when they come up.
+    """
+    def __init__(self, path: str, bus_width: int = 32, cycle_accurate: bool = True, read_ahead: int = 1024,
+                 name: str = "SimTraceReplayMasterUL") -> None:
+        MonitorableInterface.__init__(self)
+        MasterInterfaceUL.__init__(self)
+        SimInterface.__init__(self)
+
+        assert read_ahead > 0, "Read-ahead must be a positive number"
+        self.name = name
+        self.log: SimLog = SimLog(f"cocotb.{name}")
+        self.max_slave_count = 1
+        self.slaves: List[SlaveInterfaceUL] = []
+        self.bus_width = bus_width
+        self.mask_limit = 1 << (bus_width//8)
+        self.data_limit = 1 << bus_width
+        self.cycle_accurate = cycle_accurate
+        self.read_ahead = read_ahead
+
+        self.trace: Iterator[TileLinkULTraceRecord] = read_trace(path)
+        self.pending: Deque[TileLinkULTraceRecord] = deque()
+        self.trace_exhausted: bool = False
+        self.in_flight: Set[int] = set()
+        self.cycle: int = 0
+
+        self.a_record: Optional[TileLinkULTraceRecord] = None
+        self.a_packet: TileLinkAPacket = IDLE_A_PACKET
+        self.a_valid: bool = False
+        self.was_a_handshake: bool = False
+
+        self.d_packet: TileLinkDPacket = TileLinkDPacket()
+        self.d_ready: bool = False
+        self.was_d_handshake: bool = False
+
+        self.issued: int = 0
+        self.completed: int = 0
+        self.errors: int = 0
+        self.max_slip: int = 0
+
+    def register_slave(self, slave: SlaveInterfaceUL, bus_name: str = "") -> None:
+        if len(self.slaves) + 1 > self.max_slave_count:
+            raise Exception("Too many slaves")
+        self.slaves.append(slave)
+
+    def get_master_interface(self, bus_name: str = "", **kwargs: Any) -> MasterInterfaceUL:
+        return self
+
+    def register_clock(self: T, clock: SimHandleBase) -> T:
+        self.clock = clock
+        return self
+
+    def register_reset(self: T, reset: SimHandleBase, inverted: bool = False) -> T:
+        self.reset = reset
+        self.inverted = inverted
+        return self
+
+    def finish(self) -> None:
+        self.sim_finish_event.set()
+
+    async def sim_finished(self) -> None:
+        await self.sim_finish_event.wait()
+        return
+
+    async def get_A_packet_and_valid(self) -> Tuple[TileLinkAPacket, bool]:
+        await self.a_packet_and_valid_event.wait()
+        return self.a_packet, self.a_valid
+
+    async def get_D_ready(self) -> bool:
+        await self.d_ready_event.wait()
+        return self.d_ready
+
+    def is_reset(self) -> bool:
+        if not self.reset.value.is_resolvable:
+            return True
+        return bool(self.reset.value ^ self.inverted)
+
+    async def get_status(self) -> TLMonitor:
+        await self.all_done_event.wait()
+        self.all_done_event.clear()
+        ret = self.status
+        ret.a_handshake = self.was_a_handshake
+        ret.a_packet = self.a_packet
+        ret.d_handshake = self.was_d_handshake
+        ret.d_packet = self.d_packet
+        return ret
+
+    def _done(self) -> bool:
+        return self.trace_exhausted and not self.pending and not self.in_flight
+
+    def _read_ahead(self) -> None:
+        self.pending.extend(islice(self.trace, self.read_ahead))
+        if not self.pending:
+            self.trace_exhausted = True
+
+    def _A_packet_prep(self) -> None:
+        if not self.pending and not self.trace_exhausted:
+            self._read_ahead()
+        self.a_valid = False
+        if not self.pending:
+            self.a_record = None
+            self.a_packet = IDLE_A_PACKET
+            return
+        record = self.pending[0]
+        if record is not self.a_record:
+            assert record.mask < self.mask_limit and record.data < self.data_limit, \
+                f"Request {record} does not fit a {self.bus_width}-bit bus"
+            self.a_record = record
+            self.a_packet = TileLinkAPacket(
+                        a_opcode=record.opcode, a_param=record.param, a_size=record.size,
+                        a_source=record.source, a_address=record.address,
+                        a_mask=record.mask, a_data=record.data)
+        if record.source in self.in_flight:
+            return
+        self.a_valid = not self.cycle_accurate or record.cycle <= self.cycle
+
+    def _A_packet_process(self, a_ready: bool) -> None:
+        self.was_a_handshake = False
+        if self.a_valid and a_ready:
+            self.was_a_handshake = True
+            record = self.pending.popleft()
+            self.in_flight.add(record.source)
+            self.issued += 1
+            self.max_slip = max(self.max_slip, self.cycle - record.cycle)
+
+    def _D_packet_process(self, d_packet: TileLinkDPacket, d_valid: bool) -> None:
+        self.was_d_handshake = False
+        self.d_ready = True
+        if d_valid:
+            self.was_d_handshake = True
+            self.d_packet = d_packet
+            self.completed += 1
+            if d_packet.d_error:
+                self.errors += 1
+                self.log.warning(f"Received error response for source {int(d_packet.d_source)}")
+
+    async def do_reset(self) -> None:
+        self.was_a_handshake = False
+        self.a_valid = False
+        self.a_record = None
+        self.a_packet = IDLE_A_PACKET
+        self.a_packet_and_valid_event.set()
+
+        self.was_d_handshake = False
+        self.d_ready = False
+        self.d_ready_event.set()
+
+        self.in_flight.clear()
+
+    async def process(self) -> None:
+        ce = RisingEdge(self.clock)
+        rw = ReadWrite()
+        while not self._done():
+            self.a_packet_and_valid_event.clear()
+            self.d_ready_event.clear()
+
+            await rw
+            if self.is_reset():
+                await self.do_reset()
+            else:
+                self._A_packet_prep()
+                self.a_packet_and_valid_event.set()
+
+                d_packet, d_valid = await self.slaves[0].get_D_packet_and_valid()
+                self._D_packet_process(d_packet, d_valid)
+                self.d_ready_event.set()
+
+                a_ready = await self.slaves[0].get_A_ready()
+                self._A_packet_process(a_ready)
+                if self.was_d_handshake:
+                    self.in_flight.discard(int(d_packet.d_source))
+                self.cycle += 1
+
+            self.all_done_event.set()
+            await ce
+
+        self.log.info(f"Replayed {self.issued} requests, {self.errors} errors,"
+                      f" largest delay behind the trace: {self.max_slip} cycles")
+        self.sim_finish_event.set()
+        while True:
+            await self.do_reset()
+            await ce
@@ -1,28 +1,65 @@
 # Copyright (c) 2022, Antmicro
 # SPDX-License-Identifier: Apache-2.0
 
-from random import randint
-from typing import Optional, TypeVar, Any, Tuple, List
+import random
+from typing import Optional, TypeVar, Any, Tuple, List, Dict
 
+import numpy as np
+
+from cocotb.log import SimLog # type: ignore
 from cocotb.handle import SimHandleBase # type: ignore
 from cocotb.triggers import ReadWrite, RisingEdge, Event # type: ignore
 
 from cocotb_TileLink.TileLink_common.TileLink_types import *
-from cocotb_TileLink.TileLink_common.Interfaces import SimInterface, MasterInterfaceUL, MasterUL, SlaveInterfaceUL
+from cocotb_TileLink.TileLink_common.BusOps import get_bus_ops
+from cocotb_TileLink.TileLink_common.BatchStream import TileLinkULBatchStream
+from cocotb_TileLink.TileLink_common.SourcePool import TileLinkULSourcePool
+from cocotb_TileLink.TileLink_common.TrafficProfile import TileLinkULTrafficProfile
+from cocotb_TileLink.TileLink_common.CoverageModel import TileLinkULCoverageModel, TileLinkULMaskPattern
+from cocotb_TileLink.TileLink_common.Interfaces import SimInterface, MasterInterfaceUL, MasterUL, SlaveInterfaceUL, ThroughputInterface
 from cocotb_TileLink.TileLink_common.MonitorInterfaces import MonitorableInterface, TLMonitor
 
 T = TypeVar('T')
 
-class SimTrafficGeneratorUL(MasterUL, MasterInterfaceUL, SimInterface, MonitorableInterface):
-    def __init__(self, num_of_transactions: int = 100, bus_width: int = 32, addr_width: int = 32, name: str = "") -> None:
+def generate_traffic_controls(rng: np.random.Generator, count: int, max_wait: int = 20) -> Dict[str, np.ndarray]:
+    """Per-cycle decisions of the traffic generators: replace the pending
+    packet (25%), drive a_valid and the delay before the next d_ready."""
+    return {
+        "reroll": rng.random(count) < 0.25,
+        "valid": rng.integers(0, 2, count, dtype=np.uint8).astype(bool),
+        "wait": rng.integers(0, max_wait, count, endpoint=True),
+    }
+
+def aligned_read_masks(validator: TileLinkULValidator, size: np.ndarray, address: np.ndarray) -> np.ndarray:
+    """Masks of aligned reads of the given sizes and addresses, sizes above
+    the bus width are clamped to it."""
+    full_mask = validator.full_mask
+    # Only aligned entries are looked up, the rest may not fit in uint64
+    read_masks = np.array([[mask & full_mask for mask in masks] for masks in validator.read_masks],
+                          dtype=np.uint64)
+    return read_masks[np.minimum(size, validator.log_width),
+                      (address & np.uint64(validator.offset_mask)).astype(np.intp)]
+
+# Sends random legal requests pre-generated in batches, shaped by a traffic
+# profile, the options are described in the README
+class SimTrafficGeneratorUL(MasterUL, MasterInterfaceUL, SimInterface, MonitorableInterface, ThroughputInterface):
+    def __init__(self, num_of_transactions: int = 100, bus_width: int = 32, addr_width: int = 32, name: str = "",
+                 seed: Optional[int] = None, batch_size: int = 4096, cache_dir: Optional[str] = None,
+                 profile: Optional[TileLinkULTrafficProfile] = None, saturate: bool = False,
+                 source_width: int = 4, max_outstanding: Optional[int] = None,
+                 coverage: Optional[TileLinkULCoverageModel] = None, coverage_bias: float = 0.5) -> None:
         MonitorableInterface.__init__(self)
         MasterInterfaceUL.__init__(self)
         SimInterface.__init__(self)
+        ThroughputInterface.__init__(self)
 
         self.name = name
+        self.log: SimLog = SimLog(f"cocotb.{name or type(self).__name__}")
         self.max_slave_count = 1
         self.slaves: List[SlaveInterfaceUL] = []
         self.bus_width = bus_width
+        self.bus_ops = get_bus_ops(bus_width, addr_width)
+        self.validator = self.bus_ops.validator
         self.addr_width = addr_width
 
         self.num_of_transactions_send = num_of_transactions
@@ -38,6 +75,28 @@ class SimTrafficGeneratorUL(MasterUL, MasterInterfaceUL, SimInterface, Monitorab
         self.was_d_handshake: bool = False
 
         self.wait_for: int = 0
+        self.backlog: int = 0
+        self.saturate = saturate
+        self.sources = TileLinkULSourcePool(source_width, max_outstanding)
+
+        assert 0 <= coverage_bias <= 1, "Coverage bias must be between 0 and 1"
+        self.coverage = coverage
+        self.coverage_bias = coverage_bias
+        self.coverage_rng: np.random.Generator = np.random.default_rng(random.getrandbits(64) if seed is None else seed)
+
+        self.profile = profile or TileLinkULTrafficProfile()
+        address_map_end = 0 if self.profile.address_map is None else self.profile.address_map.end()
+        assert max(self.profile.addresses.end(), address_map_end) <= self.bus_ops.address_mask + 1, \
+            f"Address regions do not fit in {addr_width} bit addresses"
+        # Aligned down to its size, every request must stay within its region
+        largest = self.bus_ops.bus_byte_width if coverage is not None \
+            else 2**self.profile.operations.max_size(self.validator.log_width)
+        self.profile.addresses.check_alignment(largest)
+        stream_name = f"{type(self).__name__}-{bus_width}-{addr_width}-{self.profile.key()}"
+        self.packets = TileLinkULBatchStream(f"{stream_name}-packets", self._generate_packets,
+                                             seed, batch_size, cache_dir)
+        self.controls = TileLinkULBatchStream(f"{stream_name}-controls", self._generate_controls,
+                                              seed, batch_size, cache_dir)
 
     def register_slave(self, slave: SlaveInterfaceUL, bus_name: str = "") -> None:
         if len(self.slaves) + 1 > self.max_slave_count:
@@ -79,66 +138,127 @@ class SimTrafficGeneratorUL(MasterUL, MasterInterfaceUL, SimInterface, Monitorab
     async def get_status(self) -> TLMonitor:
         await self.all_done_event.wait()
         self.all_done_event.clear()
-        ret = TLMonitor();
+        ret = self.status
         ret.a_handshake = self.was_a_handshake
         ret.a_packet = self.a_packet
         ret.d_handshake = self.was_d_handshake
         ret.d_packet = self.d_packet
         return ret
 
-    def _get_random_A_packet(self) -> TileLinkAPacket:
-        op = randint(0,2) # 0 - read, 1 - write full, 2 read partail
-        bus_byte_width = self.bus_width//8
-        log_bus_byte_width = bus_byte_width.bit_length() - 1
-
-        size = 0
-        mask = 0
-        data = randint(0, 2**self.bus_width - 1)
-        address = randint(0, 2**self.addr_width - 1)
-        source = randint(0, 15)
-        if op == 1:
-            size = log_bus_byte_width
-            address = address & ~(2**size - 1)
-            mask = 2**bus_byte_width - 1
-            opcode = TileLinkULAOP.PutFullData
+    def _generate_controls(self, rng: np.random.Generator, count: int) -> Dict[str, np.ndarray]:
+        if self.profile.arrivals is None:
+            return generate_traffic_controls(rng, count, self.profile.max_response_delay)
+        return {
+            "arrivals": self.profile.arrivals.generate(rng, count),
+            "wait": rng.integers(0, self.profile.max_response_delay, count, endpoint=True),
+        }
+
+    def _generate_packets(self, rng: np.random.Generator, count: int) -> Dict[str, np.ndarray]:
+        opcode, size = self.profile.operations.generate(rng, count, self.validator.log_width)
+        address = self.profile.addresses.generate(rng, count, self.bus_ops.bus_byte_width,
+                                                  self.bus_ops.address_mask)
+        address &= ~((np.uint64(1) << size.astype(np.uint64)) - np.uint64(1))
+        if self.profile.address_map is not None:
+            opcode = self._apply_permissions(opcode, address)
+        full_mask = self.validator.full_mask
+        mask = np.where(opcode == TileLinkULAOP.PutPartialData,
+                        rng.integers(0, full_mask, count, dtype=np.uint64, endpoint=True), full_mask)
+        mask &= aligned_read_masks(self.validator, size, address)
+        return {
+            "opcode": opcode,
+            "size": size,
+            "address": address,
+            "mask": mask,
+            "data": rng.integers(0, 256, (count, self.bus_width//8), dtype=np.uint8),
+        }
+
+    def _apply_permissions(self, opcode: np.ndarray, address: np.ndarray) -> np.ndarray:
+        address_map = self.profile.address_map
+        region = address_map.find(address)
+        mapped = region >= 0
+        is_get = opcode == TileLinkULAOP.Get
+        read_only = mapped & ~address_map.writable[region]
+        write_only = mapped & ~address_map.readable[region]
+        opcode = np.where(read_only & ~is_get, np.uint8(TileLinkULAOP.Get), opcode)
+        return np.where(write_only & is_get, np.uint8(TileLinkULAOP.PutFullData), opcode).astype(np.uint8)
+
+    def _target_hole(self, opcode: int, address: int) -> Optional[Tuple[int, int, int]]:
+        assert self.coverage is not None
+        holes = self.coverage.stimulus_holes(A_OPCODES[opcode])
+        if not len(holes):
+            return None
+        rng = self.coverage_rng
+        size, alignment, pattern = (int(field) for field in holes[rng.integers(len(holes))])
+        log_width = self.validator.log_width
+        offset = 0
+        if alignment < log_width:
+            offset = (2 * int(rng.integers(2**(log_width - alignment - 1))) + 1) << alignment
+        lanes = 2**size
+        if pattern == TileLinkULMaskPattern.Full:
+            mask = 2**lanes - 1
+        elif pattern == TileLinkULMaskPattern.Empty:
+            mask = 0
+        elif pattern == TileLinkULMaskPattern.Contiguous:
+            length = int(rng.integers(1, lanes))
+            mask = (2**length - 1) << int(rng.integers(0, lanes - length, endpoint=True))
         else:
-            size = randint(0, log_bus_byte_width)
-            address = address & ~(2**size - 1)
-            mask = (2**bus_byte_width - 1) if op == 0 else randint(0, 2**bus_byte_width - 1)
-            mask &= (2**(2**size) - 1) << (address & (bus_byte_width - 1))
-            opcode = TileLinkULAOP.Get if op == 0 else TileLinkULAOP.PutPartialData
-
+            mask = 0
+            while not mask & (mask + 1):
+                mask = int(rng.integers(1, 2**lanes))
+                mask //= mask & -mask
+            mask <<= int(rng.integers(0, lanes - mask.bit_length(), endpoint=True))
+        return size, (address & ~self.validator.offset_mask) | offset, mask << offset
+
+    def _get_random_A_packet(self, source: int) -> TileLinkAPacket:
+        opcode, size, address, mask, data = self.packets.next()
+        if self.coverage is not None and self.coverage.holes and self.coverage_rng.random() < self.coverage_bias:
+            target = self._target_hole(opcode, address)
+            if target is not None:
+                size, address, mask = target
         return TileLinkAPacket(
-                    a_opcode=opcode, a_size=size,
+                    a_opcode=A_OPCODES[opcode], a_size=size,
                     a_source=source, a_address=address,
                     a_mask=mask, a_data=data)
 
-    def _A_packet_prep(self) -> None:
-        if not self.sending_a or randint(0,99) in range(75, 100):
-            self.a_packet = self._get_random_A_packet()
+    def _A_packet_prep(self, reroll: bool, valid: bool) -> None:
+        self.a_valid = False
+        if self.num_of_transactions_send <= 0:
+            return
+        if not self.sending_a:
+            source = self.sources.acquire()
+            if source is None:
+                return
+            self.a_packet = self._get_random_A_packet(source)
             self.sending_a = True
-        if self.sending_a:
-            self.a_valid = bool(randint(0,1)) if self.num_of_transactions_send > 0 else False
+        elif reroll:
+            self.a_packet = self._get_random_A_packet(self.a_packet.a_source)
+        self.a_valid = valid
 
     def _A_packet_process(self, a_ready: bool) -> None:
         self.was_a_handshake = False
         if self.a_valid and a_ready:
             self.was_a_handshake = True
+            self.beats += 1
+            self.bytes += 2**self.a_packet.a_size
             self.num_of_transactions_send -= 1
             self.sending_a = False
+            if self.backlog:
+                self.backlog -= 1
 
     async def do_reset(self) -> None:
         self.sending_a = False
 
         self.was_a_handhake = False
         self.a_valid = False
-        self.a_packet = TileLinkAPacket()
+        self.a_packet = IDLE_A_PACKET
         self.a_packet_and_valid_event.set()
 
         self.was_d_handhake = False
         self.d_ready = False
         self.d_ready_event.set()
 
+        self.sources.reset()
+
     async def process(self) -> None:
         ce = RisingEdge(self.clock)
         rw = ReadWrite()
@@ -150,17 +270,27 @@ class SimTrafficGeneratorUL(MasterUL, MasterInterfaceUL, SimInterface, Monitorab
             if self.is_reset():
                 await self.do_reset()
             else:
-                self._A_packet_prep()
+                self.cycles += 1
+                if self.saturate:
+                    wait = 0
+                    self._A_packet_prep(False, True)
+                elif self.profile.arrivals is None:
+                    reroll, valid, wait = self.controls.next()
+                    self._A_packet_prep(reroll, valid)
+                else:
+                    arrivals, wait = self.controls.next()
+                    self.backlog += arrivals
+                    self._A_packet_prep(False, self.backlog > 0)
                 self.a_packet_and_valid_event.set()
 
                 d_packet, d_valid = await self.slaves[0].get_D_packet_and_valid()
 
                 self.was_d_handshake = False
-                self.d_ready = False
+                self.d_ready = self.saturate
                 if d_valid and self.wait_for <= 0:
                     self.d_ready = True
                     self.d_packet = d_packet
-                    self.wait_for = randint(0,20)
+                    self.wait_for = wait
                     self.num_of_transactions_recv -= 1
                     self.was_d_handshake = True
                 self.wait_for -= 1
@@ -169,9 +299,13 @@ class SimTrafficGeneratorUL(MasterUL, MasterInterfaceUL, SimInterface, Monitorab
                 a_ready = await self.slaves[0].get_A_ready()
                 self._A_packet_process(a_ready)
 
+                if self.was_d_handshake:
+                    self.sources.release(int(d_packet.d_source))
+
             self.all_done_event.set()
             await ce
 
+        self.report_throughput()
         self.a_valid = False
         self.sim_finish_event.set()
         while True:
@@ -0,0 +1,165 @@
+# Copyright (c) 2022, Antmicro
+# SPDX-License-Identifier: Apache-2.0
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from cocotb.handle import SimHandleBase # type: ignore
+from cocotb.triggers import RisingEdge, ReadOnly # type: ignore
+
+from cocotb_bus.bus import Bus # type: ignore
+
+from cocotb_TileLink.TileLink_common.TileLink_types import *
+from cocotb_TileLink.TileLink_common.MonitorInterfaces import TLMonitor
+from cocotb_TileLink.monitors.TileLinkULMonitor import TileLinkULMonitor
+
+
+class TileLinkULPackedBus():
+    """TL-UL port carried by a pair of packed structs.
+
+    Fields are listed MSB first, the same way they are declared in the
+    SystemVerilog typedef. Fields not used by TL-UL (e.g. a_user) are skipped.
+    """
+    h2d_signals = ["a_valid", "a_opcode", "a_param", "a_size", "a_source",
+                   "a_address", "a_mask", "a_data", "d_ready"]
+    d2h_signals = ["d_valid", "d_opcode", "d_param", "d_size", "d_source",
+                   "d_sink", "d_data", "d_error", "a_ready"]
+
+    def __init__(self, h2d: SimHandleBase, d2h: SimHandleBase,
+                 h2d_fields: List[Tuple[str, int]], d2h_fields: List[Tuple[str, int]]):
+        self.h2d = h2d
+        self.d2h = d2h
+        self.h2d_layout = TileLinkULPackedBus._get_layout(h2d_fields, self.h2d_signals)
+        self.d2h_layout = TileLinkULPackedBus._get_layout(d2h_fields, self.d2h_signals)
+        self.h2d_value: int = 0
+        self.d2h_value: int = 0
+
+    @staticmethod
+    def _get_layout(fields: List[Tuple[str, int]], required: List[str]) -> Dict[str, Tuple[int, int]]:
+        layout: Dict[str, Tuple[int, int]] = {}
+        shift = sum(width for _, width in fields)
+        for name, width in fields:
+            shift -= width
+            layout[name] = (shift, 2**width - 1)
+        for name in required:
+            assert name in layout, f"Packed struct is missing field: {name}"
+        return layout
+
+    def _h2d(self, name: str) -> int:
+        shift, mask = self.h2d_layout[name]
+        return (self.h2d_value >> shift) & mask
+
+    def _d2h(self, name: str) -> int:
+        shift, mask = self.d2h_layout[name]
+        return (self.d2h_value >> shift) & mask
+
+    def sample(self) -> Tuple[bool, bool]:
+        h2d = self.h2d.value
+        d2h = self.d2h.value
+        self.h2d_value = int(h2d) if h2d.is_resolvable else 0
+        self.d2h_value = int(d2h) if d2h.is_resolvable else 0
+        return bool(self._h2d("a_valid") and self._d2h("a_ready")), \
+               bool(self._d2h("d_valid") and self._h2d("d_ready"))
+
+    def a_packet(self) -> TileLinkAPacket:
+        return TileLinkAPacket(
+            a_opcode=decode_field(A_OPCODES, self._h2d("a_opcode"), "a_opcode"),
+            a_param=self._h2d("a_param"),
+            a_size=self._h2d("a_size"),
+            a_source=self._h2d("a_source"),
+            a_address=self._h2d("a_address"),
+            a_mask=self._h2d("a_mask"),
+            a_data=self._h2d("a_data")
+        )
+
+    def d_packet(self) -> TileLinkDPacket:
+        return TileLinkDPacket(
+            d_opcode=decode_field(D_OPCODES, self._d2h("d_opcode"), "d_opcode"),
+            d_param=self._d2h("d_param"),
+            d_size=self._d2h("d_size"),
+            d_source=self._d2h("d_source"),
+            d_sink=self._d2h("d_sink"),
+            d_error=decode_field(RESPONSES, self._d2h("d_error"), "d_error"),
+            d_data=self._d2h("d_data")
+        )
+
+
+class TileLinkULSignalBus():
+    """TL-UL port carried by separate signals, accessed through a cocotb_bus Bus."""
+    def __init__(self, bus: Bus):
+        self.bus = bus
+
+    @staticmethod
+    def _resolve(signal: SimHandleBase) -> int:
+        value = signal.value
+        return int(value) if value.is_resolvable else 0
+
+    def sample(self) -> Tuple[bool, bool]:
+        bus = self.bus
+        a_handshake = bool(self._resolve(bus.a_valid) and self._resolve(bus.a_ready))
+        d_handshake = bool(self._resolve(bus.d_valid) and self._resolve(bus.d_ready))
+        return a_handshake, d_handshake
+
+    def a_packet(self) -> TileLinkAPacket:
+        bus = self.bus
+        return TileLinkAPacket(
+            a_opcode=decode_field(A_OPCODES, int(bus.a_opcode.value), "a_opcode"),
+            a_param=int(bus.a_param.value),
+            a_size=int(bus.a_size.value),
+            a_source=int(bus.a_source.value),
+            a_address=int(bus.a_address.value),
+            a_mask=int(bus.a_mask.value),
+            a_data=int(bus.a_data.value)
+        )
+
+    def d_packet(self) -> TileLinkDPacket:
+        bus = self.bus
+        return TileLinkDPacket(
+            d_opcode=decode_field(D_OPCODES, int(bus.d_opcode.value), "d_opcode"),
+            d_param=int(bus.d_param.value),
+            d_size=int(bus.d_size.value),
+            d_source=int(bus.d_source.value),
+            d_sink=int(bus.d_sink.value),
+            d_error=decode_field(RESPONSES, int(bus.d_error.value), "d_error"),
+            d_data=int(bus.d_data.value)
+        )
+
+
+class TileLinkULBusMonitor(TileLinkULMonitor):
+    """Passive monitor sampling TL-UL signals directly.
+
+    The bus is sampled once per cycle in the ReadOnly phase and payloads are
+    decoded only on handshakes, so it works for any port, including the ones
+    driven entirely by RTL, without any MonitorableInterface.
+    """
+    _signals = [
+        "a_valid", "a_ready", "a_opcode", "a_param", "a_size", "a_source", "a_address", "a_mask", "a_data",
+        "d_valid", "d_ready", "d_opcode", "d_param", "d_size", "d_source", "d_sink", "d_data", "d_error"]
+
+    def __init__(self, entity: Optional[SimHandleBase] = None, bus_name: str = "",
+                 name: str = "TLULBusMonitor", packed_bus: Optional[TileLinkULPackedBus] = None,
+                 **kwargs: Any):
+        TileLinkULMonitor.__init__(self, name)
+        self.bus: Any = packed_bus
+        if packed_bus is None:
+            assert entity is not None, "Either entity or packed_bus has to be provided"
+            self.bus = TileLinkULSignalBus(Bus(entity, bus_name, self._signals, **kwargs))
+
+    async def _monitor(self) -> None:
+        ce = RisingEdge(self.clock)
+        ro = ReadOnly()
+        status = TLMonitor()
+        while True:
+            await ro
+            if not self.is_reset():
+                a_handshake, d_handshake = self.bus.sample()
+                if a_handshake or d_handshake:
+                    status.a_handshake = a_handshake
+                    status.a_packet = self.bus.a_packet() if a_handshake else None
+                    status.d_handshake = d_handshake
+                    if d_handshake:
+                        status.d_packet = self.bus.d_packet()
+                    self._process_status(status)
+            elif self.waiting_for_resp or self.deadlines:
+                self._drop_in_flight()
+            self._next_cycle()
+            await ce
@@ -0,0 +1,53 @@
+# Copyright (c) 2022, Antmicro
+# SPDX-License-Identifier: Apache-2.0
+
+from bisect import bisect_right
+from typing import Iterable, List, Optional, Tuple
+
+from cocotb_TileLink.TileLink_common.TileLink_types import TileLinkAPacket, TileLinkDPacket, TileLinkULAOP
+
+class TileLinkULFilter():
+    """Selects the transactions a monitor reports.
+
+    Address ranges are given as (base, size) pairs. Criteria that are not set
+    match every transaction. Out of the transactions that match all criteria
+    only every sample_every-th one is kept. errors_only is applied to the
+    response, so it limits the logged transactions while listeners still get
+    every transaction whose request matched.
+    """
+    def __init__(self, address_ranges: Optional[Iterable[Tuple[int, int]]] = None,
+                 opcodes: Optional[Iterable[TileLinkULAOP]] = None,
+                 sources: Optional[Iterable[int]] = None,
+                 errors_only: bool = False, sample_every: int = 1):
+        assert sample_every >= 1, "sample_every must be a positive number"
+        self.range_bases: Optional[List[int]] = None
+        self.range_ends: List[int] = []
+        if address_ranges is not None:
+            ranges = sorted((base, base + size) for base, size in address_ranges)
+            for (_, end), (base, _) in zip(ranges, ranges[1:]):
+                assert end <= base, "Address ranges must not overlap"
+            self.range_bases = [base for base, _ in ranges]
+            self.range_ends = [end for _, end in ranges]
+        self.opcodes = None if opcodes is None else frozenset(int(op) for op in opcodes)
+        self.sources = None if sources is None else frozenset(sources)
+        self.errors_only = errors_only
+        self.sample_every = sample_every
+        self.matched: int = 0
+
+    def _match_address(self, address: int) -> bool:
+        assert self.range_bases is not None
+        i = bisect_right(self.range_bases, address) - 1
+        return i >= 0 and address < self.range_ends[i]
+
+    def match_cmd(self, packet: TileLinkAPacket) -> bool:
+        if self.opcodes is not None and int(packet.a_opcode) not in self.opcodes:
+            return False
+        if self.sources is not None and int(packet.a_source) not in self.sources:
+            return False
+        if self.range_bases is not None and not self._match_address(int(packet.a_address)):
+            return False
+        self.matched += 1
+        return self.matched % self.sample_every == 0
+
+    def match_rsp(self, packet: TileLinkDPacket) -> bool:
+        return not self.errors_only or bool(packet.d_error)
@@ -1,27 +1,54 @@
 # Copyright (c) 2022, Antmicro
 # SPDX-License-Identifier: Apache-2.0
 
-from typing import Any, Set, TypeVar, Dict
+import heapq
+from typing import Any, Set, TypeVar, Dict, Tuple, Optional, List
 
 from cocotb.handle import SimHandleBase # type: ignore
 from cocotb.triggers import RisingEdge, ReadOnly # type: ignore
 from cocotb.log import SimLog # type: ignore
 
+from cocotb_TileLink.TileLink_common.TileLink_types import TileLinkAPacket, TileLinkDPacket, TileLinkULAOP, TileLinkULTimeout, A_OPCODES
 from cocotb_TileLink.TileLink_common.Interfaces import SimInterface, ProcessInterface
-from cocotb_TileLink.TileLink_common.MonitorInterfaces import MonitorInterface, MonitorableInterface, Packet
+from cocotb_TileLink.TileLink_common.FlightRecorder import TileLinkULFlightRecorder
+from cocotb_TileLink.TileLink_common.MonitorInterfaces import MonitorInterface, MonitorableInterface, Packet, TLMonitor, TransactionListener
+from cocotb_TileLink.monitors.TileLinkULFilter import TileLinkULFilter
 
 
 T = TypeVar('T')
 
 class TileLinkULMonitor(MonitorInterface, SimInterface, ProcessInterface):
     def __init__(self, name: str ="TLULMonitor"):
+        self.name = name
         self.log: SimLog = SimLog(f"cocotb.{name}")
-        self.waiting_for_resp: Dict[int, Packet] = {}
+        self.waiting_for_resp: Dict[int, Tuple[TileLinkAPacket, int, bool]] = {}
+        self.filter: Optional[TileLinkULFilter] = None
+        self.cycle: int = 0
+        self.latency_budget: Dict[int, int] = {}
+        self.deadlines: List[Tuple[int, int, int]] = []
+        self.listeners: List[TransactionListener] = []
+        self.flight_recorder: Optional[TileLinkULFlightRecorder] = None
 
     def register_device(self: T, device: MonitorableInterface) -> T:
         self.device = device
         return self
 
+    def register_filter(self: T, filter: TileLinkULFilter) -> T:
+        self.filter = filter
+        return self
+
+    def register_listener(self: T, listener: TransactionListener) -> T:
+        self.listeners.append(listener)
+        return self
+
+    def register_flight_recorder(self: T, recorder: TileLinkULFlightRecorder) -> T:
+        self.flight_recorder = recorder
+        return self
+
+    def register_latency_budget(self: T, budget: Dict[TileLinkULAOP, int]) -> T:
+        self.latency_budget = {int(opcode): cycles for opcode, cycles in budget.items()}
+        return self
+
     def register_clock(self: T, clock: SimHandleBase) -> T:
         self.clock = clock
         return self
@@ -32,34 +59,96 @@ class TileLinkULMonitor(MonitorInterface, SimInterface, ProcessInterface):
         return self
 
     def is_reset(self) -> bool:
+        if not self.reset.value.is_resolvable:
+            return True
         return bool(self.reset.value ^ self.inverted)
 
-    async def process(self) -> None:
+    def _process_status(self, status: TLMonitor) -> None:
+        if self.flight_recorder is not None:
+            if status.a_handshake:
+                assert status.a_packet is not None
+                self.flight_recorder.record_a(self.name, self.cycle, status.a_packet)
+            if status.d_handshake:
+                self.flight_recorder.record_d(self.name, self.cycle, status.d_packet)
+        if status.a_handshake:
+            a_packet = status.a_packet
+            assert a_packet is not None
+            source = int(a_packet.a_source)
+            assert source not in self.waiting_for_resp or \
+                (status.d_handshake and status.d_packet.d_source == source), \
+                f"Source {source} already used for other transaction\n"
+            if source in self.waiting_for_resp:
+                self._complete(status.d_packet)
+                status.d_handshake = False
+            traced = self.filter is None or self.filter.match_cmd(a_packet)
+            self.waiting_for_resp[source] = (a_packet, self.cycle, traced)
+            if traced:
+                for listener in self.listeners:
+                    listener.transaction_started(self.name, a_packet, self.cycle)
+            if int(a_packet.a_opcode) in self.latency_budget:
+                deadline = self.cycle + self.latency_budget[int(a_packet.a_opcode)]
+                heapq.heappush(self.deadlines, (deadline, self.cycle, source))
+        if status.d_handshake:
+            assert int(status.d_packet.d_source) in self.waiting_for_resp, \
+                f"D packet to no active source {int(status.d_packet.d_source)}\n"
+            self._complete(status.d_packet)
+
+    def _complete(self, d_packet: TileLinkDPacket) -> None:
+        a_packet, issue_cycle, traced = self.waiting_for_resp.pop(int(d_packet.d_source))
+        if not traced:
+            return
+        # Listeners saw the request start, so they always see it finish
+        for listener in self.listeners:
+            listener.transaction_finished(self.name, a_packet, d_packet, issue_cycle, self.cycle)
+        if self.filter is not None and not self.filter.match_rsp(d_packet):
+            return
+        packet = Packet()
+        packet.add_cmd(a_packet)
+        packet.add_rsp(d_packet)
+        packet._age = self.cycle - issue_cycle
+        self.log.info(packet)
+
+    def _check_deadlines(self) -> None:
+        while self.deadlines[0][0] <= self.cycle:
+            _, issue_cycle, source = heapq.heappop(self.deadlines)
+            entry = self.waiting_for_resp.get(source)
+            if entry is not None and entry[1] == issue_cycle:
+                a_packet = entry[0]
+                age = self.cycle - issue_cycle
+                opcode = A_OPCODES[int(a_packet.a_opcode)].name
+                raise TileLinkULTimeout(f"No response for {opcode} from source {source}"
+                                        f" at address 0x{a_packet.a_address:x} after {age} cycles",
+                                        a_packet, age)
+            if not self.deadlines:
+                return
+
+    def _drop_in_flight(self) -> None:
+        # Requests in flight are dropped by the reset
+        self.waiting_for_resp.clear()
+        self.deadlines.clear()
+
+    def _next_cycle(self) -> None:
+        if self.deadlines and self.deadlines[0][0] <= self.cycle:
+            self._check_deadlines()
+        self.cycle += 1
+
+    async def _monitor(self) -> None:
         ce = RisingEdge(self.clock)
         ro = ReadOnly()
         while True:
             await ro
             status = await self.device.get_status()
             if not self.is_reset():
-                if status.a_handshake:
-                    assert status.a_packet is not None
-                    assert int(status.a_packet.a_source) not in self.waiting_for_resp or \
-                        (status.d_handshake and status.d_packet.d_source == status.a_packet.a_source), \
-                        f"Source {status.a_packet.a_source} already used for other transaction\n"
-                    if int(status.a_packet.a_source) in self.waiting_for_resp:
-                        packet = self.waiting_for_resp.pop(int(status.a_packet.a_source))
-                        packet.add_rsp(status.d_packet)
-                        self.log.info(packet)
-                        status.d_handshake = False
-                    packet = Packet()
-                    packet.add_cmd(status.a_packet)
-                    self.waiting_for_resp[status.a_packet.a_source] = packet
-                if status.d_handshake:
-                    assert int(status.d_packet.d_source) in self.waiting_for_resp, \
-                        f"D packet to no active source {int(status.d_packet.d_source)}\n"
-                    packet = self.waiting_for_resp.pop(int(status.d_packet.d_source))
-                    packet.add_rsp(status.d_packet)
-                    self.log.info(packet)
-            for _, packet in self.waiting_for_resp.items():
-                packet.age()
+                self._process_status(status)
+            elif self.waiting_for_resp or self.deadlines:
+                self._drop_in_flight()
+            self._next_cycle()
             await ce
+
+    async def process(self) -> None:
+        try:
+            await self._monitor()
+        except Exception:
+            if self.flight_recorder is not None:
+                self.flight_recorder.dump_to_log()
+            raise
@@ -0,0 +1,162 @@
+# Copyright (c) 2022, Antmicro
+# SPDX-License-Identifier: Apache-2.0
+
+from typing import Any, List, Optional, TypeVar
+
+import numpy as np
+
+from cocotb.handle import SimHandleBase # type: ignore
+from cocotb.triggers import RisingEdge, ReadOnly # type: ignore
+from cocotb.log import SimLog # type: ignore
+
+from cocotb_bus.bus import Bus # type: ignore
+
+from cocotb_TileLink.TileLink_common.TileLink_types import TileLinkAPacket, TileLinkDPacket
+from cocotb_TileLink.TileLink_common.Interfaces import SimInterface, ProcessInterface
+from cocotb_TileLink.TileLink_common.FlightRecorder import TileLinkULFlightRecorder
+from cocotb_TileLink.TileLink_common.MonitorInterfaces import Packet, TransactionListener
+from cocotb_TileLink.monitors.TileLinkULBusMonitor import TileLinkULBusMonitor, TileLinkULSignalBus, TileLinkULPackedBus
+
+T = TypeVar('T')
+
+class TileLinkULMultiBusMonitor(SimInterface, ProcessInterface):
+    """Passive monitor supervising many TL-UL ports from a single coroutine.
+
+    Outstanding transactions of all ports are kept in shared arrays indexed
+    by (port, source), so a large topology costs one coroutine step per cycle
+    instead of one per monitored port.
+    """
+    def __init__(self, name: str = "TLULMultiBusMonitor", num_of_sources: int = 256):
+        self.log: SimLog = SimLog(f"cocotb.{name}")
+        self.num_of_sources = num_of_sources
+
+        self.buses: List[Any] = []
+        self.bus_names: List[str] = []
+
+        self.active: np.ndarray = np.zeros((0, num_of_sources), dtype=bool)
+        self.issue_cycle: np.ndarray = np.zeros((0, num_of_sources), dtype=np.int64)
+        self.a_packets: List[Optional[TileLinkAPacket]] = []
+
+        self.cycle: int = 0
+        self.listeners: List[TransactionListener] = []
+        self.flight_recorder: Optional[TileLinkULFlightRecorder] = None
+
+    def register_bus(self: T, entity: Optional[SimHandleBase] = None, bus_name: str = "",
+                     name: Optional[str] = None, packed_bus: Optional[TileLinkULPackedBus] = None,
+                     **kwargs: Any) -> T:
+        bus: Any = packed_bus
+        if packed_bus is None:
+            assert entity is not None, "Either entity or packed_bus has to be provided"
+            bus = TileLinkULSignalBus(Bus(entity, bus_name, TileLinkULBusMonitor._signals, **kwargs))
+        self.buses.append(bus)
+        self.bus_names.append(name if name is not None else bus_name)
+
+        self.active = np.vstack([self.active, np.zeros((1, self.num_of_sources), dtype=bool)])
+        self.issue_cycle = np.vstack([self.issue_cycle, np.zeros((1, self.num_of_sources), dtype=np.int64)])
+        self.a_packets.extend([None] * self.num_of_sources)
+        return self
+
+    def register_listener(self: T, listener: TransactionListener) -> T:
+        self.listeners.append(listener)
+        return self
+
+    def register_flight_recorder(self: T, recorder: TileLinkULFlightRecorder) -> T:
+        self.flight_recorder = recorder
+        return self
+
+    def register_clock(self: T, clock: SimHandleBase) -> T:
+        self.clock = clock
+        return self
+
+    def register_reset(self: T, reset: SimHandleBase, inverted: bool = False) -> T:
+        self.reset = reset
+        self.inverted = inverted
+        return self
+
+    def is_reset(self) -> bool:
+        if not self.reset.value.is_resolvable:
+            return True
+        return bool(self.reset.value ^ self.inverted)
+
+    def outstanding(self) -> np.ndarray:
+        return self.active.sum(axis=1)
+
+    def _complete(self, port: int, d_packet: TileLinkDPacket) -> None:
+        source = int(d_packet.d_source)
+        index = port * self.num_of_sources + source
+        a_packet = self.a_packets[index]
+        assert a_packet is not None
+        self.a_packets[index] = None
+        self.active[port, source] = False
+
+        issue_cycle = int(self.issue_cycle[port, source])
+        for listener in self.listeners:
+            listener.transaction_finished(self.bus_names[port], a_packet, d_packet, issue_cycle, self.cycle)
+
+        packet = Packet()
+        packet.add_cmd(a_packet)
+        packet.add_rsp(d_packet)
+        packet._age = self.cycle - issue_cycle
+        self.log.info("%s: %s", self.bus_names[port], packet)
+
+    def _process_port(self, port: int, a_handshake: bool, d_handshake: bool) -> None:
+        bus = self.buses[port]
+        d_done = False
+        if d_handshake:
+            d_packet = bus.d_packet()
+            d_source = int(d_packet.d_source)
+            if self.flight_recorder is not None:
+                self.flight_recorder.record_d(self.bus_names[port], self.cycle, d_packet)
+            assert d_source < self.num_of_sources, \
+                f"{self.bus_names[port]}: D source {d_source} out of monitored range\n"
+            if self.active[port, d_source]:
+                self._complete(port, d_packet)
+                d_done = True
+        if a_handshake:
+            a_packet = bus.a_packet()
+            a_source = int(a_packet.a_source)
+            if self.flight_recorder is not None:
+                self.flight_recorder.record_a(self.bus_names[port], self.cycle, a_packet)
+            assert a_source < self.num_of_sources, \
+                f"{self.bus_names[port]}: A source {a_source} out of monitored range\n"
+            assert not self.active[port, a_source], \
+                f"{self.bus_names[port]}: Source {a_source} already used for other transaction\n"
+            self.active[port, a_source] = True
+            self.issue_cycle[port, a_source] = self.cycle
+            self.a_packets[port * self.num_of_sources + a_source] = a_packet
+            for listener in self.listeners:
+                listener.transaction_started(self.bus_names[port], a_packet, self.cycle)
+        if d_handshake and not d_done:
+            assert self.active[port, d_source], \
+                f"{self.bus_names[port]}: D packet to no active source {d_source}\n"
+            self._complete(port, d_packet)
+
+    def _drop_in_flight(self) -> None:
+        # Requests in flight are dropped by the reset
+        self.active[...] = False
+        self.issue_cycle[...] = 0
+        self.a_packets = [None] * len(self.a_packets)
+
+    async def _monitor(self) -> None:
+        ce = RisingEdge(self.clock)
+        ro = ReadOnly()
+        buses = self.buses
+        while True:
+            await ro
+            if not self.is_reset():
+                for port, bus in enumerate(buses):
+                    a_handshake, d_handshake = bus.sample()
+                    if a_handshake or d_handshake:
+                        self._process_port(port, a_handshake, d_handshake)
+            elif self.active.any():
+                self._drop_in_flight()
+            self.cycle += 1
+            await ce
+
+    async def process(self) -> None:
+        try:
+            await self._monitor()
+        except Exception:
+            if self.flight_recorder is not None:
+                self.flight_recorder.dump_to_log()
+            raise
@@ -0,0 +1,69 @@
+# Copyright (c) 2022, Antmicro
+# SPDX-License-Identifier: Apache-2.0
+
+import json
+from typing import Any, Dict, Set, Tuple
+
+from cocotb_TileLink.TileLink_common.TileLink_types import TileLinkAPacket, TileLinkDPacket, A_OPCODES
+from cocotb_TileLink.TileLink_common.MonitorInterfaces import TransactionListener
+
+class TileLinkULTraceExporter(TransactionListener):
+    """Streams completed transactions to a Chrome trace-event JSON file.
+
+    Every bus is shown as a separate process and every source ID as a thread
+    of it, with one span from the A handshake to the D handshake. The file can
+    be opened in Perfetto or chrome://tracing, also while it is being written:
+    it is flushed every flush_every events and the viewers accept a trace
+    without the closing bracket written by close().
+    """
+    def __init__(self, path: str, cycle_period_us: float = 1.0, flush_every: int = 256):
+        assert flush_every > 0, "flush_every must be a positive number"
+        self.file = open(path, "w")
+        self.file.write("[\n")
+        self.cycle_period_us = cycle_period_us
+        self.pids: Dict[str, int] = {}
+        self.lanes: Set[Tuple[int, int]] = set()
+        self.first_event: bool = True
+        self.flush_every = flush_every
+        self.events: int = 0
+
+    def _write_event(self, event: Dict[str, Any]) -> None:
+        if not self.first_event:
+            self.file.write(",\n")
+        self.first_event = False
+        self.file.write(json.dumps(event, separators=(",", ":")))
+        self.events += 1
+        if self.events % self.flush_every == 0:
+            self.file.flush()
+
+    def _get_pid(self, bus_name: str) -> int:
+        if bus_name not in self.pids:
+            pid = len(self.pids) + 1
+            self.pids[bus_name] = pid
+            self._write_event({"name": "process_name", "ph": "M", "pid": pid,
+                               "args": {"name": bus_name}})
+        return self.pids[bus_name]
+
+    def _add_lane(self, pid: int, source: int) -> None:
+        if (pid, source) not in self.lanes:
+            self.lanes.add((pid, source))
+            self._write_event({"name": "thread_name", "ph": "M", "pid": pid, "tid": source,
+                               "args": {"name": f"source {source}"}})
+
+    def transaction_finished(self, bus_name: str, a_packet: TileLinkAPacket, d_packet: TileLinkDPacket,
+                             start_cycle: int, end_cycle: int) -> None:
+        pid = self._get_pid(bus_name)
+        source = int(a_packet.a_source)
+        self._add_lane(pid, source)
+        self._write_event({
+            "name": A_OPCODES[int(a_packet.a_opcode)].name, "cat": "TileLinkUL", "ph": "X",
+            "pid": pid, "tid": source,
+            "ts": start_cycle * self.cycle_period_us,
+            "dur": (end_cycle - start_cycle) * self.cycle_period_us,
+            "args": {"address": hex(a_packet.a_address), "size": 2**int(a_packet.a_size),
+                     "mask": hex(a_packet.a_mask), "error": int(d_packet.d_error)}
+        })
+
+    def close(self) -> None:
+        self.file.write("\n]\n")
+        self.file.close()
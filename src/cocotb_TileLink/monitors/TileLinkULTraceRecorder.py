@@ -0,0 +1,37 @@
+# Copyright (c) 2022, Antmicro
+# SPDX-License-Identifier: Apache-2.0
+
+from typing import IO, Optional
+
+from cocotb_TileLink.TileLink_common.TileLink_types import TileLinkAPacket, A_OPCODES
+from cocotb_TileLink.TileLink_common.MonitorInterfaces import TransactionListener
+from cocotb_TileLink.TileLink_common.Trace import TRACE_HEADER, TileLinkULTraceRecord, format_trace_record, open_trace
+
+class TileLinkULTraceRecorder(TransactionListener):
+    """Streams monitored requests to a trace file for SimTraceReplayMasterUL.
+
+    Cycles are stored relative to the first recorded request. A trace holds a
+    single bus, so with a multi-bus monitor bus_name selects the one recorded.
+    Only requests the monitor passes to its listeners are recorded, so with a
+    filter registered on the monitor the trace holds just the selected ones.
+    """
+    def __init__(self, path: str, bus_name: Optional[str] = None):
+        self.file: IO[str] = open_trace(path, "w")
+        self.file.write(TRACE_HEADER + "\n")
+        self.bus_name = bus_name
+        self.first_cycle: Optional[int] = None
+        self.records: int = 0
+
+    def transaction_started(self, bus_name: str, a_packet: TileLinkAPacket, cycle: int) -> None:
+        if self.bus_name is not None and bus_name != self.bus_name:
+            return
+        if self.first_cycle is None:
+            self.first_cycle = cycle
+        self.records += 1
+        self.file.write(format_trace_record(TileLinkULTraceRecord(
+            cycle - self.first_cycle, A_OPCODES[int(a_packet.a_opcode)], int(a_packet.a_param),
+            int(a_packet.a_size), int(a_packet.a_source), int(a_packet.a_address),
+            int(a_packet.a_mask), int(a_packet.a_data))))
+
+    def close(self) -> None:
+        self.file.close()
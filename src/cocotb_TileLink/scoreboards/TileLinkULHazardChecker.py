@@ -0,0 +1,75 @@
+# Copyright (c) 2022, Antmicro
+# SPDX-License-Identifier: Apache-2.0
+
+from bisect import bisect_left, insort
+from typing import Dict, List, Tuple
+
+from cocotb.log import SimLog # type: ignore
+
+from cocotb_TileLink.TileLink_common.TileLink_types import *
+from cocotb_TileLink.TileLink_common.MonitorInterfaces import TransactionListener
+
+class TileLinkULHazardChecker(TransactionListener):
+    """Reports overlapping in-flight accesses, which make results nondeterministic.
+
+    TL-UL does not order responses to different sources, so a read or write
+    overlapping an access still in flight may observe either order. In-flight
+    requests are kept sorted by start address, so looking up the ones
+    overlapping a new request costs O(log n) plus the number of overlaps.
+    Attach it to any MonitorableInterface through a monitor's listeners.
+    """
+    RAW = "RAW"
+    WAR = "WAR"
+    WAW = "WAW"
+
+    def __init__(self, name: str = "TLULHazardChecker", max_warnings: int = 100):
+        self.log: SimLog = SimLog(f"cocotb.{name}")
+        self.max_warnings = max_warnings
+
+        self.starts: List[Tuple[int, Tuple[str, int]]] = []
+        self.in_flight: Dict[Tuple[str, int], Tuple[int, int, bool]] = {}
+        self.max_length: int = 1
+
+        self.hazards: Dict[str, int] = {self.RAW: 0, self.WAR: 0, self.WAW: 0}
+        self.checked: int = 0
+        self.max_in_flight: int = 0
+
+    def _overlapping(self, start: int, end: int) -> List[Tuple[str, int]]:
+        first = bisect_left(self.starts, (start - self.max_length + 1,))
+        last = bisect_left(self.starts, (end,))
+        return [key for _, key in self.starts[first:last] if self.in_flight[key][1] > start]
+
+    def transaction_started(self, bus_name: str, a_packet: TileLinkAPacket, cycle: int) -> None:
+        key = (bus_name, int(a_packet.a_source))
+        start = int(a_packet.a_address)
+        length = 2**int(a_packet.a_size)
+        end = start + length
+        write = a_packet.a_opcode != TileLinkULAOP.Get
+        self.checked += 1
+
+        for other in self._overlapping(start, end):
+            _, _, other_write = self.in_flight[other]
+            if not (write or other_write):
+                continue
+            kind = (self.WAW if other_write else self.WAR) if write else self.RAW
+            self.hazards[kind] += 1
+            if sum(self.hazards.values()) <= self.max_warnings:
+                opcode = int(a_packet.a_opcode)
+                name = A_OPCODES[opcode].name if opcode in A_OPCODES else f"opcode {opcode}"
+                self.log.warning(f"{kind} hazard at cycle {cycle}: {name} from {key}"
+                                 f" at 0x{start:x}-0x{end - 1:x} overlaps in-flight access from {other}")
+
+        self.max_length = max(self.max_length, length)
+        self.in_flight[key] = (start, end, write)
+        insort(self.starts, (start, key))
+        self.max_in_flight = max(self.max_in_flight, len(self.in_flight))
+
+    def transaction_finished(self, bus_name: str, a_packet: TileLinkAPacket, d_packet: TileLinkDPacket,
+                             start_cycle: int, end_cycle: int) -> None:
+        key = (bus_name, int(a_packet.a_source))
+        start, _, _ = self.in_flight.pop(key)
+        del self.starts[bisect_left(self.starts, (start, key))]
+
+    def report(self) -> None:
+        self.log.info(f"Checked {self.checked} requests, up to {self.max_in_flight} in flight,"
+                      f" hazards: {self.hazards}")
@@ -0,0 +1,126 @@
+# Copyright (c) 2022, Antmicro
+# SPDX-License-Identifier: Apache-2.0
+
+from typing import Dict, List, Tuple
+
+from cocotb.log import SimLog # type: ignore
+
+from cocotb_TileLink.TileLink_common.TileLink_types import *
+from cocotb_TileLink.TileLink_common.MonitorInterfaces import TransactionListener
+
+# Lane mask bits, one character per lane, to bytes of ones in the lanes
+_LANES = bytes.maketrans(b"01", b"\x00\xff")
+
+class TileLinkULMemoryScoreboard(TransactionListener):
+    """Checks every AccessAckData beat against a shadow copy of the memory.
+
+    The shadow memory is split into pages allocated on first write. Each page
+    holds the data and a byte mask of the bytes known to the scoreboard, bytes
+    never written nor initialized are not compared. Put handshakes update the
+    shadow memory as they are monitored, and the bytes expected by a Get are
+    taken when it is accepted, so writes accepted while it is in flight do not
+    change them. Checks cost O(beat size) and work for both simulated and RTL
+    memories.
+    """
+    def __init__(self, bus_width: int = 32, name: str = "TLULMemoryScoreboard",
+                 page_size: int = 4096, size: int = 0):
+        assert page_size & (page_size - 1) == 0, "Page size must be a power of 2"
+        assert page_size >= bus_width//8, "Page size must not be smaller than the bus width"
+        self.log: SimLog = SimLog(f"cocotb.{name}")
+        self.bus_byte_width = bus_width//8
+        self.page_size = page_size
+        self.page_shift = page_size.bit_length() - 1
+        self.size = size
+        self.full_mask = 2**self.bus_byte_width - 1
+        self.lane_ones = int.from_bytes(b"\x01" * self.bus_byte_width, "little")
+
+        self.pages: Dict[int, Tuple[bytearray, bytearray]] = {}
+        # Data and bits to compare of the Gets in flight, by bus and source
+        self.expected: Dict[Tuple[str, int], Tuple[int, int]] = {}
+
+        self.reads_checked: int = 0
+        self.bytes_checked: int = 0
+
+    def _get_page(self, page_number: int) -> Tuple[bytearray, bytearray]:
+        if page_number not in self.pages:
+            self.pages[page_number] = (bytearray(self.page_size), bytearray(self.page_size))
+        return self.pages[page_number]
+
+    def _fold(self, address: int) -> int:
+        return address % self.size if self.size else address
+
+    def _lane_bits(self, mask: int) -> int:
+        lanes = format(mask & self.full_mask, f"0{self.bus_byte_width}b")[::-1]
+        return int.from_bytes(lanes.encode().translate(_LANES), "little")
+
+    def init_memory(self, init_array: List[int], start_address: int) -> None:
+        i = 0
+        while i < len(init_array):
+            address = self._fold(start_address + i)
+            offset = address & (self.page_size - 1)
+            length = min(len(init_array) - i, self.page_size - offset)
+            if self.size:
+                length = min(length, self.size - address)
+            data_page, known_page = self._get_page(address >> self.page_shift)
+            data_page[offset:offset + length] = bytes(init_array[i:i + length])
+            known_page[offset:offset + length] = b"\x01" * length
+            i += length
+
+    def _write(self, packet: TileLinkAPacket, known: bool = True) -> None:
+        address = self._fold(int(packet.a_address))
+        base = address - address % self.bus_byte_width
+        bits = self._lane_bits(int(packet.a_mask))
+        data_page, known_page = self._get_page(base >> self.page_shift)
+        offset = base & (self.page_size - 1)
+        end = offset + self.bus_byte_width
+        data = int.from_bytes(data_page[offset:end], "little") & ~bits | int(packet.a_data) & bits
+        data_page[offset:end] = data.to_bytes(self.bus_byte_width, "little")
+        known_bits = int.from_bytes(known_page[offset:end], "little") & ~bits
+        if known:
+            known_bits |= bits & self.lane_ones
+        known_page[offset:end] = known_bits.to_bytes(self.bus_byte_width, "little")
+
+    def _expect(self, packet: TileLinkAPacket) -> Tuple[int, int]:
+        address = self._fold(int(packet.a_address))
+        base = address - address % self.bus_byte_width
+        page = self.pages.get(base >> self.page_shift)
+        if page is None:
+            return 0, 0
+        data_page, known_page = page
+        offset = base & (self.page_size - 1)
+        end = offset + self.bus_byte_width
+        known_bits = int.from_bytes(known_page[offset:end], "little") * 0xFF
+        return int.from_bytes(data_page[offset:end], "little"), self._lane_bits(int(packet.a_mask)) & known_bits
+
+    def check_read(self, a_packet: TileLinkAPacket, d_packet: TileLinkDPacket) -> None:
+        self._check(a_packet, d_packet, self._expect(a_packet))
+
+    def _check(self, a_packet: TileLinkAPacket, d_packet: TileLinkDPacket, expected: Tuple[int, int]) -> None:
+        self.reads_checked += 1
+        expected_data, bits = expected
+        data = int(d_packet.d_data)
+        self.bytes_checked += bin(bits).count("1") // 8
+        mismatch = (data ^ expected_data) & bits
+        assert not mismatch, self._describe_mismatch(a_packet, data, expected_data, mismatch)
+
+    def _describe_mismatch(self, a_packet: TileLinkAPacket, data: int, expected_data: int, mismatch: int) -> str:
+        lane = ((mismatch & -mismatch).bit_length() - 1) // 8
+        address = self._fold(int(a_packet.a_address))
+        return f"Read 0x{(data >> lane*8) & 0xFF:02x} at address 0x{address - address % self.bus_byte_width + lane:x}," \
+               f" but was expecting 0x{(expected_data >> lane*8) & 0xFF:02x}"
+
+    def transaction_started(self, bus_name: str, a_packet: TileLinkAPacket, cycle: int) -> None:
+        if a_packet.a_opcode == TileLinkULAOP.Get:
+            self.expected[(bus_name, int(a_packet.a_source))] = self._expect(a_packet)
+        else:
+            self._write(a_packet)
+
+    def transaction_finished(self, bus_name: str, a_packet: TileLinkAPacket, d_packet: TileLinkDPacket,
+                             start_cycle: int, end_cycle: int) -> None:
+        if a_packet.a_opcode == TileLinkULAOP.Get:
+            expected = self.expected.pop((bus_name, int(a_packet.a_source)), None)
+            if not d_packet.d_error:
+                self._check(a_packet, d_packet, expected or self._expect(a_packet))
+        elif d_packet.d_error:
+            # The write might have been dropped, its bytes are no longer known
+            self._write(a_packet, known=False)
@@ -0,0 +1,159 @@
+# Copyright (c) 2022, Antmicro
+# SPDX-License-Identifier: Apache-2.0
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from cocotb.log import SimLog # type: ignore
+
+from cocotb_TileLink.TileLink_common.TileLink_types import *
+from cocotb_TileLink.TileLink_common.MonitorInterfaces import TransactionListener
+
+class _Write():
+    __slots__ = ("a_time", "d_time")
+
+    def __init__(self, a_time: int, d_time: Optional[int] = None):
+        self.a_time = a_time
+        self.d_time = d_time
+
+
+class TileLinkULOrderingScoreboard(TransactionListener):
+    """Checks read data against concurrent writes from many masters or sources.
+
+    Every byte keeps the history of writes to it, stamped with the A and D
+    handshake times. A write takes effect somewhere between its two
+    handshakes and a read samples memory somewhere between its own, so a read
+    may return the value of any write issued before the read completed that is
+    not hidden by another write issued after it completed and completed
+    before the read was issued. Dominated writes are pruned, so a check costs
+    O(concurrent writers) instead of enumerating write orderings.
+
+    The scoreboard is fed by monitors (register it as their listener), or
+    with recorded transactions through check_trace. Monitors feeding one
+    scoreboard have to be clocked by the same clock and started together.
+    """
+    def __init__(self, bus_width: int = 32, name: str = "TLULOrderingScoreboard", prune_threshold: int = 8):
+        self.log: SimLog = SimLog(f"cocotb.{name}")
+        self.bus_byte_width = bus_width//8
+        self.prune_threshold = prune_threshold
+
+        self.history: Dict[int, List[Tuple[_Write, int]]] = {}
+        self.pending_writes: Dict[Tuple[str, int], _Write] = {}
+        self.pending_reads: Dict[Tuple[str, int], int] = {}
+        self.time: int = 0
+
+        self.reads_checked: int = 0
+        self.bytes_checked: int = 0
+
+    def init_memory(self, init_array: List[int], start_address: int) -> None:
+        initial = _Write(-1, -1)
+        for i, data in enumerate(init_array):
+            self.history[start_address + i] = [(initial, data)]
+
+    def _lanes(self, address: int, mask: int) -> Iterable[int]:
+        base = address - address % self.bus_byte_width
+        lane = 0
+        while mask:
+            if mask & 1:
+                yield base + lane
+            mask >>= 1
+            lane += 1
+
+    def _horizon(self) -> int:
+        if not self.pending_reads:
+            return self.time
+        return min(self.time, min(self.pending_reads.values()))
+
+    @staticmethod
+    def _last_done(history: List[Tuple[_Write, int]], time: int) -> Optional[int]:
+        last = None
+        for write, _ in history:
+            if write.d_time is not None and write.d_time < time and (last is None or write.a_time > last):
+                last = write.a_time
+        return last
+
+    @staticmethod
+    def _is_visible(write: _Write, last_done: Optional[int]) -> bool:
+        return last_done is None or write.d_time is None or write.d_time >= last_done
+
+    def _prune(self, address: int) -> None:
+        history = self.history[address]
+        last_done = self._last_done(history, self._horizon())
+        if last_done is not None:
+            self.history[address] = [(write, value) for write, value in history
+                                     if self._is_visible(write, last_done)]
+
+    def write_started(self, key: Tuple[str, int], packet: TileLinkAPacket, time: int) -> None:
+        self.time = max(self.time, time)
+        write = _Write(time)
+        self.pending_writes[key] = write
+        for address in self._lanes(int(packet.a_address), int(packet.a_mask)):
+            lane = address % self.bus_byte_width
+            value = (int(packet.a_data) >> (lane * 8)) & 0xFF
+            if address not in self.history:
+                self.history[address] = []
+            self.history[address].append((write, value))
+
+    def write_finished(self, key: Tuple[str, int], packet: TileLinkAPacket, error: bool, time: int) -> None:
+        self.time = max(self.time, time)
+        write = self.pending_writes.pop(key)
+        write.d_time = time
+        for address in self._lanes(int(packet.a_address), int(packet.a_mask)):
+            history = self.history[address]
+            if error:
+                self.history[address] = [entry for entry in history if entry[0] is not write]
+            elif len(history) > self.prune_threshold:
+                self._prune(address)
+
+    def check_read(self, packet: TileLinkAPacket, data: int, a_time: int, d_time: int) -> None:
+        self.reads_checked += 1
+        for address in self._lanes(int(packet.a_address), int(packet.a_mask)):
+            lane = address % self.bus_byte_width
+            value = (data >> (lane * 8)) & 0xFF
+            self.bytes_checked += 1
+            history = self.history.get(address)
+            if history is None:
+                # Nothing is known about this byte yet, what was read becomes its initial value
+                self.history[address] = [(_Write(-1, -1), value)]
+                continue
+            last_done = self._last_done(history, a_time)
+            if last_done is None:
+                # Initial value is unknown and still visible
+                continue
+            candidates = [v for write, v in history if write.a_time <= d_time and self._is_visible(write, last_done)]
+            assert value in candidates, \
+                f"Read 0x{value:02x} at address 0x{address:x} (issued at {a_time}, completed at {d_time}),"\
+                f" but only {[hex(v) for v in candidates]} could be visible"
+            if len(history) > self.prune_threshold:
+                self._prune(address)
+
+    def transaction_started(self, bus_name: str, a_packet: TileLinkAPacket, cycle: int) -> None:
+        key = (bus_name, int(a_packet.a_source))
+        if a_packet.a_opcode == TileLinkULAOP.Get:
+            self.time = max(self.time, cycle)
+            self.pending_reads[key] = cycle
+        else:
+            self.write_started(key, a_packet, cycle)
+
+    def transaction_finished(self, bus_name: str, a_packet: TileLinkAPacket, d_packet: TileLinkDPacket,
+                             start_cycle: int, end_cycle: int) -> None:
+        key = (bus_name, int(a_packet.a_source))
+        if a_packet.a_opcode == TileLinkULAOP.Get:
+            self.pending_reads.pop(key, None)
+            self.time = max(self.time, end_cycle)
+            if not d_packet.d_error:
+                self.check_read(a_packet, int(d_packet.d_data), start_cycle, end_cycle)
+        else:
+            self.write_finished(key, a_packet, bool(d_packet.d_error), end_cycle)
+
+    def check_trace(self, transactions: Iterable[Tuple[str, TileLinkAPacket, TileLinkDPacket, int, int]]) -> None:
+        events: List[Tuple[int, int, int, Tuple[str, TileLinkAPacket, TileLinkDPacket, int, int]]] = []
+        for i, transaction in enumerate(transactions):
+            _, _, _, start, end = transaction
+            events.append((start, 0, i, transaction))
+            events.append((end, 1, i, transaction))
+        events.sort(key=lambda event: event[:3])
+        for _, finished, _, (bus_name, a_packet, d_packet, start, end) in events:
+            if finished:
+                self.transaction_finished(bus_name, a_packet, d_packet, start, end)
+            else:
+                self.transaction_started(bus_name, a_packet, start)
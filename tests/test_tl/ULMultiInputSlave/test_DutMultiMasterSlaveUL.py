@@ -1,15 +1,42 @@
+from typing import Optional, Tuple
+
 import cocotb # type: ignore
 from cocotb.clock import Clock # type: ignore
 from cocotb.handle import SimHandle, SimHandleBase # type: ignore
 from cocotb.triggers import ClockCycles, RisingEdge, ReadOnly, Timer, Combine, Join # type: ignore
 
+from cocotb_TileLink.TileLink_common.TileLink_types import *
 from cocotb_TileLink.drivers.DutMultiMasterSlaveUL import DutMultiMasterSlaveUL
 from cocotb_TileLink.drivers.SimTrafficGeneratorUL import SimTrafficGeneratorUL
 
 from cocotb_TileLink.monitors.TileLinkULMonitor import TileLinkULMonitor
+from cocotb_TileLink.monitors.TileLinkULBusMonitor import TileLinkULBusMonitor
+from cocotb_TileLink.monitors.TileLinkULMultiBusMonitor import TileLinkULMultiBusMonitor
 
 CLK_PERIOD = (10, "ns")
 
+class ScriptedBus():
+    """Stands in for a monitored port, reporting the handshakes set by the test."""
+    def __init__(self) -> None:
+        self.a: Optional[TileLinkAPacket] = None
+        self.d: Optional[TileLinkDPacket] = None
+
+    def sample(self) -> Tuple[bool, bool]:
+        return self.a is not None, self.d is not None
+
+    def a_packet(self) -> Optional[TileLinkAPacket]:
+        return self.a
+
+    def d_packet(self) -> Optional[TileLinkDPacket]:
+        return self.d
+
+    async def handshake(self, clk: SimHandle, a: Optional[TileLinkAPacket] = None,
+                        d: Optional[TileLinkDPacket] = None) -> None:
+        self.a, self.d = a, d
+        await RisingEdge(clk)
+        self.a = self.d = None
+
+
 async def setup_dut(dut: SimHandle) -> None:
     cocotb.fork(Clock(dut.clk, *CLK_PERIOD).start())
     dut.rstn.value = 0
@@ -47,3 +74,104 @@ async def test_MultiMasterSlave(dut: SimHandleBase) -> None:
 
     await setup_dut(dut)
     await Combine(Join(fin1), Join(fin2))
+
+
+@cocotb.test() # type: ignore
+async def test_MultiMasterSlave_bus_monitor(dut: SimHandleBase) -> None:
+    TLSlave = DutMultiMasterSlaveUL(dut, max_masters_count=2)
+
+    masters = []
+    for bus_name in ("first", "second"):
+        master = SimTrafficGeneratorUL(name=bus_name).register_clock(dut.clk).register_reset(dut.rstn, True)
+        master.register_slave(TLSlave.get_slave_interface(bus_name=bus_name))
+        TLSlave.register_master(master.get_master_interface(), bus_name=bus_name)
+
+        TLmonitor = TileLinkULBusMonitor(dut, bus_name, name=bus_name)
+        TLmonitor.register_clock(dut.clk).register_reset(dut.rstn, True)
+        cocotb.fork(TLmonitor.process())
+        masters.append(master)
+
+    cocotb.fork(TLSlave.process())
+    for master in masters:
+        cocotb.fork(master.process())
+
+    fin = [cocotb.fork(master.sim_finished()) for master in masters]
+
+    await setup_dut(dut)
+    await Combine(*[Join(f) for f in fin])
+
+
+@cocotb.test() # type: ignore
+async def test_MultiMasterSlave_multi_bus_monitor(dut: SimHandleBase) -> None:
+    TLSlave = DutMultiMasterSlaveUL(dut, max_masters_count=2)
+    TLmonitor = TileLinkULMultiBusMonitor().register_clock(dut.clk).register_reset(dut.rstn, True)
+
+    masters = []
+    for bus_name in ("first", "second"):
+        master = SimTrafficGeneratorUL(name=bus_name).register_clock(dut.clk).register_reset(dut.rstn, True)
+        master.register_slave(TLSlave.get_slave_interface(bus_name=bus_name))
+        TLSlave.register_master(master.get_master_interface(), bus_name=bus_name)
+        TLmonitor.register_bus(dut, bus_name)
+        masters.append(master)
+
+    cocotb.fork(TLmonitor.process())
+    cocotb.fork(TLSlave.process())
+    for master in masters:
+        cocotb.fork(master.process())
+
+    fin = [cocotb.fork(master.sim_finished()) for master in masters]
+
+    await setup_dut(dut)
+    await Combine(*[Join(f) for f in fin])
+
+
+@cocotb.test() # type: ignore
+async def test_bus_monitor_reset(dut: SimHandleBase) -> None:
+    bus = ScriptedBus()
+    TLmonitor = TileLinkULBusMonitor(packed_bus=bus).register_clock(dut.clk).register_reset(dut.rstn, True)
+    TLmonitor.register_latency_budget({TileLinkULAOP.Get: 20})
+    cocotb.fork(TLmonitor.process())
+    await setup_dut(dut)
+
+    get = TileLinkAPacket(TileLinkULAOP.Get, 0, 2, 1, 0x100, 0xF, 0)
+    await bus.handshake(dut.clk, a=get)
+    assert 1 in TLmonitor.waiting_for_resp
+
+    # The reset drops the request before its budget runs out
+    dut.rstn.value = 0
+    await ClockCycles(dut.clk, 10)
+    dut.rstn.value = 1
+    await RisingEdge(dut.clk)
+    assert not TLmonitor.waiting_for_resp and not TLmonitor.deadlines
+
+    # Reusing the source is not a protocol violation, nor does it time out
+    await bus.handshake(dut.clk, a=get)
+    await bus.handshake(dut.clk, d=TileLinkDPacket(TileLinkULDOP.AccessAckData, 0, 2, 1))
+    await ClockCycles(dut.clk, 50)
+    assert not TLmonitor.waiting_for_resp
+
+
+@cocotb.test() # type: ignore
+async def test_multi_bus_monitor_reset(dut: SimHandleBase) -> None:
+    buses = [ScriptedBus(), ScriptedBus()]
+    TLmonitor = TileLinkULMultiBusMonitor(num_of_sources=4).register_clock(dut.clk).register_reset(dut.rstn, True)
+    for port, bus in enumerate(buses):
+        TLmonitor.register_bus(name=f"port{port}", packed_bus=bus)
+    cocotb.fork(TLmonitor.process())
+    await setup_dut(dut)
+
+    get = TileLinkAPacket(TileLinkULAOP.Get, 0, 2, 1, 0x100, 0xF, 0)
+    await buses[1].handshake(dut.clk, a=get)
+    assert list(TLmonitor.outstanding()) == [0, 1]
+
+    dut.rstn.value = 0
+    await ClockCycles(dut.clk, 10)
+    dut.rstn.value = 1
+    await RisingEdge(dut.clk)
+    assert list(TLmonitor.outstanding()) == [0, 0]
+
+    # Reusing the source after the reset is not a protocol violation
+    await buses[1].handshake(dut.clk, a=get)
+    await buses[1].handshake(dut.clk, d=TileLinkDPacket(TileLinkULDOP.AccessAckData, 0, 2, 1))
+    await RisingEdge(dut.clk)
+    assert list(TLmonitor.outstanding()) == [0, 0]
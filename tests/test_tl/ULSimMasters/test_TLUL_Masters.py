@@ -1,24 +1,45 @@
-from typing import Tuple, Dict, List, Iterator
+from typing import Tuple, Dict, List, Iterator, Optional
 from random import randrange, randint
 from itertools import chain, combinations, permutations
 import warnings
+import os
+import json
+import tempfile
+
+import numpy as np
 
 import cocotb # type: ignore
 from cocotb.clock import Clock # type: ignore
 from cocotb.handle import SimHandle, SimHandleBase # type: ignore
 from cocotb.triggers import ClockCycles, Combine, Join, RisingEdge # type: ignore
+from cocotb.regression import TestFactory # type: ignore
 
 from cocotb_TileLink.TileLink_common.TileLink_types import*
 from cocotb_TileLink.TileLink_common.Interfaces import MemoryInterface
+from cocotb_TileLink.TileLink_common.MonitorInterfaces import TransactionListener
+from cocotb_TileLink.TileLink_common.CoverageModel import TileLinkULCoverageModel
+from cocotb_TileLink.TileLink_common.CoverageCollector import TileLinkULCoverageCollector
+from cocotb_TileLink.TileLink_common.AddressMap import TileLinkULAddressMap, TileLinkULRegion
+from cocotb_TileLink.TileLink_common.TrafficProfile import *
+from cocotb_TileLink.TileLink_common.Trace import read_trace
+from cocotb_TileLink.TileLink_common.BatchStream import BatchGenerator
+from cocotb_TileLink.TileLink_common.FlightRecorder import TileLinkULFlightRecorder
 
 from cocotb_TileLink.drivers.SimSimpleMasterUL import SimSimpleMasterUL
 from cocotb_TileLink.drivers.SimTrafficGeneratorUL import SimTrafficGeneratorUL
 from cocotb_TileLink.drivers.SimRandomTrafficGeneratorUL import SimRandomTrafficGeneratorUL
+from cocotb_TileLink.drivers.SimTraceReplayMasterUL import SimTraceReplayMasterUL
+from cocotb_TileLink.drivers.SimProtocolFuzzerUL import SimProtocolFuzzerUL
 
 from cocotb_TileLink.drivers.SimSimpleSlaveUL import SimSimpleSlaveUL
 from cocotb_TileLink.drivers.SimCheckInvalidSlaveUL import SimCheckInvalidSlaveUL
 
 from cocotb_TileLink.monitors.TileLinkULMonitor import TileLinkULMonitor
+from cocotb_TileLink.monitors.TileLinkULTraceRecorder import TileLinkULTraceRecorder
+from cocotb_TileLink.monitors.TileLinkULFilter import TileLinkULFilter
+from cocotb_TileLink.monitors.TileLinkULTraceExporter import TileLinkULTraceExporter
+
+from cocotb_TileLink.scoreboards.TileLinkULMemoryScoreboard import TileLinkULMemoryScoreboard
 
 CLK_PERIOD = (10, "ns")
 
@@ -159,6 +180,184 @@ async def test_single_master_simple_slave(dut: SimHandle) -> None:
     await TLm.sim_finished()
 
 
+
+@cocotb.test() # type: ignore
+async def test_simple_slave_odd_size(dut: SimHandle) -> None:
+    address_width, bus_width = get_parameters(dut)
+    bus_byte_width = bus_width//8
+    size = 0x100 + 3
+    TLm = SimSimpleMasterUL(bus_width)
+    TLm.register_clock(dut.clk).register_reset(dut.rstn, True)
+
+    TLs = SimSimpleSlaveUL(bus_width, size=size)
+    TLs.register_clock(dut.clk).register_reset(dut.rstn, True)
+    TLs.register_master(TLm.get_master_interface())
+    TLm.register_slave(TLs.get_slave_interface())
+
+    cocotb.fork(TLs.process())
+    cocotb.fork(TLm.process())
+
+    await setup_dut(dut)
+    # Bytes past the end are not wrapped around to the start of the memory
+    TLs.init_memory([0xAA] * 8, size - 2)
+    dump = TLs.memory_dump()
+    assert len(dump) == size
+    assert dump[size - 2:] == [0xAA, 0xAA]
+    assert dump[:6] == [0] * 6
+
+    # The last, partial bus word can still be accessed as a whole
+    address = size - size % bus_byte_width
+    write_value = [randint(0, 255) for _ in range(bus_byte_width)]
+    TLm.write(address, bus_byte_width, write_value, [True] * bus_byte_width)
+    await TLm.source_free(0)
+    TLm.read(address, bus_byte_width)
+    await TLm.source_free(0)
+    read_value = conver_to_int_list(TLm.get_rsp(0), address, bus_byte_width)
+    compare_read_values(write_value, read_value, address)
+    assert TLs.memory_dump()[address:] == write_value[:size % bus_byte_width]
+    TLm.finish()
+    await TLm.sim_finished()
+
+
+@cocotb.test() # type: ignore
+async def test_single_master_streamed_responses(dut: SimHandle) -> None:
+    address_width, bus_width = get_parameters(dut)
+    bus_byte_width = bus_width//8
+    # Unaligned reads of two bus words are split into at most 7 beats, on a 256-bit bus
+    TLm = SimSimpleMasterUL(bus_width, discard_write_acks=True, max_buffered_responses=8)
+    TLm.register_clock(dut.clk).register_reset(dut.rstn, True)
+
+    TLs = SimSimpleSlaveUL(bus_width, size=0x8000)
+    TLs.register_clock(dut.clk).register_reset(dut.rstn, True)
+    TLs.register_master(TLm.get_master_interface())
+    TLm.register_slave(TLs.get_slave_interface())
+
+    cocotb.fork(TLs.process())
+    cocotb.fork(TLm.process())
+
+    await setup_dut(dut)
+    mem_init(TLs, 0x8000)
+    for _ in range(100):
+        source = randint(0, 15)
+        await TLm.source_free(source)
+        length = randint(1, 4 * bus_byte_width)
+        TLm.write(randrange(0, 0x8000 - length), length, [randint(0, 255) for _ in range(length)],
+                  [True] * length, source)
+    for source in range(16):
+        await TLm.source_free(source)
+    assert len(TLm.d_packets) == 0
+
+    addresses = [randrange(0, 0x8000 - 2 * bus_byte_width) for _ in range(16)]
+    expected = TLs.memory_dump()
+    for source, address in enumerate(addresses):
+        TLm.read(address, 2 * bus_byte_width, source)
+    received = 0
+    async for source, rsp in TLm.responses():
+        compare_read_values(expected[addresses[source]:addresses[source] + 2 * bus_byte_width],
+                            conver_to_int_list(rsp, addresses[source], bus_byte_width), addresses[source])
+        received += 1
+        if received == len(addresses):
+            break
+    assert TLm.buffered_responses == 0
+
+    # Once the iteration stops, responses are collected with get_rsp again
+    address = randrange(0, 0x8000 - 2 * bus_byte_width, bus_byte_width)
+    TLm.read(address, 2 * bus_byte_width, 0)
+    await TLm.source_free(0)
+    compare_read_values(expected[address:address + 2 * bus_byte_width],
+                        conver_to_int_list(TLm.get_rsp(0), address, bus_byte_width), address)
+    assert TLm.buffered_responses == 0
+
+
+@cocotb.test() # type: ignore
+async def test_single_master_stream(dut: SimHandle) -> None:
+    address_width, bus_width = get_parameters(dut)
+    bus_byte_width = bus_width//8
+    TLm = SimSimpleMasterUL(bus_width, discard_write_acks=True)
+    TLm.register_clock(dut.clk).register_reset(dut.rstn, True)
+
+    TLs = SimSimpleSlaveUL(bus_width, size=0x8000)
+    TLs.register_clock(dut.clk).register_reset(dut.rstn, True)
+    TLs.register_master(TLm.get_master_interface())
+    TLm.register_slave(TLs.get_slave_interface())
+
+    scoreboard = TileLinkULMemoryScoreboard(bus_width, size=0x8000)
+    TLmonitor = TileLinkULMonitor().register_clock(dut.clk).register_reset(dut.rstn, True)
+    TLmonitor.register_device(TLm).register_listener(scoreboard)
+
+    cocotb.fork(TLs.process())
+    cocotb.fork(TLm.process())
+    cocotb.fork(TLmonitor.process())
+
+    def operations(count: int) -> Iterator[TileLinkULOperation]:
+        for _ in range(count):
+            length = randint(1, 4 * bus_byte_width)
+            address = randrange(0, 0x8000 - length)
+            if randint(0, 1):
+                yield TileLinkULOperation(TileLinkULAOP.Get, address, length)
+            else:
+                yield TileLinkULOperation(TileLinkULAOP.PutPartialData, address,
+                                          [randint(0, 255) for _ in range(length)])
+
+    await setup_dut(dut)
+    completed = 0
+    async for operation, rsp in TLm.stream(operations(1000), window=8):
+        if operation.opcode == TileLinkULAOP.Get:
+            assert len(conver_to_int_list(rsp, operation.address, bus_byte_width)) == operation.data
+        completed += 1
+    assert completed == 1000
+    assert scoreboard.reads_checked > 0
+
+@cocotb.test() # type: ignore
+async def test_single_master_stream_reset(dut: SimHandle) -> None:
+    address_width, bus_width = get_parameters(dut)
+    TLm = SimSimpleMasterUL(bus_width)
+    TLm.register_clock(dut.clk).register_reset(dut.rstn, True)
+
+    TLs = SimSimpleSlaveUL(bus_width, size=0x8000)
+    TLs.register_clock(dut.clk).register_reset(dut.rstn, True)
+    TLs.register_master(TLm.get_master_interface())
+    TLm.register_slave(TLs.get_slave_interface())
+
+    cocotb.fork(TLs.process())
+    cocotb.fork(TLm.process())
+
+    def reads(count: int) -> Iterator[TileLinkULOperation]:
+        for _ in range(count):
+            yield TileLinkULOperation(TileLinkULAOP.Get, randrange(0, 0x8000 - 16), 16)
+
+    completed = 0
+    interrupted = False
+
+    async def consume() -> None:
+        nonlocal completed, interrupted
+        try:
+            async for _ in TLm.stream(reads(1000), window=8):
+                completed += 1
+        except Exception:
+            interrupted = True
+
+    await setup_dut(dut)
+    cocotb.fork(consume())
+    while completed < 10:
+        await RisingEdge(dut.clk)
+    dut.rstn.value = 0
+    await ClockCycles(dut.clk, 10)
+    dut.rstn.value = 1
+    await ClockCycles(dut.clk, 10)
+
+    # The pending stream fails instead of waiting forever, and nothing is issued after the reset
+    assert interrupted
+    assert completed < 1000
+    assert not TLm.stream_queues
+    assert not TLm.a_packet_sources
+
+    completed = 0
+    async for _ in TLm.stream(reads(10), window=8):
+        completed += 1
+    assert completed == 10
+
+
 @cocotb.test() # type: ignore
 async def test_trafic_generator_simple_slave(dut: SimHandle) -> None:
     address_width, bus_width = get_parameters(dut)
@@ -242,3 +441,651 @@ async def test_TileLinkUL_monitor(dut: SimHandle) -> None:
         compare_read_values(expected_value, read_value, address)
     TLm.finish()
     await TLm.sim_finished()
+
+
+class TransactionCounter(TransactionListener):
+    def __init__(self) -> None:
+        self.started = 0
+        self.finished = 0
+
+    def transaction_started(self, bus_name: str, a_packet: TileLinkAPacket, cycle: int) -> None:
+        self.started += 1
+
+    def transaction_finished(self, bus_name: str, a_packet: TileLinkAPacket, d_packet: TileLinkDPacket,
+                             start_cycle: int, end_cycle: int) -> None:
+        self.finished += 1
+
+
+@cocotb.test() # type: ignore
+async def test_monitor_filters(dut: SimHandle) -> None:
+    address_width, bus_width = get_parameters(dut)
+    TLm = SimSimpleMasterUL(bus_width).register_clock(dut.clk).register_reset(dut.rstn, True)
+
+    TLs = SimSimpleSlaveUL(bus_width, 0x8000)
+    TLs.register_clock(dut.clk).register_reset(dut.rstn, True)
+    TLs.register_master(TLm.get_master_interface())
+    TLm.register_slave(TLs.get_slave_interface())
+
+    filters = {
+        "ranges": (TileLinkULFilter(address_ranges=[(0x600, 0x100), (0, 0x200)]), 3),
+        "opcodes": (TileLinkULFilter(opcodes=[TileLinkULAOP.Get]), 4),
+        "sources": (TileLinkULFilter(sources=[1]), 2),
+        "combined": (TileLinkULFilter(address_ranges=[(0, 0x400)], opcodes=[TileLinkULAOP.Get]), 2),
+        "sampled": (TileLinkULFilter(sample_every=3), 8),
+        "errors": (TileLinkULFilter(errors_only=True), 8),
+    }
+    counters = {}
+    for name, (filter, _) in filters.items():
+        counters[name] = TransactionCounter()
+        TLmonitor = TileLinkULMonitor(name).register_clock(dut.clk).register_reset(dut.rstn, True)
+        TLmonitor.register_device(TLm).register_filter(filter).register_listener(counters[name])
+        cocotb.fork(TLmonitor.process())
+
+    cocotb.fork(TLs.process())
+    cocotb.fork(TLm.process())
+    await setup_dut(dut)
+
+    # Single beat transfers, reads from even and writes from odd indices
+    for i in range(8):
+        if i % 2:
+            TLm.write(i * 0x100, 4, [i] * 4, [True] * 4, source=i % 4)
+        else:
+            TLm.read(i * 0x100, 4, source=i % 4)
+        await TLm.source_free(i % 4)
+        TLm.get_rsp(i % 4)
+    await ClockCycles(dut.clk, 2)
+
+    for name, (filter, matched) in filters.items():
+        assert filter.matched == matched, f"{name}: {filter.matched} matched, expected {matched}"
+    assert counters["sampled"].started == counters["sampled"].finished == 2
+    for name in ("ranges", "opcodes", "sources", "combined", "errors"):
+        assert counters[name].started == counters[name].finished == filters[name][1]
+    errors = filters["errors"][0]
+    assert not errors.match_rsp(TileLinkDPacket())
+    assert errors.match_rsp(TileLinkDPacket(d_error=TileLinkULResp.Denied))
+
+
+@cocotb.test() # type: ignore
+async def test_latency_budget(dut: SimHandle) -> None:
+    address_width, bus_width = get_parameters(dut)
+    # With one buffered response the master stops accepting D beats, so the
+    # response to the second read is withheld
+    TLm = SimSimpleMasterUL(bus_width, max_buffered_responses=1)
+    TLm.register_clock(dut.clk).register_reset(dut.rstn, True)
+    TLmonitor = TileLinkULMonitor().register_clock(dut.clk).register_reset(dut.rstn, True)
+    TLmonitor.register_device(TLm).register_latency_budget({TileLinkULAOP.Get: 50})
+
+    TLs = SimSimpleSlaveUL(bus_width, 0x8000)
+    TLs.register_clock(dut.clk).register_reset(dut.rstn, True)
+    TLs.register_master(TLm.get_master_interface())
+    TLm.register_slave(TLs.get_slave_interface())
+
+    cocotb.fork(TLs.process())
+    cocotb.fork(TLm.process())
+    await setup_dut(dut)
+
+    phases: List[str] = []
+
+    async def withhold_responses() -> None:
+        for phase in ("reset", "timeout"):
+            TLm.read(0, 4, source=0)
+            await TLm.source_free(0)
+            TLm.read(0, 4, source=1)
+            await ClockCycles(dut.clk, 10)
+            if phase == "reset":
+                # Drops the withheld request before its budget runs out
+                dut.rstn.value = 0
+                await ClockCycles(dut.clk, 100)
+                dut.rstn.value = 1
+                await ClockCycles(dut.clk, 10)
+            phases.append(phase)
+
+    cocotb.fork(withhold_responses())
+    try:
+        await TLmonitor.process()
+    except TileLinkULTimeout as timeout:
+        assert phases == ["reset", "timeout"], "Timeout raised for a request dropped by the reset"
+        assert timeout.packet is not None and timeout.packet.a_source == 1
+        assert timeout.age == 50
+    else:
+        assert False, "Withheld response did not time out"
+
+
+@cocotb.test() # type: ignore
+async def test_flight_recorder(dut: SimHandle) -> None:
+    address_width, bus_width = get_parameters(dut)
+    recorder = TileLinkULFlightRecorder(depth=4)
+    TLm = SimSimpleMasterUL(bus_width, max_buffered_responses=1)
+    TLm.register_clock(dut.clk).register_reset(dut.rstn, True)
+    TLmonitor = TileLinkULMonitor().register_clock(dut.clk).register_reset(dut.rstn, True)
+    TLmonitor.register_device(TLm).register_latency_budget({TileLinkULAOP.Get: 50}).register_flight_recorder(recorder)
+
+    TLs = SimSimpleSlaveUL(bus_width, 0x8000)
+    TLs.register_clock(dut.clk).register_reset(dut.rstn, True)
+    TLs.register_master(TLm.get_master_interface())
+    TLm.register_slave(TLs.get_slave_interface())
+
+    cocotb.fork(TLs.process())
+    cocotb.fork(TLm.process())
+    await setup_dut(dut)
+
+    async def withhold_response() -> None:
+        for i in range(3):
+            TLm.write(4*i, 4, [i, 0, 0, 0], [True]*4, source=0)
+            await TLm.source_free(0)
+            TLm.get_rsp(0)
+        TLm.read(0, 4, source=0)
+        await TLm.source_free(0)
+        TLm.read(0, 4, source=1)
+
+    cocotb.fork(withhold_response())
+    try:
+        await TLmonitor.process()
+    except TileLinkULTimeout:
+        pass
+    else:
+        assert False, "Withheld response did not time out"
+
+    # 3 writes and a read answered, plus the withheld read, only the last 4 are kept
+    assert recorder.count == 9
+    dump = recorder.dump().splitlines()
+    assert len(dump) == 4
+    assert ": D AccessAck " in dump[0] and "source: 0" in dump[0]
+    assert ": A Get " in dump[1] and "source: 0" in dump[1]
+    assert ": D AccessAckData " in dump[2] and "source: 0" in dump[2]
+    assert ": A Get " in dump[3] and "source: 1" in dump[3]
+
+
+@cocotb.test() # type: ignore
+async def test_trace_exporter(dut: SimHandle) -> None:
+    address_width, bus_width = get_parameters(dut)
+    beats = max(1, 16 // (bus_width//8))
+    opcode = "PutFullData" if bus_width//8 <= 16 else "PutPartialData"
+
+    with tempfile.TemporaryDirectory() as trace_dir:
+        path = os.path.join(trace_dir, "trace.json")
+        exporter = TileLinkULTraceExporter(path, flush_every=4)
+        TLm = SimSimpleMasterUL(bus_width).register_clock(dut.clk).register_reset(dut.rstn, True)
+        # Responses are never errors, listeners still get every transaction
+        TLmonitor = TileLinkULMonitor().register_clock(dut.clk).register_reset(dut.rstn, True)
+        TLmonitor.register_device(TLm).register_filter(TileLinkULFilter(errors_only=True)).register_listener(exporter)
+
+        TLs = SimSimpleSlaveUL(bus_width, 0x8000)
+        TLs.register_clock(dut.clk).register_reset(dut.rstn, True)
+        TLs.register_master(TLm.get_master_interface())
+        TLm.register_slave(TLs.get_slave_interface())
+
+        for process in (TLmonitor.process(), TLs.process(), TLm.process()):
+            cocotb.fork(process)
+        await setup_dut(dut)
+
+        for source in range(4):
+            TLm.write(source * 0x100, 16, list(range(16)), [True] * 16, source)
+        for source in range(4):
+            await TLm.source_free(source)
+        await RisingEdge(dut.clk)
+
+        with open(path) as trace:
+            assert '"ph":"X"' in trace.read(), "Events not flushed before close"
+        exporter.close()
+        with open(path) as trace:
+            events = json.load(trace)
+
+    spans = [event for event in events if event["ph"] == "X"]
+    assert len(spans) == 4 * beats
+    assert {span["tid"] for span in spans} == set(range(4))
+    assert all(span["name"] == opcode and span["dur"] >= 0 for span in spans)
+    threads = [event for event in events if event["name"] == "thread_name"]
+    assert len(threads) == 4
+
+
+@cocotb.test() # type: ignore
+async def test_trafic_generator_memory_scoreboard(dut: SimHandle) -> None:
+    address_width, bus_width = get_parameters(dut)
+    TLm = SimTrafficGeneratorUL(bus_width=bus_width, addr_width=address_width, num_of_transactions=int(2e4))
+    TLm.register_clock(dut.clk).register_reset(dut.rstn, True)
+
+    TLs = SimSimpleSlaveUL(bus_width, size=0x8000)
+    TLs.register_clock(dut.clk).register_reset(dut.rstn, True)
+    TLs.register_master(TLm.get_master_interface())
+    TLm.register_slave(TLs.get_slave_interface())
+
+    scoreboard = TileLinkULMemoryScoreboard(bus_width, size=0x8000)
+    TLmonitor = TileLinkULMonitor().register_clock(dut.clk).register_reset(dut.rstn, True)
+    TLmonitor.register_device(TLm).register_listener(scoreboard)
+
+    cocotb.fork(TLs.process())
+    cocotb.fork(TLm.process())
+    cocotb.fork(TLmonitor.process())
+
+    await setup_dut(dut)
+    await TLm.sim_finished()
+    assert scoreboard.reads_checked > 0
+
+
+async def test_wide_bus(dut: SimHandle, bus_width: int = 512) -> None:
+    address_width, _ = get_parameters(dut)
+    TLm = SimTrafficGeneratorUL(bus_width=bus_width, addr_width=address_width, num_of_transactions=int(5e3))
+    TLm.register_clock(dut.clk).register_reset(dut.rstn, True)
+
+    TLs = SimSimpleSlaveUL(bus_width, size=0x8000)
+    TLs.register_clock(dut.clk).register_reset(dut.rstn, True)
+    TLs.register_master(TLm.get_master_interface())
+    TLm.register_slave(TLs.get_slave_interface())
+
+    TLr = SimRandomTrafficGeneratorUL(bus_width=bus_width, addr_width=address_width)
+    TLr.register_clock(dut.clk).register_reset(dut.rstn, True)
+
+    TLi = SimCheckInvalidSlaveUL(bus_width, size=0x8000)
+    TLi.register_clock(dut.clk).register_reset(dut.rstn, True)
+    TLi.register_master(TLr.get_master_interface())
+    TLr.register_slave(TLi.get_slave_interface())
+
+    scoreboard = TileLinkULMemoryScoreboard(bus_width, size=0x8000)
+    TLmonitor = TileLinkULMonitor().register_clock(dut.clk).register_reset(dut.rstn, True)
+    TLmonitor.register_device(TLm).register_listener(scoreboard)
+
+    cocotb.fork(TLs.process())
+    cocotb.fork(TLm.process())
+    cocotb.fork(TLi.process())
+    cocotb.fork(TLr.process())
+    cocotb.fork(TLmonitor.process())
+
+    await setup_dut(dut)
+    await TLm.sim_finished()
+    await TLr.sim_finished()
+    assert scoreboard.reads_checked > 0
+
+
+wide_bus = TestFactory(test_wide_bus)
+wide_bus.add_option('bus_width', (128, 256, 512))
+wide_bus.generate_tests()
+
+
+@cocotb.test() # type: ignore
+async def test_seeded_traffic_generators(dut: SimHandle) -> None:
+    address_width, data_width = get_parameters(dut)
+    await setup_dut(dut)
+    memories = []
+    generated = [0, 0]
+
+    def count_batches(generate: BatchGenerator, run: int) -> BatchGenerator:
+        def counted(rng: np.random.Generator, count: int) -> Dict[str, np.ndarray]:
+            generated[run] += 1
+            return generate(rng, count)
+        return counted
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for run in range(2):
+            TLm = SimTrafficGeneratorUL(bus_width=data_width, addr_width=address_width,
+                                        num_of_transactions=int(2e3), seed=1234, batch_size=256, cache_dir=cache_dir)
+            TLm.register_clock(dut.clk).register_reset(dut.rstn, True)
+            for stream in (TLm.packets, TLm.controls):
+                stream.generate = count_batches(stream.generate, run)
+
+            TLs = SimSimpleSlaveUL(data_width, size=0x1000)
+            TLs.register_clock(dut.clk).register_reset(dut.rstn, True)
+            TLs.register_master(TLm.get_master_interface())
+            TLm.register_slave(TLs.get_slave_interface())
+
+            TLs_process = cocotb.fork(TLs.process())
+            cocotb.fork(TLm.process())
+            await TLm.sim_finished()
+            TLs_process.kill()
+            memories.append(TLs.memory_dump())
+        assert len(os.listdir(cache_dir)) > 0
+    assert generated[0] > 0 and generated[1] == 0, "Second run generated batches instead of loading them"
+    assert memories[0] == memories[1], "Same seed produced different traffic"
+
+
+async def test_trace_replay(dut: SimHandle, cycle_accurate: bool = True) -> None:
+    address_width, data_width = get_parameters(dut)
+    with tempfile.TemporaryDirectory() as trace_dir:
+        trace_path = os.path.join(trace_dir, "traffic.trace")
+        TLm = SimTrafficGeneratorUL(bus_width=data_width, addr_width=address_width, num_of_transactions=int(2e3))
+        TLm.register_clock(dut.clk).register_reset(dut.rstn, True)
+
+        TLs = SimSimpleSlaveUL(data_width, size=0x1000)
+        TLs.register_clock(dut.clk).register_reset(dut.rstn, True)
+        TLs.register_master(TLm.get_master_interface())
+        TLm.register_slave(TLs.get_slave_interface())
+
+        recorder = TileLinkULTraceRecorder(trace_path)
+        TLmonitor = TileLinkULMonitor().register_clock(dut.clk).register_reset(dut.rstn, True)
+        TLmonitor.register_device(TLm).register_listener(recorder)
+
+        cocotb.fork(TLs.process())
+        cocotb.fork(TLm.process())
+        cocotb.fork(TLmonitor.process())
+
+        await setup_dut(dut)
+        await TLm.sim_finished()
+        recorder.close()
+
+        TLr = SimTraceReplayMasterUL(trace_path, data_width, cycle_accurate=cycle_accurate, read_ahead=64)
+        TLr.register_clock(dut.clk).register_reset(dut.rstn, True)
+
+        TLrs = SimSimpleSlaveUL(data_width, size=0x1000)
+        TLrs.register_clock(dut.clk).register_reset(dut.rstn, True)
+        TLrs.register_master(TLr.get_master_interface())
+        TLr.register_slave(TLrs.get_slave_interface())
+
+        cocotb.fork(TLrs.process())
+        cocotb.fork(TLr.process())
+
+        await TLr.sim_finished()
+        assert TLr.issued == recorder.records
+        if cycle_accurate:
+            assert TLr.max_slip == 0, f"Replay fell {TLr.max_slip} cycles behind the trace"
+        assert TLrs.memory_dump() == TLs.memory_dump(), "Replayed trace left different memory contents"
+
+
+trace_replay = TestFactory(test_trace_replay)
+trace_replay.add_option('cycle_accurate', (True, False))
+trace_replay.generate_tests()
+
+
+PROFILE_REGIONS = [(0x1000, 0x1000), (0x4000, 0x2000)]
+
+async def test_traffic_profile(dut: SimHandle, profile: TileLinkULTrafficProfile = TileLinkULTrafficProfile()) -> None:
+    address_width, data_width = get_parameters(dut)
+    TLm = SimTrafficGeneratorUL(bus_width=data_width, addr_width=address_width, num_of_transactions=int(2e3),
+                                profile=profile)
+    TLm.register_clock(dut.clk).register_reset(dut.rstn, True)
+
+    TLs = SimSimpleSlaveUL(data_width, size=0x8000)
+    TLs.register_clock(dut.clk).register_reset(dut.rstn, True)
+    TLs.register_master(TLm.get_master_interface())
+    TLm.register_slave(TLs.get_slave_interface())
+
+    scoreboard = TileLinkULMemoryScoreboard(data_width, size=0x8000)
+    in_regions = TileLinkULFilter(address_ranges=PROFILE_REGIONS)
+    TLmonitor = TileLinkULMonitor().register_clock(dut.clk).register_reset(dut.rstn, True)
+    TLmonitor.register_device(TLm).register_filter(in_regions).register_listener(scoreboard)
+
+    cocotb.fork(TLs.process())
+    cocotb.fork(TLm.process())
+    cocotb.fork(TLmonitor.process())
+
+    await setup_dut(dut)
+    await TLm.sim_finished()
+    assert in_regions.matched == int(2e3), f"{int(2e3) - in_regions.matched} requests outside of the regions"
+    assert scoreboard.reads_checked > 0
+
+
+traffic_profile = TestFactory(test_traffic_profile)
+traffic_profile.add_option('profile', (
+    TileLinkULTrafficProfile(TileLinkULPoissonArrivals(0.3), TileLinkULUniformAddresses(PROFILE_REGIONS)),
+    TileLinkULTrafficProfile(TileLinkULOnOffArrivals(0.2, 16), TileLinkULStridedAddresses(PROFILE_REGIONS),
+                             max_response_delay=0),
+    TileLinkULTrafficProfile(addresses=TileLinkULHotspotAddresses([(0x4000, 0x100)], 0.9, PROFILE_REGIONS),
+                             operations=TileLinkULOperationMix(get=2, put_full=1, put_partial=1)),
+    TileLinkULTrafficProfile(addresses=TileLinkULWorkingSetAddresses(1024, 64, PROFILE_REGIONS)),
+))
+traffic_profile.generate_tests()
+
+
+@cocotb.test() # type: ignore
+async def test_traffic_profile_unaligned_regions(dut: SimHandle) -> None:
+    address_width, data_width = get_parameters(dut)
+    bus_byte_width = data_width//8
+    # Too small for a full bus word, and a region starting in the middle of one
+    for regions in ([(0x1000, bus_byte_width // 2)], [(0x1000 + bus_byte_width // 2, 0x1000)]):
+        for addresses in (TileLinkULUniformAddresses(regions), TileLinkULStridedAddresses(regions),
+                          TileLinkULHotspotAddresses(regions, 0.9, PROFILE_REGIONS)):
+            try:
+                SimTrafficGeneratorUL(bus_width=data_width, addr_width=address_width,
+                                      profile=TileLinkULTrafficProfile(addresses=addresses))
+            except AssertionError as error:
+                assert "not aligned" in str(error)
+            else:
+                assert False, f"{addresses} was accepted"
+
+    # Requests no larger than the region fit in it
+    SimTrafficGeneratorUL(bus_width=data_width, addr_width=address_width, profile=TileLinkULTrafficProfile(
+        addresses=TileLinkULUniformAddresses([(0x1002, 2)]), operations=TileLinkULOperationMix(sizes={0: 1, 1: 1})))
+
+
+@cocotb.test() # type: ignore
+async def test_address_map(dut: SimHandle) -> None:
+    address_width, data_width = get_parameters(dut)
+    address_map = TileLinkULAddressMap([TileLinkULRegion(0x1000, 0x1000, writable=False, weight=1),
+                                        TileLinkULRegion(0x4000, 0x2000, weight=3)])
+    TLm = SimTrafficGeneratorUL(bus_width=data_width, addr_width=address_width, num_of_transactions=int(2e3),
+                                profile=TileLinkULTrafficProfile(address_map=address_map))
+    TLm.register_clock(dut.clk).register_reset(dut.rstn, True)
+
+    TLs = SimSimpleSlaveUL(data_width, size=0x8000)
+    TLs.register_clock(dut.clk).register_reset(dut.rstn, True)
+    TLs.register_master(TLm.get_master_interface())
+    TLm.register_slave(TLs.get_slave_interface())
+
+    read_only = TileLinkULFilter(address_ranges=[(0x1000, 0x1000)])
+    read_only_writes = TileLinkULFilter(address_ranges=[(0x1000, 0x1000)],
+                                        opcodes=[TileLinkULAOP.PutFullData, TileLinkULAOP.PutPartialData])
+    for filter in (read_only, read_only_writes):
+        TLmonitor = TileLinkULMonitor().register_clock(dut.clk).register_reset(dut.rstn, True)
+        TLmonitor.register_device(TLm).register_filter(filter)
+        cocotb.fork(TLmonitor.process())
+
+    cocotb.fork(TLs.process())
+    cocotb.fork(TLm.process())
+
+    await setup_dut(dut)
+    await TLm.sim_finished()
+    assert read_only_writes.matched == 0, f"{read_only_writes.matched} writes to a read-only region"
+    # The read-only region has a quarter of the total weight
+    assert 300 < read_only.matched < 700, f"{read_only.matched} requests to the read-only region"
+
+
+@cocotb.test() # type: ignore
+async def test_coverage_feedback(dut: SimHandle) -> None:
+    address_width, data_width = get_parameters(dut)
+    models = []
+    generators = []
+    for coverage_bias in (0.0, 0.5):
+        model = TileLinkULCoverageModel(data_width)
+        TLm = SimTrafficGeneratorUL(bus_width=data_width, addr_width=address_width, num_of_transactions=int(1e3),
+                                    seed=1, coverage=model, coverage_bias=coverage_bias)
+        TLm.register_clock(dut.clk).register_reset(dut.rstn, True)
+
+        TLs = SimSimpleSlaveUL(data_width, size=0x8000)
+        TLs.register_clock(dut.clk).register_reset(dut.rstn, True)
+        TLs.register_master(TLm.get_master_interface())
+        TLm.register_slave(TLs.get_slave_interface())
+
+        scoreboard = TileLinkULMemoryScoreboard(data_width, size=0x8000)
+        TLmonitor = TileLinkULMonitor().register_clock(dut.clk).register_reset(dut.rstn, True)
+        TLmonitor.register_device(TLm).register_listener(model).register_listener(scoreboard)
+
+        for process in (TLs.process(), TLm.process(), TLmonitor.process()):
+            cocotb.fork(process)
+        models.append(model)
+        generators.append(TLm)
+
+    await setup_dut(dut)
+    for TLm in generators:
+        await TLm.sim_finished()
+    uniform, guided = models
+    assert guided.holes == 0, f"{guided.holes} bins not hit"
+    assert uniform.holes > 0
+    assert not (guided.stimulus_hits * ~guided.legal).any(), "Illegal requests sent"
+
+
+@cocotb.test() # type: ignore
+async def test_coverage_merge(dut: SimHandle) -> None:
+    address_width, data_width = get_parameters(dut)
+    collectors = []
+    generators = []
+    for seed in (1, 2):
+        # Generators use 4-bit sources, the ones above 3 go to the overflow bin
+        collector = TileLinkULCoverageCollector(data_width, source_width=2)
+        TLm = SimTrafficGeneratorUL(bus_width=data_width, addr_width=address_width, num_of_transactions=300,
+                                    seed=seed)
+        TLm.register_clock(dut.clk).register_reset(dut.rstn, True)
+
+        TLs = SimSimpleSlaveUL(data_width, size=0x8000)
+        TLs.register_clock(dut.clk).register_reset(dut.rstn, True)
+        TLs.register_master(TLm.get_master_interface())
+        TLm.register_slave(TLs.get_slave_interface())
+
+        TLmonitor = TileLinkULMonitor().register_clock(dut.clk).register_reset(dut.rstn, True)
+        TLmonitor.register_device(TLm).register_listener(collector)
+
+        for process in (TLs.process(), TLm.process(), TLmonitor.process()):
+            cocotb.fork(process)
+        collectors.append(collector)
+        generators.append(TLm)
+
+    await setup_dut(dut)
+    for TLm in generators:
+        await TLm.sim_finished()
+
+    with tempfile.TemporaryDirectory() as coverage_dir:
+        paths = [os.path.join(coverage_dir, f"coverage{i}.npz") for i in range(len(collectors))]
+        for collector, path in zip(collectors, paths):
+            collector.save(path)
+        merged = TileLinkULCoverageCollector.merge_files(paths)
+    assert (merged.hits == collectors[0].hits + collectors[1].hits).all()
+    assert merged.source_overflow > 0
+    assert merged.source_hits.sum() + merged.source_overflow == merged.latency_hits.sum() == 600
+    try:
+        TileLinkULCoverageCollector.merge_files([])
+    except AssertionError:
+        pass
+    else:
+        assert False, "Merging no files did not fail"
+    assert merged.coverage() >= max(collector.coverage() for collector in collectors)
+
+
+@cocotb.test() # type: ignore
+async def test_protocol_fuzzer(dut: SimHandle) -> None:
+    address_width, data_width = get_parameters(dut)
+
+    # Stands in for a DUT bug: the slave "fails" once it answers three requests with an error
+    async def run(TLm: SimTraceReplayMasterUL) -> bool:
+        TLm.register_clock(dut.clk).register_reset(dut.rstn, True)
+        TLs = SimCheckInvalidSlaveUL(data_width, size=0x8000)
+        TLs.register_clock(dut.clk).register_reset(dut.rstn, True)
+        TLs.register_master(TLm.get_master_interface())
+        TLm.register_slave(TLs.get_slave_interface())
+        tasks = [cocotb.fork(TLs.process()), cocotb.fork(TLm.process())]
+
+        dut.rstn.value = 0
+        await ClockCycles(dut.clk, 10)
+        dut.rstn.value = 1
+        await TLm.sim_finished()
+        for task in tasks:
+            task.kill()
+        return TLm.errors >= 3
+
+    await setup_dut(dut)
+    with tempfile.TemporaryDirectory() as failure_dir:
+        fuzzer = SimProtocolFuzzerUL(run, data_width, address_width, failure_dir, seed=1)
+        minimized = await fuzzer.fuzz(iterations=2, length=200)
+        assert len(minimized) == len(fuzzer.failures) == 2
+        for path in minimized:
+            assert len(list(read_trace(path))) == 3
+
+
+async def test_issue_pacing(dut: SimHandle, pacing: Optional[Dict[str, int]] = None) -> None:
+    address_width, data_width = get_parameters(dut)
+    pacing = pacing or {}
+    TLm = SimSimpleMasterUL(data_width, **pacing)
+    TLm.register_clock(dut.clk).register_reset(dut.rstn, True)
+
+    TLs = SimSimpleSlaveUL(data_width)
+    TLs.register_clock(dut.clk).register_reset(dut.rstn, True)
+    TLs.register_master(TLm.get_master_interface())
+    TLm.register_slave(TLs.get_slave_interface())
+
+    cocotb.fork(TLs.process())
+    cocotb.fork(TLm.process())
+    await setup_dut(dut)
+
+    cycles = 0
+    issues: List[int] = []
+
+    async def count_cycles() -> None:
+        nonlocal cycles
+        while True:
+            await RisingEdge(dut.clk)
+            cycles += 1
+            if TLm.was_a_handshake:
+                issues.append(cycles)
+
+    length = 256
+    counter = cocotb.fork(count_cycles())
+    TLm.write(0, length, [randint(0, 255) for _ in range(length)], [True] * length)
+    await TLm.source_free(0)
+    cold_start = cycles
+
+    # Token buckets start full, so the first burst goes out unpaced
+    bus_byte_width = data_width // 8
+    beats = length // bus_byte_width
+    expected = 0
+    if "bytes_per_cycle" in pacing:
+        expected = max(expected, (length - bus_byte_width) // pacing["bytes_per_cycle"])
+    if "max_issues" in pacing:
+        expected = max(expected, (beats - pacing["max_issues"]) * pacing["issue_window"] // pacing["max_issues"])
+    # A few cycles of handshake latency on top of the paced ones
+    assert expected <= cold_start <= expected + 8, f"{cold_start} cycles, expected {expected}"
+
+    # After an idle gap the limits still hold over any window, not only from a cold start
+    await ClockCycles(dut.clk, 300)
+    TLm.write(0, length, [randint(0, 255) for _ in range(length)], [True] * length)
+    await TLm.source_free(0)
+    await RisingEdge(dut.clk)
+    counter.kill()
+    assert len(issues) == 2 * beats, f"{len(issues)} {beats}"
+
+    for window in (1, 16, 100, 300):
+        for start in issues:
+            issued = sum(1 for cycle in issues if start <= cycle < start + window)
+            if "bytes_per_cycle" in pacing:
+                assert issued * bus_byte_width <= bus_byte_width + window * pacing["bytes_per_cycle"], \
+                    f"{issued} beats in {window} cycles from cycle {start}"
+            if "max_issues" in pacing:
+                limit = pacing["max_issues"] * -(-window // pacing["issue_window"])
+                assert issued <= limit, f"{issued} beats in {window} cycles from cycle {start}"
+
+
+issue_pacing = TestFactory(test_issue_pacing)
+issue_pacing.add_option('pacing', ({"bytes_per_cycle": 1}, {"max_issues": 4, "issue_window": 100}))
+issue_pacing.generate_tests()
+
+
+@cocotb.test() # type: ignore
+async def test_saturation(dut: SimHandle) -> None:
+    address_width, data_width = get_parameters(dut)
+    generators = []
+    for saturate in (False, True):
+        TLm = SimTrafficGeneratorUL(bus_width=data_width, addr_width=address_width, num_of_transactions=int(2e3),
+                                    saturate=saturate)
+        TLm.register_clock(dut.clk).register_reset(dut.rstn, True)
+
+        TLs = SimSimpleSlaveUL(data_width, size=0x8000)
+        TLs.register_clock(dut.clk).register_reset(dut.rstn, True)
+        TLs.register_master(TLm.get_master_interface())
+        TLm.register_slave(TLs.get_slave_interface())
+
+        TLr = SimRandomTrafficGeneratorUL(bus_width=data_width, addr_width=address_width, saturate=saturate)
+        TLr.register_clock(dut.clk).register_reset(dut.rstn, True)
+
+        TLi = SimCheckInvalidSlaveUL(data_width, size=0x8000)
+        TLi.register_clock(dut.clk).register_reset(dut.rstn, True)
+        TLi.register_master(TLr.get_master_interface())
+        TLr.register_slave(TLi.get_slave_interface())
+
+        for process in (TLs.process(), TLm.process(), TLi.process(), TLr.process()):
+            cocotb.fork(process)
+        generators.append((TLm, TLr))
+
+    await setup_dut(dut)
+    for TLm, TLr in generators:
+        await TLm.sim_finished()
+        await TLr.sim_finished()
+    (random_m, random_r), (saturated_m, saturated_r) = generators
+    assert saturated_m.beats == int(2e3)
+    assert saturated_m.beats / saturated_m.cycles > random_m.beats / random_m.cycles
+    assert saturated_r.beats / saturated_r.cycles > random_r.beats / random_r.cycles
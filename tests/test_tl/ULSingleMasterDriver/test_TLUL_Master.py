@@ -11,10 +11,18 @@ from cocotb.triggers import ClockCycles, Combine, Join, RisingEdge # type: ignor
 
 from cocotb_TileLink.TileLink_common.TileLink_types import*
 
+from cocotb_TileLink.TileLink_common.TrafficProfile import TileLinkULTrafficProfile, TileLinkULUniformAddresses
+
 from cocotb_TileLink.drivers.SimSimpleMasterUL import SimSimpleMasterUL
+from cocotb_TileLink.drivers.SimTrafficGeneratorUL import SimTrafficGeneratorUL
 
 from cocotb_TileLink.drivers.DutMultiMasterSlaveUL import DutMultiMasterSlaveUL
 
+from cocotb_TileLink.monitors.TileLinkULMonitor import TileLinkULMonitor
+from cocotb_TileLink.scoreboards.TileLinkULOrderingScoreboard import TileLinkULOrderingScoreboard
+from cocotb_TileLink.scoreboards.TileLinkULMemoryScoreboard import TileLinkULMemoryScoreboard
+from cocotb_TileLink.scoreboards.TileLinkULHazardChecker import TileLinkULHazardChecker
+
 CLK_PERIOD = (10, "ns")
 
 def update_expected_value(previous_value: List[int], write_value: List[int], mask: List[bool]) -> List[int]:
@@ -247,6 +255,170 @@ async def test_multiple_masters(dut: SimHandle, num: int = 4, multiply: int = 1)
 
 
 
+async def test_multiple_masters_scoreboard(dut: SimHandle, num: int = 16) -> None:
+    await setup_dut(dut)
+    address_width, bus_width = get_parameters(dut)
+    bus_byte_width = bus_width//8
+
+    TLm = SimSimpleMasterUL(bus_width).register_clock(dut.clk).register_reset(dut.rstn, True)
+    TLs = DutMultiMasterSlaveUL(dut)
+
+    TLm.register_slave(TLs.get_slave_interface())
+    TLs.register_master(TLm.get_master_interface())
+
+    scoreboard = TileLinkULOrderingScoreboard(bus_width)
+    hazard_checker = TileLinkULHazardChecker(max_warnings=10)
+    TLmonitor = TileLinkULMonitor().register_clock(dut.clk).register_reset(dut.rstn, True)
+    TLmonitor.register_device(TLm).register_listener(scoreboard).register_listener(hazard_checker)
+
+    cocotb.fork(TLs.process())
+    cocotb.fork(TLm.process())
+    cocotb.fork(TLmonitor.process())
+
+    base_address = randrange(0, 0x4000 - 4 * bus_byte_width, bus_byte_width)
+    for _ in range(10):
+        for i in range(num):
+            address = base_address + randrange(0, 2 * bus_byte_width)
+            length = randint(1, 2 * bus_byte_width)
+            if randint(0, 1):
+                TLm.read(address, length, i)
+            else:
+                TLm.write(address, length, [randint(0, 255) for _ in range(length)],
+                          [bool(randint(0, 1)) for _ in range(length)], i)
+        for i in range(num):
+            await TLm.source_free(i)
+            TLm.get_rsp(i)
+
+    assert scoreboard.reads_checked > 0
+    assert hazard_checker.checked > 0
+    hazard_checker.report()
+    TLm.finish()
+    await TLm.sim_finished()
+
+
+@cocotb.test() # type: ignore
+async def test_hazard_kinds(dut: SimHandle) -> None:
+    hazard_checker = TileLinkULHazardChecker()
+    # Opcodes are plain ints, as sampled from the bus
+    get = TileLinkAPacket(int(TileLinkULAOP.Get), 0, 2, 0, 0x100, 0xF, 0)
+    put = TileLinkAPacket(int(TileLinkULAOP.PutFullData), 0, 2, 1, 0x102, 0xF, 0)
+    ack = TileLinkDPacket(int(TileLinkULDOP.AccessAck), 0, 2, 1)
+
+    hazard_checker.transaction_started("bus", get, 0)
+    hazard_checker.transaction_started("bus", put, 1)
+    assert hazard_checker.hazards == {"RAW": 0, "WAR": 1, "WAW": 0}
+    hazard_checker.transaction_finished("bus", put, ack, 1, 2)
+
+    # Accesses that do not overlap the in-flight read are not hazards
+    hazard_checker.transaction_started("bus", put._replace(a_address=0x104), 3)
+    assert hazard_checker.hazards == {"RAW": 0, "WAR": 1, "WAW": 0}
+    hazard_checker.transaction_finished("bus", put, ack, 3, 4)
+
+    # On another bus the same source is another requester
+    hazard_checker.transaction_started("other", put, 5)
+    hazard_checker.transaction_started("bus", put, 5)
+    assert hazard_checker.hazards == {"RAW": 0, "WAR": 3, "WAW": 1}
+    hazard_checker.transaction_started("bus", get._replace(a_source=2, a_address=0x103, a_size=0), 6)
+    assert hazard_checker.hazards == {"RAW": 2, "WAR": 3, "WAW": 1}
+    assert hazard_checker.checked == 6 and hazard_checker.max_in_flight == 4
+
+
+
+@cocotb.test() # type: ignore
+async def test_ordering_scoreboard_errors(dut: SimHandle) -> None:
+    address_width, bus_width = get_parameters(dut)
+    put = TileLinkAPacket(TileLinkULAOP.PutFullData, 0, 0, 0, 0x101, 0x2, 0xAA00)
+    get = TileLinkAPacket(TileLinkULAOP.Get, 0, 0, 1, 0x101, 0x2, 0)
+    ack = TileLinkDPacket(TileLinkULDOP.AccessAck, 0, 0, 0)
+
+    def read_data(value: int) -> TileLinkDPacket:
+        return TileLinkDPacket(TileLinkULDOP.AccessAckData, 0, 0, 1, d_data=value << 8)
+
+    def check(read_value: int, read_start: int, read_end: int) -> None:
+        scoreboard = TileLinkULOrderingScoreboard(bus_width)
+        scoreboard.init_memory([0x11], 0x101)
+        scoreboard.check_trace([("bus", put, ack, 10, 20), ("bus", get, read_data(read_value), read_start, read_end)])
+
+    # Either value may be read while the write is in flight
+    check(0x11, 15, 16)
+    check(0xAA, 15, 16)
+    check(0xAA, 25, 26)
+    for read_value, read_start, read_end, problem in ((0x11, 25, 26, "stale"), (0xAA, 4, 5, "out-of-window"),
+                                                     (0x55, 15, 16, "never written")):
+        try:
+            check(read_value, read_start, read_end)
+        except AssertionError as error:
+            assert "0x101" in str(error)
+        else:
+            assert False, f"A {problem} read was not flagged"
+
+
+@cocotb.test() # type: ignore
+async def test_memory_scoreboard_write_during_read(dut: SimHandle) -> None:
+    address_width, bus_width = get_parameters(dut)
+    bus_byte_width = bus_width//8
+    size = bus_byte_width.bit_length() - 1
+    full_mask = 2**bus_byte_width - 1
+    get = TileLinkAPacket(TileLinkULAOP.Get, 0, size, 1, 0x100, full_mask, 0)
+    put = TileLinkAPacket(TileLinkULAOP.PutFullData, 0, size, 2, 0x100, full_mask,
+                          int.from_bytes(b"\x22" * bus_byte_width, "little"))
+    ack = TileLinkDPacket(TileLinkULDOP.AccessAck, 0, size, 2)
+
+    def read_data(value: bytes) -> TileLinkDPacket:
+        return TileLinkDPacket(TileLinkULDOP.AccessAckData, 0, size, 1, d_data=int.from_bytes(value, "little"))
+
+    scoreboard = TileLinkULMemoryScoreboard(bus_width)
+    scoreboard.init_memory([0x11] * bus_byte_width, 0x100)
+
+    # A read accepted before the write returns the old data
+    scoreboard.transaction_started("bus", get, 0)
+    scoreboard.transaction_started("bus", put, 1)
+    scoreboard.transaction_finished("bus", get, read_data(b"\x11" * bus_byte_width), 0, 2)
+    scoreboard.transaction_finished("bus", put, ack, 1, 3)
+
+    # Only the lanes of a partial write are changed
+    scoreboard.transaction_started("bus", put._replace(a_opcode=TileLinkULAOP.PutPartialData, a_mask=0b101,
+                                                       a_data=int.from_bytes(b"\x33" * bus_byte_width, "little")), 4)
+    scoreboard.transaction_started("bus", get, 5)
+    scoreboard.transaction_finished("bus", get, read_data(b"\x33\x22\x33" + b"\x22" * (bus_byte_width - 3)), 5, 6)
+    assert scoreboard.bytes_checked == 2 * bus_byte_width
+
+    scoreboard.transaction_started("bus", get, 7)
+    try:
+        scoreboard.transaction_finished("bus", get, read_data(b"\x22" * bus_byte_width), 7, 8)
+    except AssertionError as error:
+        assert "0x100" in str(error)
+    else:
+        assert False, "A stale read was not flagged"
+
+
+async def test_outstanding_depth(dut: SimHandle, max_outstanding: int = 1) -> None:
+    await setup_dut(dut)
+    address_width, bus_width = get_parameters(dut)
+    source_width = dut.TL_AIW.value
+
+    profile = TileLinkULTrafficProfile(addresses=TileLinkULUniformAddresses([(0, 0x8000)]))
+    TLm = SimTrafficGeneratorUL(int(2e3), bus_width, address_width, profile=profile, saturate=True,
+                                source_width=source_width, max_outstanding=max_outstanding)
+    TLm.register_clock(dut.clk).register_reset(dut.rstn, True)
+    TLs = DutMultiMasterSlaveUL(dut)
+
+    TLm.register_slave(TLs.get_slave_interface())
+    TLs.register_master(TLm.get_master_interface())
+
+    hazard_checker = TileLinkULHazardChecker(max_warnings=0)
+    TLmonitor = TileLinkULMonitor().register_clock(dut.clk).register_reset(dut.rstn, True)
+    TLmonitor.register_device(TLm).register_listener(hazard_checker)
+
+    cocotb.fork(TLs.process())
+    cocotb.fork(TLm.process())
+    cocotb.fork(TLmonitor.process())
+
+    await TLm.sim_finished()
+    assert TLm.beats == int(2e3)
+    assert hazard_checker.max_in_flight <= max_outstanding, \
+        f"{hazard_checker.max_in_flight} requests in flight with max_outstanding={max_outstanding}"
+
 
 single_master_sizes = TestFactory(test_single_master_sizes)
 single_master_sizes.add_option('read_size', (0,1,2))
@@ -258,3 +430,13 @@ multiple_masters = TestFactory(test_multiple_masters)
 multiple_masters.add_option('num', (2,4,6,8))
 multiple_masters.add_option('multiply', (2,2,4,6,8,10))
 multiple_masters.generate_tests()
+
+
+multiple_masters_scoreboard = TestFactory(test_multiple_masters_scoreboard)
+multiple_masters_scoreboard.add_option('num', (4, 16))
+multiple_masters_scoreboard.generate_tests()
+
+
+outstanding_depth = TestFactory(test_outstanding_depth)
+outstanding_depth.add_option('max_outstanding', (1, 16, 256))
+outstanding_depth.generate_tests()